@@ -1,4 +1,6 @@
 from pathlib import Path
+import asyncio
+import os
 import sys
 
 import numpy as np
@@ -12,6 +14,11 @@ except ImportError:
     sys.path.insert(0, str(repo_root))
     from KiCad.Active_E_Field_Probe.stage_NP_PhZ_bias.stage_1_2_bias.specs_stage_1_2_bias import specs
 
+from python_files.bias_solver import solve_lockstep
+from python_files.async_sim import run_bounded, run_sync
+from python_files.ngspice_batch import make_job, run_job, run_job_async
+from python_files.ngspice_shared import open_session
+
 
 SCH_NAME = "stage_1_2_bias.kicad_sch"
 CIR_NAME = "stage_1_2_bias"
@@ -26,6 +33,25 @@ VGS1C_N_START = 0.0
 VGS1C_N_STOP = 1.2
 VGS1C_N_STEP = 0.05
 
+# Bias solver: refine VGS1_N / VGS1C_N to BIAS_XTOL volts. Without libngspice a
+# coarse DC sweep per unknown brackets its crossing and a fine sweep around it
+# refines it; the sweeps of both unknowns overlap (asyncio subprocesses).
+# BIAS_FULL_SWEEP=1 prints the full VGS1_N x VGS1C_N crossing table instead.
+BIAS_XTOL = 1e-4
+BIAS_COARSE_STEP = 0.05
+BIAS_FINE_STEP = 1e-3
+BIAS_FULL_SWEEP = os.getenv("BIAS_FULL_SWEEP", "0") == "1"
+
+# X1 (gate V11) sets VGS1_N and X8 (gate V5) sets VGS1C_N; each current only
+# depends on its own gate source.
+BIAS_UNKNOWNS = {"VGS1_N": "I_X1", "VGS1C_N": "I_X8"}
+DEVICE_CURRENTS = {"I_X1": "@x1.m1[id]", "I_X8": "@x8.m1[id]"}
+BRANCH_CURRENTS = {"I_X1": "I(V7)", "I_X8": "I(V8)"}
+
+# ngspice backend: "auto" uses libngspice when it can be loaded and the ngspice
+# executable otherwise; "shared" / "subprocess" force one of them.
+NGSPICE_BACKEND = os.getenv("NGSPICE_BACKEND", "auto").lower()
+
 
 def _spec_value(symbol, default=None):
     for item in specs:
@@ -71,57 +97,248 @@ def _export_spice_with_specs(base_cir_path, out_cir_path, spec_list):
     Path(out_cir_path).write_text(out_text, encoding="utf-8")
 
 
-def _find_crossing(x, y, target):
-    if len(x) == 0:
-        return None, None
-    y = np.asarray(y, dtype=float)
+def _find_crossings(x, y, target):
+    """
+    Vectorized crossing search over the rows of y (shape [rows, len(x)]).
+    Returns (x_cross, err): the linearly interpolated x where a row first crosses
+    target (err=0), or the x closest to target and its absolute error.
+    """
     x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    if x.size == 0:
+        nan = np.full(y.shape[0], np.nan)
+        return nan, nan
+
     diff = y - target
     sign = np.sign(diff)
-    for idx in range(len(diff) - 1):
-        if sign[idx] == 0:
-            return float(x[idx]), 0.0
-        if sign[idx] * sign[idx + 1] < 0:
-            x0, x1 = x[idx], x[idx + 1]
-            y0, y1 = diff[idx], diff[idx + 1]
-            if y1 == y0:
-                return float(x0), 0.0
-            return float(x0 - y0 * (x1 - x0) / (y1 - y0)), 0.0
-    closest = int(np.argmin(np.abs(diff)))
-    return float(x[closest]), float(abs(diff[closest]))
-
-
-def _run_dc_sweep(vgs1c_value, target_id):
-    cir_file = str(Path("cir") / CIR_NAME_SPECS)
-    sim_cmd = f"dc V11 {VGS1_N_START} {VGS1_N_STOP} {VGS1_N_STEP}"
-    names = {
-        "I_X1": "@x1.m1[id]",
-        "I_X8": "@x8.m1[id]",
-    }
-    par_list = _build_par_list(
-        overrides={
-            "VGS1_N": VGS1_N_START,
-            "VGS1C_N": vgs1c_value,
-        }
-    )
+    hit = (sign[:, :-1] == 0) | (sign[:, :-1] * sign[:, 1:] < 0)
+    has_hit = hit.any(axis=1)
+    idx = np.argmax(hit, axis=1)
+    rows = np.arange(y.shape[0])
+
+    x0 = x[idx]
+    x1 = x[np.minimum(idx + 1, x.size - 1)]
+    y0 = diff[rows, idx]
+    y1 = diff[rows, np.minimum(idx + 1, x.size - 1)]
+    denom = np.where(y1 == y0, 1.0, y1 - y0)
+    x_interp = np.where((y0 == 0) | (y1 == y0), x0, x0 - y0 * (x1 - x0) / denom)
+
+    closest = np.argmin(np.abs(diff), axis=1)
+    x_cross = np.where(has_hit, x_interp, x[closest])
+    err = np.where(has_hit, 0.0, np.abs(diff[rows, closest]))
+    return x_cross, err
+
+
+def _ngspice_command():
+    return os.getenv("NGSPICE_CMD") or getattr(ini, "ngspice", "") or "ngspice"
+
+
+def _run_control_script(cir_file, analysis, names, par_list):
+    """Run one ngspice batch job on cir_file and return (scale, {label: vector})."""
+    job = make_job(cir_file, analysis, names, params=dict(par_list or []), ngspice=_ngspice_command())
+    result = run_job(job)
+    return result["scale"], result["vectors"]
+
+
+def _shared_session():
+    if NGSPICE_BACKEND == "subprocess":
+        return None
+    session = open_session()
+    if session is None and NGSPICE_BACKEND == "shared":
+        raise RuntimeError("NGSPICE_BACKEND=shared but libngspice could not be loaded.")
+    return session
+
+
+def _run_shared(session, cir_file, analysis, names, par_list):
+    """Same as _run_control_script, in the persistent libngspice session."""
+    if session.load_netlist(Path(cir_file).read_text(encoding="utf-8")):
+        device_vectors = [vec for vec in names.values() if vec.startswith("@")]
+        if device_vectors:
+            session.command("save all " + " ".join(device_vectors))
+    # Only parameters that differ from the previous solve are altered.
+    session.alterparam({name: value for name, value in par_list or [] if value not in (None, "")})
+    session.run(analysis, lets=names)
+    try:
+        scale = session.scale()
+    except KeyError:
+        scale = None  # .op has no sweep variable
+    return scale, {label: session.vector(label) for label in names}
+
+
+def _run_sweep(cir_file, analysis, names, par_list):
+    session = _shared_session()
+    if session is not None:
+        return _run_shared(session, cir_file, analysis, names, par_list)
+    return _run_control_script(cir_file, analysis, names, par_list)
+
 
+def _run_currents(analysis, par_list):
+    """Run analysis on the specs netlist; return (scale, {"I_X1": ..., "I_X8": ...})."""
+    cir_file = Path("cir") / f"{CIR_NAME_SPECS}.cir"
     try:
-        traces, x_name, x_units = ngspice2traces(cir_file, sim_cmd, names, parList=par_list)
+        return _run_sweep(cir_file, analysis, DEVICE_CURRENTS, par_list)
     except Exception:
         # Fallback to branch currents if subckt currents are unavailable.
-        names = {
-            "I_X1": "I(V7)",
-            "I_X8": "I(V8)",
-        }
         print("WARNING: Falling back to branch currents I(V7)/I(V8); these are not per-device currents.")
-        traces, x_name, x_units = ngspice2traces(cir_file, sim_cmd, names, parList=par_list)
+        return _run_sweep(cir_file, analysis, BRANCH_CURRENTS, par_list)
+
+
+def _reshape_nested(scale, vectors):
+    """Split a nested DC sweep into (inner scale, {label: [n_outer, n_inner] array})."""
+    # The inner sweep length is where the scale first wraps around.
+    wraps = np.nonzero(np.diff(scale) < 0)[0]
+    n_inner = int(wraps[0]) + 1 if wraps.size else scale.size
+    n_outer = scale.size // n_inner
+    if n_outer * n_inner != scale.size:
+        raise RuntimeError(
+            f"Unexpected nested sweep size {scale.size} (inner sweep length {n_inner})."
+        )
+    return scale[:n_inner], {label: vec.reshape(n_outer, n_inner) for label, vec in vectors.items()}
+
+
+def _nested_sweep(vgs1_range, vgs1c_range):
+    """Nested DC sweep, V11 (VGS1_N) inner and V5 (VGS1C_N) outer; ranges are (start, stop, step)."""
+    sim_cmd = "dc V11 {} {} {} V5 {} {} {}".format(*vgs1_range, *vgs1c_range)
+    par_list = _build_par_list(overrides={"VGS1_N": vgs1_range[0], "VGS1C_N": vgs1c_range[0]})
+    scale, vectors = _run_currents(sim_cmd, par_list)
+    return _reshape_nested(scale, vectors)
+
+
+def _run_dc_sweep_2d(vgs1c_values, target_id):
+    """
+    One nested ngspice DC sweep over the full VGS1_N x VGS1C_N grid.
+    Returns (vgs1_values, vgs1c_values, (vgs1_n_x1, err_x1), (vgs1_n_x8, err_x8))
+    with one crossing per VGS1C_N value.
+    """
+    vgs1_values, currents = _nested_sweep(
+        (VGS1_N_START, VGS1_N_STOP, VGS1_N_STEP), (VGS1C_N_START, VGS1C_N_STOP, VGS1C_N_STEP)
+    )
+    n_outer = currents["I_X1"].shape[0]
+    if n_outer != len(vgs1c_values):
+        print(f"WARNING: ngspice returned {n_outer} VGS1C_N steps, expected {len(vgs1c_values)}.")
+        vgs1c_values = VGS1C_N_START + VGS1C_N_STEP * np.arange(n_outer)
+    return (
+        vgs1_values,
+        vgs1c_values,
+        _find_crossings(vgs1_values, currents["I_X1"], target_id),
+        _find_crossings(vgs1_values, currents["I_X8"], target_id),
+    )
 
-    i_x1 = traces["I_X1"]
-    i_x8 = traces["I_X8"]
 
-    vgs1_n_x1, err_x1 = _find_crossing(i_x1.xData, i_x1.yData, target_id)
-    vgs1_n_x8, err_x8 = _find_crossing(i_x8.xData, i_x8.yData, target_id)
-    return (vgs1_n_x1, err_x1), (vgs1_n_x8, err_x8)
+def _solve_bias_op(session, target_id):
+    """Lockstep Brent on VGS1_N and VGS1C_N with one .op per step (libngspice session)."""
+    cir_file = Path("cir") / f"{CIR_NAME_SPECS}.cir"
+    base = dict(_build_par_list())
+    names = dict(DEVICE_CURRENTS)
+
+    def evaluate(point):
+        nonlocal names
+        params = dict(base)
+        params.update(point)
+        try:
+            _, vectors = _run_shared(session, cir_file, "op", names, list(params.items()))
+        except (RuntimeError, KeyError):
+            if names == BRANCH_CURRENTS:
+                raise
+            print("WARNING: Falling back to branch currents I(V7)/I(V8); these are not per-device currents.")
+            names = dict(BRANCH_CURRENTS)
+            _, vectors = _run_shared(session, cir_file, "op", names, list(params.items()))
+        return {unknown: float(vectors[label][0]) - target_id for unknown, label in BIAS_UNKNOWNS.items()}
+
+    brackets = {
+        "VGS1_N": (VGS1_N_START, VGS1_N_STOP),
+        "VGS1C_N": (VGS1C_N_START, VGS1C_N_STOP),
+    }
+    # Unconverged unknowns report the residual of their closest point, like the sweeps.
+    return solve_lockstep(evaluate, brackets, xtol=BIAS_XTOL)
+
+
+def _bias_sweep_job(name, window, step, vectors):
+    """1D DC sweep of one unknown: V11 (VGS1_N) for I_X1 or V5 (VGS1C_N) for I_X8."""
+    cir_file = Path("cir") / f"{CIR_NAME_SPECS}.cir"
+    source = {"VGS1_N": "V11", "VGS1C_N": "V5"}[name]
+    params = dict(_build_par_list())
+    params[name] = window[0]
+    return make_job(
+        cir_file,
+        f"dc {source} {window[0]} {window[1]} {step}",
+        vectors,
+        params=params,
+        name=name,
+        ngspice=_ngspice_command(),
+    )
+
+
+async def _sweep_unknown(name, target_id, vectors):
+    """Coarse sweep to bracket the crossing of one unknown, then a fine sweep around it."""
+    limits = {"VGS1_N": (VGS1_N_START, VGS1_N_STOP), "VGS1C_N": (VGS1C_N_START, VGS1C_N_STOP)}[name]
+    window = limits
+    root = residual = None
+    runs = 0
+    for step in (BIAS_COARSE_STEP, BIAS_FINE_STEP):
+        result = await run_job_async(_bias_sweep_job(name, window, step, vectors))
+        runs += 1
+        current = result["vectors"][BIAS_UNKNOWNS[name]]
+        x_cross, err = _find_crossings(result["scale"], current, target_id)
+        root = float(x_cross[0]) if err[0] == 0.0 else None
+        residual = float(err[0])
+        center = float(x_cross[0])
+        window = (max(center - step, limits[0]), min(center + step, limits[1]))
+    return root, residual, runs
+
+
+def _solve_bias_sweeps(target_id):
+    """
+    Both unknowns are independent, so each runs its own coarse -> fine chain
+    and the chains overlap (asyncio subprocesses, see async_sim).
+    """
+
+    async def solve(vectors):
+        factories = [lambda name=name: _sweep_unknown(name, target_id, vectors) for name in BIAS_UNKNOWNS]
+        return dict(zip(BIAS_UNKNOWNS, await run_bounded(factories, len(factories))))
+
+    try:
+        solutions = run_sync(solve(DEVICE_CURRENTS))
+    except (RuntimeError, OSError, asyncio.TimeoutError):
+        print("WARNING: Falling back to branch currents I(V7)/I(V8); these are not per-device currents.")
+        solutions = run_sync(solve(BRANCH_CURRENTS))
+    roots = {name: solution[0] for name, solution in solutions.items()}
+    residuals = {name: solution[1] for name, solution in solutions.items()}
+    return roots, residuals, sum(solution[2] for solution in solutions.values())
+
+
+def solve_bias(target_id):
+    """Return ({"VGS1_N": v, "VGS1C_N": v}, residual currents, simulator runs)."""
+    session = _shared_session()
+    if session is not None:
+        return _solve_bias_op(session, target_id)
+    return _solve_bias_sweeps(target_id)
+
+
+def _print_full_sweep(target_id):
+    vgs1c_values = np.arange(VGS1C_N_START, VGS1C_N_STOP + VGS1C_N_STEP / 2, VGS1C_N_STEP)
+    print("Sweep results (target ID1_N = {:.6e} A)".format(target_id))
+    print("VGS1C_N (V) | VGS1_N @ I_X1=ID1_N (V) | VGS1_N @ I_X8=ID1_N (V)")
+
+    _, vgs1c_values, (vgs1_n_x1, err_x1), (vgs1_n_x8, err_x8) = _run_dc_sweep_2d(vgs1c_values, target_id)
+    for row, vgs1c in enumerate(vgs1c_values):
+        print(f"{vgs1c:10.4f} | {vgs1_n_x1[row]:24.6f} | {vgs1_n_x8[row]:24.6f}")
+
+    # First VGS1C_N with the smallest error, as in the sequential search.
+    best_x1 = (None, float("inf"), None)
+    best_x8 = (None, float("inf"), None)
+    if np.isfinite(err_x1).any():
+        row = int(np.nanargmin(err_x1))
+        best_x1 = (float(vgs1c_values[row]), float(err_x1[row]), float(vgs1_n_x1[row]))
+    if np.isfinite(err_x8).any():
+        row = int(np.nanargmin(err_x8))
+        best_x8 = (float(vgs1c_values[row]), float(err_x8[row]), float(vgs1_n_x8[row]))
+
+    print("\nBest matches (by interpolation):")
+    if best_x1[2] is not None:
+        print(f"X1: VGS1C_N={best_x1[0]:.6f} V, VGS1_N={best_x1[2]:.6f} V, err={best_x1[1]:.3e} A")
+    if best_x8[2] is not None:
+        print(f"X8: VGS1C_N={best_x8[0]:.6f} V, VGS1_N={best_x8[2]:.6f} V, err={best_x8[1]:.3e} A")
 
 
 def run():
@@ -140,27 +357,19 @@ def run():
     if target_id is None:
         raise RuntimeError("ID1_N not found in specs list.")
 
-    vgs1c_values = np.arange(VGS1C_N_START, VGS1C_N_STOP + VGS1C_N_STEP / 2, VGS1C_N_STEP)
-    print("Sweep results (target ID1_N = {:.6e} A)".format(target_id))
-    print("VGS1C_N (V) | VGS1_N @ I_X1=ID1_N (V) | VGS1_N @ I_X8=ID1_N (V)")
-
-    best_x1 = (None, float("inf"), None)
-    best_x8 = (None, float("inf"), None)
-
-    for vgs1c in vgs1c_values:
-        (vgs1_n_x1, err_x1), (vgs1_n_x8, err_x8) = _run_dc_sweep(vgs1c, target_id)
-        print(f"{vgs1c:10.4f} | {vgs1_n_x1:24.6f} | {vgs1_n_x8:24.6f}")
-
-        if vgs1_n_x1 is not None and err_x1 is not None and err_x1 < best_x1[1]:
-            best_x1 = (vgs1c, err_x1, vgs1_n_x1)
-        if vgs1_n_x8 is not None and err_x8 is not None and err_x8 < best_x8[1]:
-            best_x8 = (vgs1c, err_x8, vgs1_n_x8)
-
-    print("\nBest matches (by interpolation):")
-    if best_x1[2] is not None:
-        print(f"X1: VGS1C_N={best_x1[0]:.6f} V, VGS1_N={best_x1[2]:.6f} V, err={best_x1[1]:.3e} A")
-    if best_x8[2] is not None:
-        print(f"X8: VGS1C_N={best_x8[0]:.6f} V, VGS1_N={best_x8[2]:.6f} V, err={best_x8[1]:.3e} A")
+    if BIAS_FULL_SWEEP:
+        _print_full_sweep(target_id)
+        return cir
+
+    print("Bias solution (target ID1_N = {:.6e} A)".format(target_id))
+    roots, residuals, runs = solve_bias(target_id)
+    for name, label in BIAS_UNKNOWNS.items():
+        device = label.split("_", 1)[1]
+        if roots[name] is None:
+            print(f"{device}: no crossing of ID1_N in the {name} range, closest err={abs(residuals[name]):.3e} A")
+        else:
+            print(f"{device}: {name}={roots[name]:.6f} V, err={abs(residuals[name]):.3e} A")
+    print(f"Simulator runs: {runs}")
 
     def _try_par(name):
         try:
@@ -1,9 +1,9 @@
 ################################################# Specifications #################################################
 from SLiCAP import *
-from python_files.generated_specs import specs_NP as base_specs
+from python_files.generated_specs.loader import load_specs
 
-# Start with the generated NP specs.
-specs = list(base_specs.specs)
+# Start with the generated NP specs (read from specs_NP.json, no generated code is executed).
+specs = list(load_specs("NP"))
 
 # Append additional specs below.
 # Example:
@@ -1,14 +1,23 @@
-from SLiCAP import *
+import argparse
 import json
 import os
 import shutil
+import subprocess
+import sys
+import time
 from pathlib import Path
 
+from python_files import report_builder, result_store
+
 
 CACHE_DIR = Path("cache")
 HTML_DIR = Path("html")
 HTML_IMG_DIR = HTML_DIR / "img"
+HTML_PAGE_PREFIX = "Active_E_Field_Probe_"
+HTML_INDEX_PAGES = (HTML_DIR / "index.html", HTML_DIR / f"{HTML_PAGE_PREFIX}index.html")
+REPORT_MANIFEST = CACHE_DIR / "report_manifest.json"
 GENERATED_SPECS_DIR = Path("python_files") / "generated_specs"
+PYTHON_FILES_DIR = Path("python_files")
 
 STAGE_PN = "KiCad/Active_E_Field_Probe/stage_PN/Active_E_Field_Probe.kicad_sch"
 STAGE_NP = "KiCad/Active_E_Field_Probe/stage_NP/Active_E_Field_Probe.kicad_sch"
@@ -22,6 +31,8 @@ STAGE_NN_PhZ = "KiCad/Active_E_Field_Probe/stage_NN_PhZ/Active_E_Field_Probe.kic
 STAGE_NBalSF_PhZ = "KiCad/Active_E_Field_Probe/stage_N_balSF_PhZ/Active_E_Field_Probe.kicad_sch"
 STAGE_PBalSF_PhZ = "KiCad/Active_E_Field_Probe/stage_P_balSF_PhZ/Active_E_Field_Probe.kicad_sch"
 
+# Optional per design: "objective" (stage-1 objective name) and "constraints"
+# (list of extra stage-1 constraint names), see python_files/cost_functions.py.
 DESIGN_SPECS = [
     # {
     #     "key": "NBalSF",
@@ -40,6 +51,7 @@ DESIGN_SPECS = [
         "project": STAGE_NP,
         "stage1_flavor": "N",
         "stage2_flavor": "P",
+        "objective": "stage1_cost",
     },
     # {
     #     "key": "PN",
@@ -77,6 +89,21 @@ DESIGN_SPECS = [
 # ]
 
 
+# Every topology/flavour combination with a schematic in the tree, used by the
+# `explore` command.
+EXPLORE_SPECS = [
+    {"key": "NP", "project": STAGE_NP, "stage1_flavor": "N", "stage2_flavor": "P"},
+    {"key": "PN", "project": STAGE_PN, "stage1_flavor": "P", "stage2_flavor": "N"},
+    {"key": "NN", "project": STAGE_NN, "stage1_flavor": "N", "stage2_flavor": "N"},
+    {"key": "NBalSF", "project": STAGE_NBalSF, "stage1_flavor": "N", "stage2_flavor": "PN"},
+    {"key": "PBalSF", "project": STAGE_PBalSF, "stage1_flavor": "P", "stage2_flavor": "NP"},
+    {"key": "NP_PhZ", "project": STAGE_NP_PhZ, "stage1_flavor": "N", "stage2_flavor": "P"},
+    {"key": "PN_PhZ", "project": STAGE_PN_PhZ, "stage1_flavor": "P", "stage2_flavor": "N"},
+    {"key": "NBalSF_PhZ", "project": STAGE_NBalSF_PhZ, "stage1_flavor": "N", "stage2_flavor": "PN"},
+    {"key": "PBalSF_PhZ", "project": STAGE_PBalSF_PhZ, "stage1_flavor": "P", "stage2_flavor": "NP"},
+]
+
+
 def _safe_name(raw_name):
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in raw_name)
 
@@ -107,6 +134,8 @@ def _load_first_stage_result(path):
 
 
 def _validate_cached_result(cir_obj, cfg, cached_payload):
+    from python_files.cost_functions import DEFAULT_OBJECTIVE
+
     meta = cached_payload.get("meta", {})
     result = cached_payload["result"]
 
@@ -116,6 +145,14 @@ def _validate_cached_result(cir_obj, cfg, cached_payload):
                 f"Cached first-stage result mismatch for '{cfg['key']}': "
                 f"design_key={meta.get('design_key')!r}."
             )
+    objective = cfg.get("objective") or DEFAULT_OBJECTIVE
+    cached_objective = result.get("objective", DEFAULT_OBJECTIVE)
+    if cached_objective != objective or list(result.get("constraints") or []) != list(cfg.get("constraints") or []):
+        raise RuntimeError(
+            f"Cached first-stage result for '{cfg['key']}' was optimized for objective "
+            f"{cached_objective!r} (constraints {result.get('constraints') or []}), "
+            f"the design selects {objective!r} (constraints {cfg.get('constraints') or []})."
+        )
     for key in ("w_param", "id_param", "wc_param"):
         par_name = result[key]
         try:
@@ -151,66 +188,128 @@ def _apply_first_stage_result(cir_obj, result):
     cir_obj.defPar(result["wc_param"], float(result["W1C"]))
 
 
-def _select_design_specs():
-    requested = os.getenv("RUN_DESIGNS", "").strip()
+def _select_design_specs(requested=None, specs=DESIGN_SPECS):
+    if requested is None:
+        requested = os.getenv("RUN_DESIGNS", "")
+    requested = requested.strip()
     if not requested:
-        return DESIGN_SPECS
+        return specs
 
     wanted = {item.strip().upper() for item in requested.split(",") if item.strip()}
-    selected = [cfg for cfg in DESIGN_SPECS if cfg["key"] in wanted]
+    selected = [cfg for cfg in specs if cfg["key"].upper() in wanted]
     if not selected:
         raise RuntimeError(
-            f"RUN_DESIGNS={requested!r} did not match any known design keys: "
-            + ", ".join(cfg["key"] for cfg in DESIGN_SPECS)
+            f"Designs {requested!r} did not match any known design keys: "
+            + ", ".join(cfg["key"] for cfg in specs)
         )
     return selected
 
 
-def _cleanup_html_outputs():
-    # Remove stale project indices to avoid duplicate table-of-contents links.
-    for file_name in ("index.html", "Active_E_Field_Probe_index.html", "Circuit-data.html"):
-        path = HTML_DIR / file_name
+def _cleanup_html_outputs(manifest):
+    # Project indices are rebuilt by initProject; links of pages that are not
+    # regenerated in this run are restored from the manifest afterwards.
+    for path in HTML_INDEX_PAGES + (HTML_DIR / "Circuit-data.html",):
         if path.exists():
             path.unlink()
 
-    # Remove stale circuit-performance pages from previous naming strategies.
-    for path in HTML_DIR.glob("Active_E_Field_Probe_Circuit-Performance*.html"):
-        path.unlink()
+    # Remove circuit-performance pages and plots that are not tracked by the
+    # report manifest (previous naming strategies, interrupted runs).
+    tracked = set()
+    for page_file, entry in manifest["pages"].items():
+        tracked.add(page_file)
+        tracked.update(entry.get("outputs", {}))
+
+    for path in HTML_DIR.glob(f"{HTML_PAGE_PREFIX}Circuit-Performance*.html"):
+        if path.name not in tracked:
+            path.unlink()
 
-    # Remove stale performance plots so only current-run outputs exist.
     for pattern in (
         "fb_mag*.svg",
         "ph_mag*.svg",
         "inoise*.svg",
         "Stepped_PZ_plot_P_peak*.svg",
         "Stepped_PZ_plot_LG_peak*.svg",
-        "Active_E_Field_Probe_*.svg",
+        f"{HTML_PAGE_PREFIX}*.svg",
     ):
         for path in HTML_IMG_DIR.glob(pattern):
-            path.unlink()
+            if f"img/{path.name}" not in tracked:
+                path.unlink()
 
 
 def _snapshot_circuit_image(design_key):
     src = HTML_IMG_DIR / "Active_E_Field_Probe.svg"
     if not src.exists():
         return "Active_E_Field_Probe.svg"
-    dst_name = f"Active_E_Field_Probe_{design_key.upper()}.svg"
+    dst_name = f"{HTML_PAGE_PREFIX}{design_key.upper()}.svg"
     dst = HTML_IMG_DIR / dst_name
-    shutil.copyfile(src, dst)
+    # Leave an identical snapshot untouched so its page stays current.
+    if report_builder.file_digest(dst) != report_builder.file_digest(src):
+        shutil.copyfile(src, dst)
     return dst_name
 
 
-def _dedupe_main_index_links():
-    index_path = HTML_DIR / "index.html"
-    if not index_path.exists():
-        return
-    token = '<li><a href="Active_E_Field_Probe_index.html">Active_E_Field_Probe</a></li>'
-    text = index_path.read_text(encoding="utf-8")
-    if text.count(token) <= 1:
-        return
-    text = text.replace(token, "")
-    text = text.replace("<!-- INSERT -->", f"{token}<!-- INSERT -->", 1)
-    index_path.write_text(text, encoding="utf-8")
+def _page_file(title):
+    return f"{HTML_PAGE_PREFIX}{title.replace(' ', '-')}.html"
+
+
+def _source_digest(module_name):
+    return report_builder.file_digest(PYTHON_FILES_DIR / f"{module_name}.py")
+
+
+def _spec_rows(spec_list):
+    rows = []
+    for spec in spec_list:
+        value = getattr(spec, "value", None)
+        rows.append(
+            [
+                str(getattr(spec, "symbol", "")),
+                value if isinstance(value, (int, float, str)) else str(value),
+                str(getattr(spec, "units", "")),
+                str(getattr(spec, "description", "")),
+                str(getattr(spec, "specType", "")),
+            ]
+        )
+    return rows
+
+
+# Run statistics that do not influence the generated pages. The warm-start
+# bookkeeping and iteration counts depend on the seed, not on the design.
+_VOLATILE_RESULT_KEYS = (
+    "elapsed_s",
+    "evaluations",
+    "workers",
+    "warm_start",
+    "iterations",
+    "ratio_iterations",
+    "gm_match_iterations",
+    "bias_iterations",
+)
+
+
+def _stable_result(result):
+    return {key: value for key, value in result.items() if key not in _VOLATILE_RESULT_KEYS}
+
+
+def _performance_page_inputs(result, spec_rows):
+    return {
+        "design": result["design"],
+        "project": result["project"],
+        "specs": spec_rows,
+        "first_stage": _stable_result(result["first_stage"]),
+        "second_stage": _stable_result(result["second_stage"]),
+        "third_stage": _stable_result(result["third_stage"]),
+        "phantom_zero": _stable_result(result["phantom_zero"]) if result.get("phantom_zero") else None,
+        "temperature_corners": result.get("temperature_corners"),
+        "monte_carlo": result.get("monte_carlo"),
+        "circuit_image": report_builder.file_digest(HTML_IMG_DIR / result["circuit_image"]),
+        "noise_image": report_builder.file_digest(HTML_IMG_DIR / "noise_function_plot_HZ.svg"),
+        "sources": [
+            _source_digest("html_circuit_performance"),
+            _source_digest("plot_generation"),
+            _source_digest("noise_compliance"),
+            _source_digest("stability"),
+        ],
+    }
 
 
 def _try_par(cir_obj, name):
@@ -235,6 +334,15 @@ def _ciss_summary(cir_obj, stage2_flavor):
     }
 
 
+def _json_spec_value(raw_value):
+    if isinstance(raw_value, str):
+        return raw_value
+    try:
+        return float(raw_value)
+    except Exception:
+        return str(raw_value)
+
+
 def _write_stage_specs_module(
     path,
     design_key,
@@ -245,6 +353,7 @@ def _write_stage_specs_module(
     first_stage_result,
     second_stage_result,
     third_stage_result,
+    phantom_zero_result=None,
 ):
     path.parent.mkdir(parents=True, exist_ok=True)
     init_path = path.parent / "__init__.py"
@@ -335,6 +444,10 @@ def _write_stage_specs_module(
         if "Wp" in third_stage_result:
             overrides["W_P"] = float(third_stage_result["Wp"])
 
+    # Compensation override from the phantom-zero tuning.
+    if phantom_zero_result:
+        overrides[phantom_zero_result["param"]] = float(phantom_zero_result["R_ph"])
+
     def _format_value(raw_value):
         if isinstance(raw_value, str):
             return raw_value
@@ -348,6 +461,7 @@ def _write_stage_specs_module(
     lines.append("from SLiCAP import *\n\n")
     lines.append(f"# Auto-generated stage specs for {design_key}\n\n")
     lines.append("specs = []\n\n")
+    records = []
 
     for spec in base_specs:
         symbol_raw = getattr(spec, "symbol", None)
@@ -365,6 +479,15 @@ def _write_stage_specs_module(
         elif symbol in stage_symbols:
             value = float(cir_obj.getParValue(symbol))
         formatted = _format_value(value)
+        records.append(
+            {
+                "symbol": symbol,
+                "description": description,
+                "value": _json_spec_value(value),
+                "units": units,
+                "specType": spec_type,
+            }
+        )
 
         lines.append(
             "specs.append(specItem("
@@ -377,101 +500,181 @@ def _write_stage_specs_module(
 
     path.write_text("".join(lines), encoding="utf-8")
 
+    # Same specs as plain data, readable without importing SLiCAP.
+    payload = {"design_key": design_key, "specs": records}
+    report_builder.write_text_atomic(path.with_suffix(".json"), json.dumps(payload, indent=1))
 
-def run():
-    _cleanup_html_outputs()
-    initProject("Active_E_Field_Probe")
+
+def _set_stage(name, design=None):
+    """Attribute SLiCAP calls (instrumentation) and the timeline (tracing) to a pipeline stage."""
+    from python_files import instrumentation, tracing
+
+    instrumentation.set_stage(name)
+    tracing.stage(f"{design}: {name}" if name and design else name, design=design)
+
+
+def _run_design(
+    cfg,
+    run_id,
+    spec_rows,
+    skip_first_stage=False,
+    mc_samples=0,
+    mc_seed=None,
+    first_stage_grid=None,
+    persist=True,
+):
+    """
+    Optimize one design (stages 3, 2, 1, compensation, corners, Monte Carlo).
+    first_stage_grid overrides the stage-1 sweep sizes (w_points, id_points);
+    persist=False skips the caches, generated specs and result store.
+    """
+    from python_files import monte_carlo
+    from python_files import phantom_zero
     from python_files import specifications
+    from python_files import warm_start
     from python_files.circuit import make_project_circuit
-    from python_files.three_optimize_third_stage import optimize_third_stage
-    from python_files.three_optimize_first_stage import optimize_first_stage_parallel
+    from python_files.corners import corner_performance, corner_temperatures
+    from python_files.noise_compliance import noise_spec
+    from python_files.three_optimize_first_stage import NOISE_FREQS, optimize_first_stage_parallel, optimizer_settings
     from python_files.three_optimize_second_stage import optimize_second_stage
-    from python_files.html_specifications import generate_specifications_html
-    from python_files.html_design_choices import generate_design_choices_html
-    from python_files.html_circuit_performance import (
-        generate_circuit_performance_html,
-        generate_circuit_performance_menu_html,
-    )
-
-    skip_first_stage = os.getenv("SKIP_FIRST_STAGE_OPT", "0") == "1"
-    design_runs = _select_design_specs()
-    all_results = []
-
-    generate_specifications_html()
-    generate_design_choices_html()
+    from python_files.three_optimize_third_stage import optimize_third_stage
 
-    for cfg in design_runs:
-        print("\n============================================================")
-        cache_key = cfg["key"]
-        html_key = cache_key
-        print(f"Running design: {cache_key}")
-        print(f"KiCad source : {cfg['project']}")
-        print("============================================================")
-
-        # Dedicated circuit instance per design.
-        cir = make_project_circuit(cfg["project"])
-        circuit_image = _snapshot_circuit_image(cache_key)
-        cache_path = _cache_path_for(cache_key)
-
-        print(f"[{cache_key}] Stage 3 optimization: START", flush=True)
-        third_stage_result = optimize_third_stage(cir)
-        print(f"[{cache_key}] Stage 3 optimization: DONE", flush=True)
+    if mc_seed is None:
+        mc_seed = monte_carlo.DEFAULT_SEED
+
+    print("\n============================================================")
+    cache_key = cfg["key"]
+    html_key = cache_key
+    print(f"Running design: {cache_key}")
+    print(f"KiCad source : {cfg['project']}")
+    print("============================================================")
+
+    timings = {}
+    t_design = time.perf_counter()
+
+    fingerprint = result_store.input_fingerprint(cfg, spec_rows, optimizer_settings())
+    seed = warm_start.find_seed(cfg, fingerprint) if warm_start.WARM_START else None
+    if seed:
+        print(f"[{cache_key}] Warm start from '{seed['source']}' (run {seed['run_id']}).")
+
+    # Dedicated circuit instance per design.
+    _set_stage("make_circuit", cache_key)
+    t0 = time.perf_counter()
+    cir = make_project_circuit(cfg["project"])
+    circuit_image = _snapshot_circuit_image(cache_key)
+    cache_path = _cache_path_for(cache_key)
+    timings["make_circuit_s"] = time.perf_counter() - t0
+
+    print(f"[{cache_key}] Stage 3 optimization: START", flush=True)
+    _set_stage("stage3", cache_key)
+    t0 = time.perf_counter()
+    third_stage_result = optimize_third_stage(cir, seed=(seed or {}).get("third_stage"))
+    timings["stage3_s"] = time.perf_counter() - t0
+    print(f"[{cache_key}] Stage 3 optimization: DONE", flush=True)
+
+    print(
+        f"[{cache_key}] Stage 2 optimization: START "
+        f"(requested flavor={cfg['stage2_flavor']})",
+        flush=True,
+    )
+    _set_stage("stage2", cache_key)
+    t0 = time.perf_counter()
+    second_stage_result = optimize_second_stage(
+        cir,
+        stage2_flavor=cfg["stage2_flavor"],
+        seed=(seed or {}).get("second_stage"),
+    )
+    timings["stage2_s"] = time.perf_counter() - t0
+    print(
+        f"[{cache_key}] Stage 2 optimization: DONE "
+        f"({second_stage_result['w_param']}={second_stage_result['W2']*1e6:.2f}um, "
+        f"{second_stage_result['id_param']}={second_stage_result['ID2']*1e3:.3f}mA)",
+        flush=True,
+    )
 
+    _set_stage("stage1", cache_key)
+    t0 = time.perf_counter()
+    if skip_first_stage:
+        if not cache_path.exists():
+            raise FileNotFoundError(
+                f"SKIP_FIRST_STAGE_OPT=1 but no cached result found at '{cache_path}'. "
+                "Run once without SKIP_FIRST_STAGE_OPT to generate it."
+            )
+        cached_payload = _load_first_stage_result(cache_path)
+        first_stage_result = _validate_cached_result(cir, cfg, cached_payload)
+        _apply_first_stage_result(cir, first_stage_result)
         print(
-            f"[{cache_key}] Stage 2 optimization: START "
-            f"(requested flavor={cfg['stage2_flavor']})",
-            flush=True,
+                f"[{cache_key}] Loaded cached first-stage result: "
+            f"{first_stage_result['w_param']}={first_stage_result['W1']}, "
+            f"{first_stage_result['id_param']}={first_stage_result['ID1']}, "
+            f"{first_stage_result['wc_param']}={first_stage_result['W1C']}"
         )
-        second_stage_result = optimize_second_stage(
+    else:
+        print(f"[{cache_key}] Stage 1 optimization: START", flush=True)
+        first_stage_result = optimize_first_stage_parallel(
             cir,
-            stage2_flavor=cfg["stage2_flavor"],
+            stage1_flavor=cfg["stage1_flavor"],
+            cascode_ciss_par=_stage1_ciss_par_for_stage2(cfg["stage2_flavor"], cfg["key"]),
+            seed=(seed or {}).get("first_stage"),
+            objective=cfg.get("objective"),
+            constraints=cfg.get("constraints"),
+            **(first_stage_grid or {}),
         )
-        print(
-            f"[{cache_key}] Stage 2 optimization: DONE "
-            f"({second_stage_result['w_param']}={second_stage_result['W2']*1e6:.2f}um, "
-            f"{second_stage_result['id_param']}={second_stage_result['ID2']*1e3:.3f}mA)",
-            flush=True,
-        )
-
-        if skip_first_stage:
-            if not cache_path.exists():
-                raise FileNotFoundError(
-                    f"SKIP_FIRST_STAGE_OPT=1 but no cached result found at '{cache_path}'. "
-                    "Run once without SKIP_FIRST_STAGE_OPT to generate it."
-                )
-            cached_payload = _load_first_stage_result(cache_path)
-            first_stage_result = _validate_cached_result(cir, cfg, cached_payload)
-            _apply_first_stage_result(cir, first_stage_result)
-            print(
-                    f"[{cache_key}] Loaded cached first-stage result: "
-                f"{first_stage_result['w_param']}={first_stage_result['W1']}, "
-                f"{first_stage_result['id_param']}={first_stage_result['ID1']}, "
-                f"{first_stage_result['wc_param']}={first_stage_result['W1C']}"
-            )
-        else:
-            print(f"[{cache_key}] Stage 1 optimization: START", flush=True)
-            first_stage_result = optimize_first_stage_parallel(
-                cir,
-                stage1_flavor=cfg["stage1_flavor"],
-                cascode_ciss_par=_stage1_ciss_par_for_stage2(cfg["stage2_flavor"], cfg["key"]),
+        if first_stage_result is None:
+            raise RuntimeError(
+                f"First-stage optimization did not produce a valid result for '{cache_key}'."
             )
-            if first_stage_result is None:
-                raise RuntimeError(
-                    f"First-stage optimization did not produce a valid result for '{cache_key}'."
-                )
+        if persist:
             _save_first_stage_result(cache_path, cfg, first_stage_result)
             print(f"[{cache_key}] Saved first-stage cache to '{cache_path}'.")
-            print(f"[{cache_key}] Stage 1 optimization: DONE", flush=True)
+        print(f"[{cache_key}] Stage 1 optimization: DONE", flush=True)
+    timings["stage1_s"] = time.perf_counter() - t0
+
+    phantom_zero_result = None
+    if phantom_zero.is_phantom_zero_design(cfg):
+        _set_stage("phantom_zero", cache_key)
+        t0 = time.perf_counter()
+        phantom_zero_result = phantom_zero.optimize_phantom_zero(cir)
+        timings["phantom_zero_s"] = time.perf_counter() - t0
+        phantom_zero.print_result(phantom_zero_result, label=cache_key)
+        if persist:
+            phz_cache_path = phantom_zero.phantom_zero_cache_path(cache_key)
+            phantom_zero.save_phantom_zero_result(phz_cache_path, cache_key, phantom_zero_result)
+            print(f"[{cache_key}] Saved phantom-zero cache to '{phz_cache_path}'.")
+
+    corner_result = None
+    temperatures = corner_temperatures(cir)
+    if len(temperatures):
+        _set_stage("corners", cache_key)
+        t0 = time.perf_counter()
+        corner_result = corner_performance(cir, temperatures, NOISE_FREQS, noise_spec)
+        timings["corners_s"] = time.perf_counter() - t0
+        print(f"[{cache_key}] Temperature corners:")
+        for corner in corner_result["corners"]:
+            print(
+                f"  T={corner['T']:.1f}K: noise/spec={corner['noise_worst_ratio']:.3f}, "
+                f"|L(0)|={corner['loopgain_lf']:.3e}, BW={corner['bandwidth_hz']:.3e}Hz"
+            )
 
-        ciss_info = _ciss_summary(cir, second_stage_result["stage2_flavor"])
-        ciss_stage2 = ciss_info["ciss_stage2"]
-        ciss_stage3_sum = ciss_info["ciss_stage3_sum"]
-        print(
-            f"[{cache_key}] Ciss Stage-2="
-            f"{ciss_stage2:.6e} F, "
-            f"Stage-3 sum={ciss_stage3_sum:.6e} F"
-        )
+    mc_summary = None
+    if mc_samples > 0:
+        _set_stage("monte_carlo", cache_key)
+        t0 = time.perf_counter()
+        mc_summary = monte_carlo.run_monte_carlo(cir, n_samples=mc_samples, seed=mc_seed)["summary"]
+        timings["monte_carlo_s"] = time.perf_counter() - t0
+        monte_carlo.print_summary(mc_summary, label=cache_key)
+
+    _set_stage("persist", cache_key)
+    ciss_info = _ciss_summary(cir, second_stage_result["stage2_flavor"])
+    ciss_stage2 = ciss_info["ciss_stage2"]
+    ciss_stage3_sum = ciss_info["ciss_stage3_sum"]
+    print(
+        f"[{cache_key}] Ciss Stage-2="
+        f"{ciss_stage2:.6e} F, "
+        f"Stage-3 sum={ciss_stage3_sum:.6e} F"
+    )
 
+    if persist:
         specs_module_path = GENERATED_SPECS_DIR / f"specs_{cache_key}.py"
         _write_stage_specs_module(
             specs_module_path,
@@ -483,26 +686,119 @@ def run():
             first_stage_result,
             second_stage_result,
             third_stage_result,
+            phantom_zero_result,
         )
         print(f"[{cache_key}] Wrote stage specs to '{specs_module_path}'.")
 
-        # key is used only for cache identity and HTML naming.
-        stage_tag = html_key
-        all_results.append(
+    timings["total_s"] = time.perf_counter() - t_design
+
+    if persist:
+        result_store.record_design_result(
             {
-                "design": cache_key,
+                "run_id": run_id,
+                "design_key": cache_key,
                 "project": cfg["project"],
-                "stage_tag": stage_tag,
-                "third_stage": third_stage_result,
+                "fingerprint": fingerprint,
+                "warm_start": seed and {"source": seed["source"], "run_id": seed["run_id"], "score": seed["score"]},
+                "first_stage_cached": skip_first_stage,
                 "first_stage": first_stage_result,
                 "second_stage": second_stage_result,
+                "third_stage": third_stage_result,
                 "ciss_stage2": ciss_stage2,
                 "ciss_stage3_sum": ciss_stage3_sum,
-                "cir": cir,
-                "circuit_image": circuit_image,
+                "phantom_zero": phantom_zero_result,
+                "temperature_corners": corner_result,
+                "monte_carlo": mc_summary,
+                "timings": timings,
+                "evaluations": {
+                    "stage1_points": first_stage_result.get("evaluations"),
+                    "stage2_iterations": second_stage_result.get("iterations"),
+                    "stage3_iterations": third_stage_result.get("bias_iterations"),
+                },
             }
         )
 
+    _set_stage(None)
+
+    # key is used only for cache identity and HTML naming.
+    stage_tag = html_key
+    return {
+        "design": cache_key,
+        "project": cfg["project"],
+        "stage_tag": stage_tag,
+        "third_stage": third_stage_result,
+        "first_stage": first_stage_result,
+        "second_stage": second_stage_result,
+        "ciss_stage2": ciss_stage2,
+        "ciss_stage3_sum": ciss_stage3_sum,
+        "phantom_zero": phantom_zero_result,
+        "temperature_corners": corner_result,
+        "monte_carlo": mc_summary,
+        "cir": cir,
+        "circuit_image": circuit_image,
+    }
+
+
+def run(designs=None, skip_first_stage=None):
+    # SLiCAP (and SymPy/matplotlib through it) is only imported by commands that need it.
+    from SLiCAP import initProject
+
+    manifest = report_builder.load_manifest(REPORT_MANIFEST)
+    _cleanup_html_outputs(manifest)
+    initProject("Active_E_Field_Probe")
+    from python_files import instrumentation
+    from python_files import specifications
+    from python_files import tracing
+    from python_files import monte_carlo
+    from python_files.html_specifications import generate_specifications_html
+    from python_files.html_design_choices import generate_design_choices_html
+    from python_files.html_circuit_performance import (
+        generate_circuit_performance_html,
+        generate_circuit_performance_menu_html,
+    )
+
+    if instrumentation.enabled():
+        instrumentation.install()
+    tracing.name_process("main")
+    if skip_first_stage is None:
+        skip_first_stage = os.getenv("SKIP_FIRST_STAGE_OPT", "0") == "1"
+    mc_samples = int(os.getenv("MC_SAMPLES", "0") or 0)
+    mc_seed = int(os.getenv("MC_SEED", str(monte_carlo.DEFAULT_SEED)))
+    design_runs = _select_design_specs(designs)
+    all_results = []
+    run_id = result_store.new_run_id()
+
+    spec_rows = _spec_rows(specifications.specs)
+
+    specs_page = _page_file("Specifications")
+    specs_fingerprint = report_builder.inputs_fingerprint(
+        {
+            "specs": spec_rows,
+            "noise_image": report_builder.file_digest(HTML_IMG_DIR / "noise_function_plot_HZ.svg"),
+            "source": _source_digest("html_specifications"),
+        }
+    )
+    if report_builder.page_is_current(manifest, specs_page, specs_fingerprint, HTML_DIR):
+        print(f"Report page '{specs_page}' is up to date.")
+    else:
+        with tracing.span("report: specifications", cat="report"):
+            generate_specifications_html()
+        report_builder.record_page(
+            manifest, specs_page, specs_fingerprint, HTML_DIR, outputs=["img/noise_function_plot_HZ.svg"]
+        )
+
+    design_page = _page_file("Design Process")
+    design_fingerprint = report_builder.inputs_fingerprint({"source": _source_digest("html_design_choices")})
+    if report_builder.page_is_current(manifest, design_page, design_fingerprint, HTML_DIR):
+        print(f"Report page '{design_page}' is up to date.")
+    else:
+        with tracing.span("report: design choices", cat="report"):
+            generate_design_choices_html()
+        report_builder.record_page(manifest, design_page, design_fingerprint, HTML_DIR)
+
+    for cfg in design_runs:
+        all_results.append(_run_design(cfg, run_id, spec_rows, skip_first_stage, mc_samples, mc_seed))
+
     print("\n======================= Run Summary =======================")
     for result in all_results:
         first = result["first_stage"]
@@ -522,21 +818,352 @@ def run():
             f"Cost={cost_str}, "
             f"Ciss2={result['ciss_stage2']:.6e}F, "
             f"Ciss3sum={result['ciss_stage3_sum']:.6e}F"
+            + (f", R_ph={result['phantom_zero']['R_ph']:.2f}Ohm" if result["phantom_zero"] else "")
         )
+    print(f"Results stored as run '{run_id}' in '{result_store.RESULTS_DB}'.")
 
+    _set_stage("report")
     for result in all_results:
-        generate_circuit_performance_html(
-            result["cir"],
-            design_tag=result["stage_tag"],
-            iq=result["third_stage"]["Iq"],
-            i_peak=result["third_stage"]["I_peak"],
-            stage1_flavor=result["first_stage"]["stage1_flavor"],
-            stage2_flavor=result["second_stage"]["stage2_flavor"],
-            circuit_image=result["circuit_image"],
+        page_file = _page_file(f"Circuit Performance ({result['stage_tag'].upper()})")
+        fingerprint = report_builder.inputs_fingerprint(_performance_page_inputs(result, spec_rows))
+        if report_builder.page_is_current(manifest, page_file, fingerprint, HTML_DIR):
+            print(f"[{result['design']}] Report page '{page_file}' is up to date.")
+            continue
+        with tracing.span(f"report: circuit performance {result['stage_tag']}", cat="report"):
+            images = generate_circuit_performance_html(
+                result["cir"],
+                design_tag=result["stage_tag"],
+                iq=result["third_stage"]["Iq"],
+                i_peak=result["third_stage"]["I_peak"],
+                stage1_flavor=result["first_stage"]["stage1_flavor"],
+                stage2_flavor=result["second_stage"]["stage2_flavor"],
+                circuit_image=result["circuit_image"],
+                corners=result["temperature_corners"],
+                monte_carlo=result["monte_carlo"],
+            )
+        report_builder.record_page(
+            manifest,
+            page_file,
+            fingerprint,
+            HTML_DIR,
+            outputs=[f"img/{name}" for name in images],
+            group="circuit_performance",
+            meta={"stage_tag": result["stage_tag"].upper()},
+        )
+
+    # The menu lists every design with a performance page, including designs
+    # that were not part of this run.
+    stage_tags = sorted(
+        manifest["pages"][page_file]["meta"]["stage_tag"]
+        for page_file in report_builder.pages_in_group(manifest, "circuit_performance")
+    )
+    menu_page = _page_file("Circuit Performance")
+    menu_fingerprint = report_builder.inputs_fingerprint({"stage_tags": stage_tags})
+    if not report_builder.page_is_current(manifest, menu_page, menu_fingerprint, HTML_DIR):
+        with tracing.span("report: circuit performance menu", cat="report"):
+            generate_circuit_performance_menu_html(stage_tags)
+        report_builder.record_page(manifest, menu_page, menu_fingerprint, HTML_DIR)
+
+    report_builder.sync_index_links(manifest, HTML_INDEX_PAGES, HTML_DIR)
+    report_builder.save_manifest(REPORT_MANIFEST, manifest)
+    _set_stage(None)
+    instrumentation.print_report()
+    tracing.write_trace(run_id)
+
+
+############################################## Command Line ##############################################
+
+# Read-only commands (list-designs, show-cache, results) only touch JSON/SQLite
+# files and must not import SLiCAP; optimize/report import it inside run().
+READ_ONLY_COMMANDS = ("list-designs", "show-cache", "results")
+COLD_START_TARGET_MS = 200.0
+
+
+def _cmd_list_designs(args):
+    designs = DESIGN_SPECS
+    for cfg in designs:
+        cache_path = _cache_path_for(cfg["key"])
+        cached = "cached" if cache_path.exists() else "-"
+        print(
+            f"{cfg['key']:<8} stage1={cfg['stage1_flavor']:<3} stage2={cfg['stage2_flavor']:<3} "
+            f"stage1-cache={cached:<7} {cfg['project']}"
+        )
+    return 0
+
+
+def _cmd_show_cache(args):
+    keys = [key.strip() for key in (args.designs or "").split(",") if key.strip()]
+    paths = [_cache_path_for(key) for key in keys] if keys else sorted(CACHE_DIR.glob("first_stage_*.json"))
+    for path in paths:
+        if not path.exists():
+            print(f"{path}: missing")
+            continue
+        payload = _load_first_stage_result(path)
+        result = payload["result"]
+        design_key = payload["meta"].get("design_key", "?")
+        values = ", ".join(
+            f"{result[par_key]}={result[value_key]:.6e}"
+            for par_key, value_key in (("w_param", "W1"), ("id_param", "ID1"), ("wc_param", "W1C"))
+            if par_key in result and value_key in result
         )
-    generate_circuit_performance_menu_html([result["stage_tag"] for result in all_results])
-    _dedupe_main_index_links()
+        cost = result.get("best_cost")
+        cost_str = f"{float(cost):.4f}" if cost is not None else "n/a"
+        print(f"{path.name}: design={design_key}, {values}, cost={cost_str}")
+    return 0
+
+
+def _cmd_results(args):
+    if args.compare:
+        old_run, new_run = args.compare
+        for design_key in sorted({rec["design_key"] for rec in result_store.load_results(run_id=new_run)}):
+            old = result_store.load_results(design_key=design_key, run_id=old_run, limit=1)
+            new = result_store.load_results(design_key=design_key, run_id=new_run, limit=1)
+            if not old or not new:
+                print(f"{design_key}: not present in both runs")
+                continue
+            print(f"{design_key}:")
+            for name, (old_val, new_val, rel) in result_store.compare_records(old[0], new[0]).items():
+                rel_str = f"{rel*100:+.2f}%" if rel is not None else "n/a"
+                print(f"  {name:<40} {old_val!s:>14} -> {new_val!s:>14} ({rel_str})")
+        return 0
+
+    if args.runs:
+        for run_id, created, keys in result_store.list_runs():
+            print(f"{run_id}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))}  {','.join(keys)}")
+        return 0
+
+    for record in result_store.load_results(design_key=args.design, limit=args.limit):
+        first = record.get("first_stage") or {}
+        timings = record.get("timings") or {}
+        cost = first.get("best_cost")
+        print(
+            f"{record['run_id']}  {record['design_key']:<8} fp={record['fingerprint'][:10]}  "
+            f"W1={first.get('W1', float('nan'))*1e6:.2f}um  ID1={first.get('ID1', float('nan'))*1e3:.3f}mA  "
+            f"cost={cost if cost is not None else 'n/a'}  total={timings.get('total_s', float('nan')):.1f}s"
+        )
+    return 0
+
+
+def _enable_diagnostics(args):
+    # Through the environment, so the stage-1 worker processes see them as well.
+    if args.instrument:
+        from python_files import instrumentation
+
+        instrumentation.enable()
+    if args.trace:
+        from python_files import tracing
+
+        tracing.enable()
+
+
+def _cmd_optimize(args):
+    _enable_diagnostics(args)
+    run(designs=args.designs, skip_first_stage=args.skip_first_stage or None)
+    return 0
+
+
+def _cmd_report(args):
+    # Stage 1 comes from the cache; stages 2/3 are cheap and rebuild the circuit state.
+    _enable_diagnostics(args)
+    run(designs=args.designs, skip_first_stage=True)
+    return 0
+
+
+def _cmd_explore(args):
+    from SLiCAP import initProject
+
+    from python_files import design_space, specifications
+
+    specs = _select_design_specs(args.designs or "", EXPLORE_SPECS)
+
+    manifest = report_builder.load_manifest(REPORT_MANIFEST)
+    _cleanup_html_outputs(manifest)
+    initProject("Active_E_Field_Probe")
+    run_id = result_store.new_run_id()
+    spec_rows = _spec_rows(specifications.specs)
+
+    def run_design(cfg, screen):
+        # Screening runs use a coarse stage-1 grid and leave caches and specs untouched.
+        if screen:
+            return _run_design(cfg, run_id, spec_rows, first_stage_grid=design_space.SCREEN_GRID, persist=False)
+        return _run_design(cfg, run_id, spec_rows)
+
+    design_space.explore(
+        specs,
+        run_design,
+        budget_s=args.budget_s,
+        cpu_budget_s=args.cpu_budget_s,
+        out_dir=Path(args.out),
+    )
+    report_builder.sync_index_links(manifest, HTML_INDEX_PAGES, HTML_DIR)
+    report_builder.save_manifest(REPORT_MANIFEST, manifest)
+    return 0
+
+
+def _joint_cache_path(design_key):
+    return CACHE_DIR / f"joint_{_safe_name(design_key)}.json"
+
+
+def _cmd_joint(args):
+    from SLiCAP import initProject
+
+    from python_files import joint_optimizer, specifications
+
+    initProject("Active_E_Field_Probe")
+    run_id = result_store.new_run_id()
+    spec_rows = _spec_rows(specifications.specs)
+    for cfg in _select_design_specs(args.designs):
+        # Sequential sizing first: it is the reference and provides the parameter names.
+        entry = _run_design(cfg, run_id, spec_rows, skip_first_stage=args.skip_first_stage, persist=False)
+        result = joint_optimizer.optimize_joint(
+            entry["cir"],
+            entry,
+            cascode_ciss_par=_stage1_ciss_par_for_stage2(cfg["stage2_flavor"], cfg["key"]),
+            n_samples=args.samples,
+            rounds=args.rounds,
+            seed=args.seed,
+        )
+        joint_optimizer.print_comparison(result, label=cfg["key"])
+        path = _joint_cache_path(cfg["key"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as fobj:
+            json.dump({"meta": {"design_key": cfg["key"], "run_id": run_id}, "result": result}, fobj, indent=2)
+        print(f"[{cfg['key']}] Saved joint optimization result to '{path}'.")
+    return 0
+
+
+def _cmd_stage1_worker(args):
+    from SLiCAP import initProject
+
+    from python_files import distributed_stage1
+
+    authkey = args.authkey or os.getenv(distributed_stage1.AUTHKEY_ENV)
+    if not authkey:
+        raise RuntimeError(f"Set {distributed_stage1.AUTHKEY_ENV} (or --authkey) to the coordinator's key.")
+    initProject("Active_E_Field_Probe")
+    distributed_stage1.run_worker(
+        distributed_stage1.parse_address(args.connect, default_host="127.0.0.1"), authkey, once=args.once
+    )
+    return 0
+
+
+def _cmd_bench(args):
+    if args.compare:
+        from python_files.benchmarks import print_comparison
+
+        print_comparison()
+        return 0
+    status = 0
+    if args.suite in ("cold-start", "all"):
+        status = _bench_cold_start(args)
+    if args.suite in ("optimizers", "all"):
+        from python_files.benchmarks import FIRST_STAGE_WORKERS, benchmark_names, run_suite
+
+        workers = [int(n) for n in args.workers.split(",")] if args.workers else FIRST_STAGE_WORKERS
+        names = [name.strip() for name in args.only.split(";")] if args.only else benchmark_names(workers)
+        record = run_suite(names, timeout=args.timeout)
+        status = status or int(any("error" in result for result in record["benchmarks"]))
+    return status
+
+
+def _bench_cold_start(args):
+    # Cold start of the read-only commands, each in a fresh interpreter.
+    script = str(Path(__file__).resolve())
+    worst_ms = 0.0
+    for command in READ_ONLY_COMMANDS:
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            subprocess.run(
+                [sys.executable, script, command],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+            samples.append((time.perf_counter() - t0) * 1e3)
+        samples.sort()
+        median_ms = samples[len(samples) // 2]
+        worst_ms = max(worst_ms, median_ms)
+        print(f"{command:<14} median={median_ms:7.1f} ms  min={samples[0]:7.1f} ms  (n={len(samples)})")
+    slow = worst_ms > COLD_START_TARGET_MS
+    print(f"Cold-start target {COLD_START_TARGET_MS:.0f} ms: {'SLOW' if slow else 'OK'}")
+    return int(slow)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Active E-field probe design flow.")
+    sub = parser.add_subparsers(dest="command")
+
+    p_list = sub.add_parser("list-designs", help="List configured design variants.")
+    p_list.set_defaults(func=_cmd_list_designs)
+
+    p_cache = sub.add_parser("show-cache", help="Show cached first-stage results.")
+    p_cache.add_argument("--designs", help="Comma-separated design keys (default: all cache files).")
+    p_cache.set_defaults(func=_cmd_show_cache)
+
+    p_results = sub.add_parser("results", help="Query the run result store.")
+    p_results.add_argument("--design", help="Only records of this design key.")
+    p_results.add_argument("--limit", type=int, default=20)
+    p_results.add_argument("--runs", action="store_true", help="List stored runs.")
+    p_results.add_argument("--compare", nargs=2, metavar=("OLD_RUN", "NEW_RUN"))
+    p_results.set_defaults(func=_cmd_results)
+
+    p_opt = sub.add_parser("optimize", help="Run the optimizers and generate the report.")
+    p_opt.add_argument("--designs", help="Comma-separated design keys (default: RUN_DESIGNS or all).")
+    p_opt.add_argument("--skip-first-stage", action="store_true", help="Load stage 1 from the cache.")
+    p_opt.add_argument("--instrument", action="store_true", help="Print a per-stage breakdown of SLiCAP calls.")
+    p_opt.add_argument("--trace", action="store_true", help="Write a Chrome trace of the run to traces/.")
+    p_opt.set_defaults(func=_cmd_optimize)
+
+    p_report = sub.add_parser("report", help="Regenerate the report from cached first-stage results.")
+    p_report.add_argument("--designs", help="Comma-separated design keys (default: RUN_DESIGNS or all).")
+    p_report.add_argument("--instrument", action="store_true", help="Print a per-stage breakdown of SLiCAP calls.")
+    p_report.add_argument("--trace", action="store_true", help="Write a Chrome trace of the run to traces/.")
+    p_report.set_defaults(func=_cmd_report)
+
+    p_explore = sub.add_parser("explore", help="Optimize and rank all topology/flavour combinations.")
+    p_explore.add_argument("--designs", help="Comma-separated design keys (default: all combinations).")
+    p_explore.add_argument("--budget-s", type=float, help="Shared wall-clock budget [s] (default: EXPLORE_BUDGET_S).")
+    p_explore.add_argument("--cpu-budget-s", type=float, help="Shared CPU budget [s] (default: EXPLORE_CPU_BUDGET_S).")
+    p_explore.add_argument("--out", default="design_space", help="Output directory for the table and plots.")
+    p_explore.set_defaults(func=_cmd_explore)
+
+    p_joint = sub.add_parser("joint", help="Size all three stages jointly and compare with the sequential flow.")
+    p_joint.add_argument("--designs", help="Comma-separated design keys (default: RUN_DESIGNS or all).")
+    p_joint.add_argument("--skip-first-stage", action="store_true", help="Load the sequential stage 1 from the cache.")
+    p_joint.add_argument("--samples", type=int, help="Candidates per round (default: JOINT_SAMPLES).")
+    p_joint.add_argument("--rounds", type=int, help="Search rounds (default: JOINT_ROUNDS).")
+    p_joint.add_argument("--seed", type=int, default=2024)
+    p_joint.set_defaults(func=_cmd_joint)
+
+    p_worker = sub.add_parser("stage1-worker", help="Evaluate stage-1 tasks for a distributed coordinator.")
+    p_worker.add_argument("--connect", required=True, help="Coordinator address host:port (STAGE1_COORDINATOR).")
+    p_worker.add_argument("--authkey", help="Shared key (default: STAGE1_AUTHKEY).")
+    p_worker.add_argument("--once", action="store_true", help="Exit after one coordinator session.")
+    p_worker.set_defaults(func=_cmd_stage1_worker)
+
+    p_bench = sub.add_parser("bench", help="Measure cold start and optimizer performance.")
+    p_bench.add_argument(
+        "--suite", choices=("cold-start", "optimizers", "all"), default="cold-start",
+        help="cold-start: read-only commands; optimizers: reference-circuit benchmarks (appended to results/benchmarks.jsonl).",
+    )
+    p_bench.add_argument("--repeat", type=int, default=5, help="Cold-start samples per command.")
+    p_bench.add_argument("--only", help="Semicolon-separated optimizer benchmark names (default: all).")
+    p_bench.add_argument("--workers", help="Comma-separated worker counts for the first-stage benchmark (default: 1,2,4).")
+    p_bench.add_argument("--timeout", type=float, help="Timeout per optimizer benchmark [s].")
+    p_bench.add_argument("--compare", action="store_true", help="Compare the last two optimizer benchmark runs.")
+    p_bench.set_defaults(func=_cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command is None:
+        # Plain `python main.py` keeps running the full flow.
+        run()
+        return 0
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    run()
+    sys.exit(main())
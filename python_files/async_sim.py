@@ -0,0 +1,82 @@
+################################################# Asyncio Simulator Jobs #################################################
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Job layer for external simulator processes (ngspice, ...): every job is a
+# subprocess started with asyncio.create_subprocess_exec, a semaphore bounds
+# how many run at once, a timeout kills hung processes, and results are handled
+# as they finish (asyncio.as_completed). Nothing here knows about ngspice; see
+# ngspice_batch.run_job_async for the deck/rawfile side.
+
+
+async def run_process(cmd, cwd=None, timeout=None):
+    """
+    Run cmd; returns {"cmd", "returncode", "stdout", "stderr", "timed_out", "elapsed_s"}.
+    A process that exceeds timeout [s] is killed (returncode is then negative on POSIX).
+    """
+    t0 = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *[str(part) for part in cmd],
+        cwd=None if cwd is None else str(cwd),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    timed_out = False
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        proc.kill()
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return {
+        "cmd": [str(part) for part in cmd],
+        "returncode": proc.returncode,
+        "stdout": stdout.decode(errors="replace"),
+        "stderr": stderr.decode(errors="replace"),
+        "timed_out": timed_out,
+        "elapsed_s": time.perf_counter() - t0,
+    }
+
+
+async def run_bounded(factories, limit, on_done=None):
+    """
+    Await factory() for every factory with at most `limit` running at once.
+    on_done(index, result) is called in completion order; the results are
+    returned in input order. The first exception cancels the remaining jobs.
+    """
+    semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+    async def bounded(index, factory):
+        async with semaphore:
+            return index, await factory()
+
+    tasks = [asyncio.ensure_future(bounded(index, factory)) for index, factory in enumerate(factories)]
+    results = [None] * len(tasks)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            results[index] = result
+            if on_done is not None:
+                on_done(index, result)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
+
+
+def run_sync(coro):
+    """asyncio.run(coro), also when called from a thread that already runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
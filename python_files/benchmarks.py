@@ -0,0 +1,336 @@
+################################################# Optimizer Benchmarks #################################################
+
+import json
+import os
+import platform
+import re
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+# Benchmark harness for the optimizers on fixed reference circuits: the NP
+# design plus small synthetic netlists. Every benchmark runs in a fresh
+# interpreter (`python -m python_files.benchmarks <name>`), so its peak RSS is
+# its own; pool workers are reported separately. Each suite run is appended to
+# results/benchmarks.jsonl together with the git commit, so runs can be
+# compared (`main.py bench --compare`).
+
+PROJECT_NAME = "Active_E_Field_Probe"
+NP_PROJECT = "KiCad/Active_E_Field_Probe/stage_NP/Active_E_Field_Probe.kicad_sch"
+HISTORY_PATH = Path("results") / "benchmarks.jsonl"
+FIRST_STAGE_GRID = {"w_points": 6, "id_points": 10, "max_levels": 0}  # fixed grid: no multires refinement
+FIRST_STAGE_WORKERS = (1, 2, 4)
+BIAS_TARGET_ID = 1e-4
+
+_LOAD = "R2 Amp_out vo R value=50 noisetemp={T_op_max} noiseflow=0 dcvar=0 dcvarlot=0\nR3 vo 0 R value=50 noisetemp={0} noiseflow=0 dcvar=0 dcvarlot=0\n"
+_OUTPUT_STAGE = (
+    "X2 Amp_out 6 0 0 CMOS18P W={W_P} L={L_P} ID={ID_P}\n"
+    "X3 Amp_out 6 0 0 CMOS18N W={W_N} L={L_N} ID={ID_N}\n"
+)
+
+# Synthetic circuits: only the devices an optimizer needs, with the node and
+# parameter names of the full design.
+SYNTHETIC_CIRCUITS = {
+    "bench_output_stage": "V1 6 0 V value={V_in} noise=0 dc=0 dcvar=0\n" + _OUTPUT_STAGE + _LOAD,
+    "bench_stage2_conventional": (
+        "V1 7 0 V value={V_in} noise=0 dc=0 dcvar=0\n"
+        "X4 6 7 0 0 CMOS18P W={W2_P} L={L2_P} ID={ID2_P}\n" + _OUTPUT_STAGE + _LOAD
+    ),
+    "bench_stage2_cross": (
+        "V1 7 0 V value={V_in} noise=0 dc=0 dcvar=0\n"
+        "X4 6 7 0 0 CMOS18P W={W2_P} L={L2_P} ID={ID2_P}\n"
+        "X6 6 7 0 0 CMOS18N W={W2_N} L={L2_N} ID={ID2_N}\n" + _OUTPUT_STAGE + _LOAD
+    ),
+}
+
+# Stand-in for the ngspice executable: square-law drain currents for the DC
+# sweeps and operating points of the bias runner, written as a binary rawfile.
+MOCK_NGSPICE = r'''
+import re
+import sys
+
+import numpy as np
+
+deck = open(sys.argv[sys.argv.index("-b") + 1]).read()
+params = dict(re.findall(r"^\.param (\w+)=(\S+)", deck, re.M))
+out_name, labels = re.search(r"^write (\S+) (.*)$", deck, re.M).groups()
+labels = labels.split()
+sweep = re.search(r"^dc (\S+) (\S+) (\S+) (\S+)", deck, re.M)
+if sweep:
+    source = sweep.group(1).upper()
+    start, stop, step = map(float, sweep.groups()[1:])
+    x = np.arange(start, stop + step / 2, step)
+    gates = {"V11": x if source == "V11" else float(params.get("VGS1_N", 0.6)),
+             "V5": x if source == "V5" else float(params.get("VGS1C_N", 0.6))}
+else:
+    x = np.zeros(1)
+    gates = {"V11": float(params.get("VGS1_N", 0.6)), "V5": float(params.get("VGS1C_N", 0.6))}
+currents = {"I_X1": 2e-4 * np.maximum(gates["V11"] - 0.4, 0.0) ** 2 + 0 * x,
+            "I_X8": 3e-4 * np.maximum(gates["V5"] - 0.4, 0.0) ** 2 + 0 * x}
+header = ["Title: mock", "Date: -", "Plotname: DC transfer characteristic", "Flags: real",
+          f"No. Variables: {len(labels) + 1}", f"No. Points: {x.size}", "Variables:", "\t0\tv-sweep\tvoltage"]
+header += [f"\t{index + 1}\t{label.lower()}\tcurrent" for index, label in enumerate(labels)]
+data = np.column_stack([x] + [currents.get(label, np.zeros_like(x)) for label in labels]).astype("<f8")
+with open(out_name, "wb") as fobj:
+    fobj.write(("\n".join(header) + "\nBinary:\n").encode("ascii"))
+    fobj.write(data.tobytes())
+'''
+
+
+def _peak_rss_mb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+############################################## Reference Circuits ##############################################
+
+def _project_circuit():
+    from python_files.circuit import make_project_circuit
+
+    return make_project_circuit(NP_PROJECT)
+
+
+def _synthetic_circuit(name):
+    from SLiCAP import makeCircuit, specs2circuit
+
+    from python_files.specifications import specs
+
+    cir_path = Path("cir") / f"{name}.cir"
+    cir_path.write_text(f"{name}\n{SYNTHETIC_CIRCUITS[name]}.end\n", encoding="utf-8")
+    try:
+        cir = makeCircuit(cir_path.name)
+    finally:
+        cir_path.unlink()
+    specs2circuit(specs, cir)
+    return cir
+
+
+def _circuit(reference):
+    return _project_circuit() if reference == "NP" else _synthetic_circuit(reference)
+
+
+############################################## Benchmarks ##############################################
+
+def _bench_third_stage(reference):
+    from python_files.three_optimize_third_stage import optimize_third_stage
+
+    cir = _circuit(reference)
+    t0 = time.perf_counter()
+    result = optimize_third_stage(cir, use_cache=False)
+    return time.perf_counter() - t0, result["gm_match_iterations"] + result["bias_iterations"]
+
+
+def _bench_second_stage(reference, flavor):
+    from python_files.three_optimize_second_stage import optimize_second_stage
+
+    cir = _circuit(reference)
+    t0 = time.perf_counter()
+    result = optimize_second_stage(cir, stage2_flavor=flavor)
+    return time.perf_counter() - t0, result["iterations"] + result.get("ratio_iterations", 0)
+
+
+def _bench_first_stage(workers):
+    from python_files.three_optimize_first_stage import optimize_first_stage_parallel
+    from python_files.three_optimize_second_stage import optimize_second_stage
+    from python_files.three_optimize_third_stage import optimize_third_stage
+
+    cir = _project_circuit()
+    optimize_third_stage(cir, use_cache=False)
+    optimize_second_stage(cir, stage2_flavor="P")
+    t0 = time.perf_counter()
+    result = optimize_first_stage_parallel(cir, stage1_flavor="N", max_workers=workers, **FIRST_STAGE_GRID)
+    elapsed = time.perf_counter() - t0
+    if result is None:
+        raise RuntimeError("First-stage benchmark found no valid solution.")
+    return elapsed, result["evaluations"]
+
+
+def _bench_performance_plots():
+    from python_files.plot_generation import generate_performance_plots
+
+    cir = _project_circuit()
+    t0 = time.perf_counter()
+    generate_performance_plots(cir, suffix="BENCH")
+    return time.perf_counter() - t0, 1
+
+
+def _bench_bias_runner():
+    from KiCad.Active_E_Field_Probe.stage_NP_PhZ_bias.stage_1_2_bias import run_stage_1_2_bias as bias
+
+    with tempfile.TemporaryDirectory(prefix="mock_ngspice_") as tmp_dir:
+        mock = Path(tmp_dir) / "ngspice"
+        mock.write_text(f"#!{sys.executable}\n{MOCK_NGSPICE}", encoding="utf-8")
+        mock.chmod(mock.stat().st_mode | stat.S_IXUSR)
+        os.environ["NGSPICE_CMD"] = str(mock)
+        bias.NGSPICE_BACKEND = "subprocess"
+        t0 = time.perf_counter()
+        roots, _, runs = bias.solve_bias(BIAS_TARGET_ID)
+        elapsed = time.perf_counter() - t0
+    if any(root is None for root in roots.values()):
+        raise RuntimeError(f"Bias benchmark did not converge: {roots}")
+    return elapsed, runs
+
+
+BENCHMARKS = {
+    "third_stage[NP]": lambda: _bench_third_stage("NP"),
+    "third_stage[output_stage]": lambda: _bench_third_stage("bench_output_stage"),
+    "second_stage_conventional[NP]": lambda: _bench_second_stage("NP", "P"),
+    "second_stage_conventional[synthetic]": lambda: _bench_second_stage("bench_stage2_conventional", "P"),
+    "second_stage_cross[synthetic]": lambda: _bench_second_stage("bench_stage2_cross", "NP"),
+    "performance_plots[NP]": _bench_performance_plots,
+    "bias_runner[mock_ngspice]": _bench_bias_runner,
+}
+_FIRST_STAGE_NAME = re.compile(r"^first_stage\[NP,workers=(\d+)\]$")
+
+
+def benchmark_names(workers=FIRST_STAGE_WORKERS):
+    """All benchmark names, with one first-stage benchmark per worker count."""
+    names = list(BENCHMARKS)
+    at = names.index("performance_plots[NP]")
+    names[at:at] = [f"first_stage[NP,workers={n}]" for n in workers]
+    return names
+
+
+def _benchmark(name):
+    match = _FIRST_STAGE_NAME.match(name)
+    if match:
+        return lambda: _bench_first_stage(int(match.group(1)))
+    if name not in BENCHMARKS:
+        raise RuntimeError(f"Unknown benchmark '{name}'. Available: {', '.join(benchmark_names())}")
+    return BENCHMARKS[name]
+
+
+def run_benchmark(name):
+    """Run one benchmark in this process (after initProject) and return its measurements."""
+    from SLiCAP import initProject
+
+    initProject(PROJECT_NAME)
+    t0 = time.perf_counter()
+    elapsed, evaluations = _benchmark(name)()
+    return {
+        "name": name,
+        "wall_s": elapsed,
+        "total_s": time.perf_counter() - t0,
+        "evaluations": evaluations,
+        "evals_per_s": evaluations / elapsed if elapsed > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "workers_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    }
+
+
+############################################## Suite / History ##############################################
+
+def _run_isolated(name, timeout=None):
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", "python_files.benchmarks", name],
+            cwd=str(Path(__file__).resolve().parents[1]),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            check=False,
+        )
+    except subprocess.TimeoutExpired:
+        return {"name": name, "error": f"timed out after {timeout:.0f} s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    tail = " | ".join((proc.stderr or proc.stdout).strip().splitlines()[-3:])
+    return {"name": name, "error": f"exit code {proc.returncode}: {tail}"}
+
+
+def print_result(result):
+    if "error" in result:
+        print(f"{result['name']:<40} FAILED  {result['error']}")
+        return
+    rate = result["evals_per_s"]
+    workers = result["workers_peak_rss_mb"]
+    print(
+        f"{result['name']:<40} wall={result['wall_s']:8.2f} s  evals={result['evaluations']:6d}  "
+        f"evals/s={rate if rate is None else f'{rate:9.2f}'}  "
+        f"peak RSS={result['peak_rss_mb'] or float('nan'):7.1f} MB"
+        + (f" (workers {workers:.1f} MB)" if workers else "")
+    )
+
+
+def run_suite(names=None, timeout=None, history_path=HISTORY_PATH):
+    """Run benchmarks (default: all) in separate interpreters and append them to the history."""
+    names = list(names or benchmark_names())
+    for name in names:
+        _benchmark(name)
+    results = []
+    for name in names:
+        result = _run_isolated(name, timeout=timeout)
+        print_result(result)
+        results.append(result)
+
+    record = {
+        "created": time.time(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "benchmarks": results,
+    }
+    history_path = Path(history_path)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with history_path.open("a", encoding="utf-8") as fobj:
+        fobj.write(json.dumps(record, sort_keys=True) + "\n")
+    print(f"Appended benchmark results to '{history_path}'.")
+    return record
+
+
+def load_history(history_path=HISTORY_PATH):
+    history_path = Path(history_path)
+    if not history_path.exists():
+        return []
+    with history_path.open("r", encoding="utf-8") as fobj:
+        return [json.loads(line) for line in fobj if line.strip()]
+
+
+def compare_runs(old, new):
+    """{name: (old wall_s, new wall_s, relative change)} for benchmarks present in both runs."""
+    old_by_name = {result["name"]: result for result in old["benchmarks"] if "error" not in result}
+    rows = {}
+    for result in new["benchmarks"]:
+        before = old_by_name.get(result["name"])
+        if before is None or "error" in result:
+            continue
+        rel = (result["wall_s"] - before["wall_s"]) / before["wall_s"] if before["wall_s"] else None
+        rows[result["name"]] = (before["wall_s"], result["wall_s"], rel)
+    return rows
+
+
+def print_comparison(history_path=HISTORY_PATH, old_index=-2, new_index=-1):
+    history = load_history(history_path)
+    if len(history) < 2:
+        print(f"Need at least two benchmark runs in '{history_path}' to compare.")
+        return
+    old, new = history[old_index], history[new_index]
+    print(f"Benchmarks {old.get('commit') or '?'} -> {new.get('commit') or '?'}:")
+    for name, (before, after, rel) in compare_runs(old, new).items():
+        rel_str = f"{rel*100:+.1f}%" if rel is not None else "n/a"
+        print(f"  {name:<40} {before:8.2f} s -> {after:8.2f} s ({rel_str})")
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_benchmark(sys.argv[1])))
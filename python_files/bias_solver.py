@@ -0,0 +1,120 @@
+################################################# Bias-Point Root Finder #################################################
+
+import math
+
+# Brent's method written as a generator so several independent roots can be
+# refined in lockstep: every simulator evaluation (one .op run) sets all bias
+# sources at once and advances every unfinished root by one step.
+
+_EPS = 2.0 ** -52
+
+
+def brent_steps(a, b, fa, fb, xtol=1e-4, maxiter=60):
+    """
+    Generator form of Brent's method on a bracket [a, b] with f(a)*f(b) <= 0.
+    Yields the next x to evaluate, expects f(x) via send() and returns the root
+    through StopIteration.value.
+    """
+    if fa * fb > 0:
+        raise ValueError(f"Root not bracketed: f({a})={fa}, f({b})={fb}.")
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+
+    c, fc = b, fb
+    d = e = b - a
+    for _ in range(maxiter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2.0 * _EPS * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol or fb == 0:
+            return b
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p = 2.0 * m * s
+                q = 1.0 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2.0 * p < min(3.0 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b = b + d if abs(d) > tol else b + math.copysign(tol, m)
+        fb = yield b
+    return b
+
+
+def solve_lockstep(evaluate, brackets, xtol=1e-4, maxiter=60):
+    """
+    Find one root per unknown with shared evaluations.
+
+    evaluate(point) takes {name: value} for every unknown and returns
+    {name: residual}; brackets is {name: (lo, hi)}. Returns
+    ({name: root or None}, {name: residual}, evaluations). Unknowns whose
+    bracket holds no sign change get None and the residual of their evaluated
+    point closest to zero; the others the residual at the root.
+    """
+    names = list(brackets)
+    seen = {name: {} for name in names}  # name -> {x: residual} of every evaluation
+
+    def evaluate_seen(point):
+        residuals = evaluate(point)
+        for name in names:
+            seen[name][point[name]] = residuals[name]
+        return residuals
+
+    lows = {name: float(brackets[name][0]) for name in names}
+    highs = {name: float(brackets[name][1]) for name in names}
+    f_lo = evaluate_seen(lows)
+    f_hi = evaluate_seen(highs)
+    evaluations = 2
+
+    roots = {}
+    steps = {}
+    point = {}
+    for name in names:
+        if f_lo[name] * f_hi[name] > 0:
+            roots[name] = None
+            point[name] = highs[name]
+            continue
+        gen = brent_steps(lows[name], highs[name], f_lo[name], f_hi[name], xtol=xtol, maxiter=maxiter)
+        try:
+            point[name] = next(gen)
+            steps[name] = gen
+        except StopIteration as stop:
+            roots[name] = stop.value
+            point[name] = stop.value
+
+    while steps:
+        residuals = evaluate_seen(dict(point))
+        evaluations += 1
+        for name in list(steps):
+            try:
+                point[name] = steps[name].send(residuals[name])
+            except StopIteration as stop:
+                roots[name] = stop.value
+                point[name] = stop.value
+                del steps[name]
+
+    # Brent returns an evaluated point, so the root's residual is known.
+    residuals = {
+        name: seen[name][roots[name]] if roots[name] in seen[name] else min(seen[name].values(), key=abs)
+        for name in names
+    }
+    return roots, residuals, evaluations
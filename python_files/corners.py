@@ -0,0 +1,103 @@
+################################################# Temperature Corners #################################################
+
+import os
+
+import numpy as np
+import sympy as sp
+from SLiCAP import doLaplace, doNoise
+
+from .symbolic import evaluate_over, keep_symbolic, par_values_over
+
+# Temperature corners between T_op_min and T_op_max (from the specifications).
+# The analyses run once with the SLiCAP temperature parameter T kept symbolic;
+# the resulting expressions are evaluated for all corners at once with NumPy.
+# TEMP_CORNERS=N (N >= 2) enables N corners; unset/0/1 keeps the nominal T.
+
+TEMPERATURE_PAR = "T"
+TEMP_CORNERS = int(os.getenv("TEMP_CORNERS", "0") or 0)
+BANDWIDTH_FREQS = np.logspace(3, 10, 400)
+
+f = sp.Symbol("f")
+s = sp.Symbol("s")
+
+
+def corner_temperatures(cir, n=None):
+    """Corner temperatures [K] of the circuit, or an empty array in nominal mode."""
+    n = TEMP_CORNERS if n is None else int(n)
+    if n < 2:
+        return np.array([])
+    t_min = float(cir.getParValue("T_op_min"))
+    t_max = float(cir.getParValue("T_op_max"))
+    return np.linspace(t_min, t_max, n)
+
+
+def corner_parameters(cir, names, temperatures):
+    """{name: array over temperatures} for circuit parameters such as g_m_X1."""
+    return par_values_over(cir, names, TEMPERATURE_PAR, temperatures)
+
+
+def noise_function_over_corners(cir, temperatures):
+    """freqs -> input-referred noise density [len(temperatures), len(freqs)], from one doNoise call."""
+    with keep_symbolic(cir, [TEMPERATURE_PAR]) as (temp,):
+        inoise = doNoise(cir, source="V1", detector="V_vo", numeric=True, pardefs="circuit").inoise
+    temperatures = np.asarray(temperatures, dtype=float)
+
+    def density(freqs):
+        grid_t, grid_f = np.meshgrid(temperatures, np.asarray(freqs, dtype=float), indexing="ij")
+        return np.real(evaluate_over(inoise, [f, temp], grid_f, grid_t))
+
+    return density
+
+
+def noise_over_corners(cir, freqs, temperatures):
+    """Input-referred noise density [len(temperatures), len(freqs)]."""
+    return noise_function_over_corners(cir, temperatures)(freqs)
+
+
+def _transfer_over_corners(cir, transfer, freqs, temperatures):
+    with keep_symbolic(cir, [TEMPERATURE_PAR]) as (temp,):
+        laplace = doLaplace(
+            cir, numeric=True, source="V1", detector="V_Amp_out", pardefs="circuit", lgref="Gm_M1_X1", transfer=transfer
+        ).laplace
+    grid_t, grid_f = np.meshgrid(np.asarray(temperatures, dtype=float), np.asarray(freqs, dtype=float), indexing="ij")
+    return evaluate_over(laplace, [s, temp], 2j * np.pi * grid_f, grid_t)
+
+
+def _bandwidth(freqs, magnitude):
+    """-3 dB frequency of each row of magnitude (relative to the lowest frequency), NaN if not reached."""
+    below = magnitude < magnitude[:, :1] / np.sqrt(2.0)
+    first = np.argmax(below, axis=1)
+    return np.where(below.any(axis=1), freqs[first], np.nan)
+
+
+def corner_performance(cir, temperatures, noise_freqs, noise_spec):
+    """
+    Noise, loop gain and bandwidth at every corner temperature.
+    noise_spec(freqs) gives the allowed input noise density. Returns a list of
+    dicts (one per corner) plus the worst case over all corners.
+    """
+    temperatures = np.asarray(temperatures, dtype=float)
+    noise_freqs = np.asarray(noise_freqs, dtype=float)
+    noise = noise_over_corners(cir, noise_freqs, temperatures)
+    noise_ratio = np.max(noise / noise_spec(noise_freqs)[None, :], axis=1)
+
+    loopgain = np.abs(_transfer_over_corners(cir, "loopgain", BANDWIDTH_FREQS, temperatures))
+    gain = np.abs(_transfer_over_corners(cir, "gain", BANDWIDTH_FREQS, temperatures))
+    bandwidth = _bandwidth(BANDWIDTH_FREQS, gain)
+
+    corners = [
+        {
+            "T": float(temp),
+            "noise_worst_ratio": float(noise_ratio[row]),
+            "loopgain_lf": float(loopgain[row, 0]),
+            "gain_lf": float(gain[row, 0]),
+            "bandwidth_hz": float(bandwidth[row]),
+        }
+        for row, temp in enumerate(temperatures)
+    ]
+    worst = {
+        "noise_worst_ratio": float(np.max(noise_ratio)),
+        "loopgain_lf": float(np.min(loopgain[:, 0])),
+        "bandwidth_hz": float(np.nanmin(bandwidth)) if np.isfinite(bandwidth).any() else None,
+    }
+    return {"corners": corners, "worst": worst}
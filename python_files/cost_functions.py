@@ -0,0 +1,143 @@
+################################################# Stage Cost Functions #################################################
+
+# Objectives and constraints of the stage-1 optimizer as functions over arrays
+# of candidate metrics, evaluated in one NumPy pass over all candidates of a
+# sweep. The metrics dict maps names to equal-length arrays:
+#   W, ID           width and drain-current magnitude of the input device
+#   W1C             tuned cascode width
+#   gm, IC          g_m and inversion coefficient of the input device (worst corner)
+#   gain, pole      stage gain gm1*ro1*gm7*ro7 and cascode pole [Hz]
+#   noise_margin    1 - worst noise/(margin * spec) ratio
+#   W_ref, ID_ref   stage-3 W_N + W_P and ID_N (size and current references)
+# An objective returns one cost per candidate (lower is better), a constraint a
+# boolean array (True = allowed). Both are registered by name and selected per
+# design in main.DESIGN_SPECS, e.g.
+#   {"key": "NP", ..., "objective": "min_power", "constraints": ["min_stage_gain"]}
+# Candidates reaching the cost functions already meet the noise, IC and cascode
+# pole checks of the optimizer. A plugin module only has to import this one and
+# decorate its functions with @objective("name") / @constraint("name").
+# numpy is imported inside the functions that need it: main.py and
+# result_store.py read DEFAULT_OBJECTIVE, and the read-only CLI commands must
+# not pay for the numpy import.
+
+DEFAULT_OBJECTIVE = "stage1_cost"
+
+OBJECTIVES = {}
+CONSTRAINTS = {}
+
+METRICS = ("W", "ID", "W1C", "gm", "IC", "gain", "pole", "noise_margin", "W_ref", "ID_ref")
+
+
+def objective(name):
+    """Register fn(metrics) -> cost array under name."""
+    def register(fn):
+        OBJECTIVES[name] = fn
+        return fn
+    return register
+
+
+def constraint(name):
+    """Register fn(metrics) -> boolean array under name."""
+    def register(fn):
+        CONSTRAINTS[name] = fn
+        return fn
+    return register
+
+
+def _lookup(registry, name, kind):
+    try:
+        return registry[name]
+    except KeyError:
+        raise RuntimeError(f"Unknown {kind} '{name}'. Registered: {', '.join(sorted(registry))}.") from None
+
+
+def validate(objective_name=None, constraint_names=()):
+    """Raise RuntimeError for names that are not registered (before any optimization starts)."""
+    _lookup(OBJECTIVES, objective_name or DEFAULT_OBJECTIVE, "objective")
+    for name in constraint_names or ():
+        _lookup(CONSTRAINTS, name, "constraint")
+
+
+def metric_arrays(candidates, keys, **refs):
+    """
+    Metrics dict of candidate dicts; keys maps metric names to candidate keys,
+    refs adds scalar metrics such as W_ref (broadcast to every candidate).
+    """
+    import numpy as np
+
+    metrics = {name: np.array([candidate[key] for candidate in candidates], dtype=float) for name, key in keys.items()}
+    metrics.update({name: np.full(len(candidates), float(value)) for name, value in refs.items()})
+    missing = set(METRICS) - set(metrics)
+    if missing:
+        raise RuntimeError(f"Candidate metrics missing: {', '.join(sorted(missing))}.")
+    return metrics
+
+
+def evaluate(metrics, objective_name=None, constraint_names=()):
+    """Cost per candidate; candidates violating a constraint cost inf."""
+    import numpy as np
+
+    cost = np.asarray(_lookup(OBJECTIVES, objective_name or DEFAULT_OBJECTIVE, "objective")(metrics), dtype=float)
+    allowed = np.ones(cost.shape, dtype=bool)
+    for name in constraint_names or ():
+        allowed &= np.asarray(_lookup(CONSTRAINTS, name, "constraint")(metrics), dtype=bool)
+    return np.where(allowed & ~np.isnan(cost), cost, np.inf)
+
+
+# --- Built-in objectives ---
+
+@objective("stage1_cost")
+def stage1_cost(m):
+    """Size and current relative to stage 3, divided by the relative stage gain (the original stage-1 cost)."""
+    from . import three_optimize_first_stage as first_stage
+
+    return (
+        (m["W"] / m["W_ref"]) ** first_stage.w_cost_bias
+        * (m["ID"] / m["ID_ref"]) ** first_stage.i_cost_bias
+        / (m["gain"] / first_stage.target_stage_gain) ** first_stage.gain_cost_bias
+    )
+
+
+@objective("max_gm")
+def max_gm(m):
+    return -m["gm"]
+
+
+@objective("min_power")
+def min_power(m):
+    return m["ID"]
+
+
+@objective("max_gm_over_I")
+def max_gm_over_i(m):
+    return -m["gm"] / m["ID"]
+
+
+@objective("max_gain")
+def max_gain(m):
+    return -m["gain"]
+
+
+@objective("min_area")
+def min_area(m):
+    return m["W"] + m["W1C"]
+
+
+# --- Built-in constraints ---
+
+@constraint("min_stage_gain")
+def min_stage_gain(m):
+    from . import three_optimize_first_stage as first_stage
+
+    return m["gain"] >= first_stage.target_stage_gain
+
+
+@constraint("weak_inversion")
+def weak_inversion(m):
+    return m["IC"] <= 1.0
+
+
+@constraint("noise_headroom")
+def noise_headroom(m):
+    """At least 10% below the (margin-scaled) noise spec."""
+    return m["noise_margin"] >= 0.1
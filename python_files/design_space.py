@@ -0,0 +1,288 @@
+################################################# Design-Space Exploration #################################################
+
+import csv
+import os
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: CPU time of this process only
+    resource = None
+
+# Optimizes every topology/flavour combination under one shared wall-clock or
+# CPU budget, in two phases:
+#   1. screening: every design with a coarse stage-1 grid (SCREEN_GRID, no
+#      multi-resolution refinement),
+#   2. refinement: the full optimization, best screening cost first.
+# A design is cancelled as soon as another design is better by more than
+# DOMINANCE_SLACK in all objectives (stage-1 cost, supply current, noise/spec),
+# and a refinement is skipped when its predicted time exceeds the remaining
+# budget (screening time per evaluated point x the points of a full run).
+# Designs whose schematic is missing are listed as skipped. The ranking is
+# written as CSV and Markdown plus a set of SVG plots.
+#
+# EXPLORE_BUDGET_S / EXPLORE_CPU_BUDGET_S set the default budgets (0 = none).
+
+SCREEN_GRID = {"w_points": 8, "id_points": 12, "max_levels": 0}
+DOMINANCE_SLACK = 0.1
+EXPLORE_DIR = Path("design_space")
+EXPLORE_BUDGET_S = float(os.getenv("EXPLORE_BUDGET_S", "0") or 0)
+EXPLORE_CPU_BUDGET_S = float(os.getenv("EXPLORE_CPU_BUDGET_S", "0") or 0)
+
+OBJECTIVES = ("cost", "supply_current", "noise_ratio")
+COLUMNS = (
+    "rank", "design", "status", "pareto", "cost", "supply_current_mA", "noise_ratio", "noise_margin",
+    "W1_um", "ID1_mA", "W2_um", "ID2_mA", "Iq_mA", "R_ph", "elapsed_s", "note", "project",
+)
+
+
+def _cpu_seconds():
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class Budget:
+    """Shared wall-clock and CPU budget (None = unlimited)."""
+
+    def __init__(self, wall_s=None, cpu_s=None):
+        self.wall_s = wall_s or None
+        self.cpu_s = cpu_s or None
+        self._wall0 = time.perf_counter()
+        self._cpu0 = _cpu_seconds()
+
+    def used(self):
+        return time.perf_counter() - self._wall0, _cpu_seconds() - self._cpu0
+
+    def remaining_s(self):
+        """Remaining wall-clock seconds (CPU budget converted with the CPU/wall ratio so far)."""
+        wall, cpu = self.used()
+        remaining = [float("inf")]
+        if self.wall_s:
+            remaining.append(self.wall_s - wall)
+        if self.cpu_s:
+            remaining.append((self.cpu_s - cpu) * wall / max(cpu, 1e-9))
+        return min(remaining)
+
+    def exhausted(self):
+        return self.remaining_s() <= 0
+
+
+def _noise_ratio(cir):
+    from SLiCAP import doNoise
+
+    from .noise_compliance import check_inoise
+
+    inoise = doNoise(cir, source="V1", detector="V_vo", numeric=True, pardefs="circuit").inoise
+    return check_inoise(inoise)["worst_ratio"]
+
+
+def design_objectives(entry):
+    """Objectives (all minimized) and key sizes of a design result from main._run_design."""
+    first = entry["first_stage"]
+    second = entry["second_stage"]
+    third = entry["third_stage"]
+    stage2_current = sum(abs(float(second[key])) for key in ("ID2_N", "ID2_P") if key in second) or abs(
+        float(second["ID2"])
+    )
+    supply_current = abs(float(first["ID1"])) + stage2_current + abs(float(third["Iq"]))
+    noise_ratio = _noise_ratio(entry["cir"])
+    phantom = entry.get("phantom_zero")
+    return {
+        "cost": float(first["best_cost"]),
+        "supply_current": supply_current,
+        "noise_ratio": noise_ratio,
+        "noise_margin": 1.0 - noise_ratio,
+        "W1_um": float(first["W1"]) * 1e6,
+        "ID1_mA": float(first["ID1"]) * 1e3,
+        "W2_um": float(second["W2"]) * 1e6,
+        "ID2_mA": float(second["ID2"]) * 1e3,
+        "Iq_mA": float(third["Iq"]) * 1e3,
+        "supply_current_mA": supply_current * 1e3,
+        "R_ph": phantom["R_ph"] if phantom else None,
+    }
+
+
+def dominates(a, b, slack=0.0):
+    """True when a is better than b in every objective, by more than `slack` (relative)."""
+    better = [a[key] <= b[key] * (1.0 - slack) if b[key] > 0 else a[key] < b[key] for key in OBJECTIVES]
+    return all(better) and any(a[key] < b[key] for key in OBJECTIVES)
+
+
+def _dominator(row, rows, slack):
+    for other in rows:
+        if other is not row and other.get("objectives") and dominates(other["objectives"], row["objectives"], slack):
+            return other["design"]
+    return None
+
+
+def _pareto_ranks(rows):
+    """Non-dominated sorting: rank 1 is the Pareto front."""
+    remaining = [row for row in rows if row.get("objectives")]
+    rank = 1
+    while remaining:
+        front = [row for row in remaining if not _dominator(row, remaining, 0.0)]
+        for row in front:
+            row["pareto"] = rank
+        remaining = [row for row in remaining if row not in front]
+        rank += 1
+
+
+def _attempt(row, run_design, screen):
+    t0 = time.perf_counter()
+    try:
+        entry = run_design(row["cfg"], screen)
+        row["objectives"] = design_objectives(entry)
+        row["evaluations"] = entry["first_stage"].get("evaluations")
+        row["status"] = "screened" if screen else "optimized"
+        row["note"] = ""
+    except Exception as exc:
+        row["status"] = "failed"
+        row["note"] = f"{type(exc).__name__}: {exc}"
+        print(f"[{row['design']}] Exploration run failed: {row['note']}")
+    elapsed = time.perf_counter() - t0
+    row["elapsed_s"] = row.get("elapsed_s", 0.0) + elapsed
+    if screen:
+        row["screen_s"] = elapsed
+
+
+def explore(design_specs, run_design, budget_s=None, cpu_budget_s=None, out_dir=EXPLORE_DIR, slack=DOMINANCE_SLACK):
+    """
+    Explore design_specs. run_design(cfg, screen) optimizes one design (coarse
+    stage-1 grid when screen is True) and returns main._run_design's result.
+    Returns the ranked rows and writes the table and plots to out_dir.
+    """
+    from .three_optimize_first_stage import expected_evaluations
+
+    full_points = expected_evaluations()
+    budget = Budget(budget_s if budget_s is not None else EXPLORE_BUDGET_S,
+                    cpu_budget_s if cpu_budget_s is not None else EXPLORE_CPU_BUDGET_S)
+    rows = [{"design": cfg["key"], "project": cfg["project"], "cfg": cfg, "status": "pending"} for cfg in design_specs]
+
+    print(f"Exploring {len(rows)} designs (budget: wall={budget.wall_s or '-'} s, cpu={budget.cpu_s or '-'} s)")
+    for row in rows:
+        if not Path(row["project"]).exists():
+            row["status"], row["note"] = "skipped", "no schematic"
+            continue
+        if budget.exhausted():
+            row["status"], row["note"] = "skipped", "budget exhausted before screening"
+            continue
+        _attempt(row, run_design, screen=True)
+
+    for row in rows:
+        if row["status"] == "screened":
+            dominator = _dominator(row, rows, slack)
+            if dominator:
+                row["status"], row["note"] = "pruned", f"dominated by {dominator} after screening"
+
+    candidates = sorted((row for row in rows if row["status"] == "screened"), key=lambda row: row["objectives"]["cost"])
+    for row in candidates:
+        dominator = _dominator(row, [other for other in rows if other["status"] == "optimized"], slack)
+        if dominator:
+            row["status"], row["note"] = "pruned", f"dominated by {dominator}"
+            continue
+        screen_points = row.get("evaluations") or SCREEN_GRID["w_points"] * SCREEN_GRID["id_points"]
+        predicted = row["screen_s"] * full_points / screen_points
+        if predicted > budget.remaining_s():
+            row["note"] = f"refinement skipped (predicted {predicted:.0f} s > remaining budget)"
+            continue
+        screened = dict(row["objectives"])
+        _attempt(row, run_design, screen=False)
+        if row["status"] == "failed":
+            row["status"], row["objectives"] = "screened", screened
+            row["note"] = "refinement failed; " + row["note"]
+        print(f"[{row['design']}] {row['status']} ({budget.remaining_s():.0f} s budget left)")
+
+    _pareto_ranks(rows)
+    ranked = sorted(
+        rows,
+        key=lambda row: (
+            row.get("pareto", float("inf")),
+            row["objectives"]["cost"] if row.get("objectives") else float("inf"),
+        ),
+    )
+    for rank, row in enumerate(ranked, start=1):
+        row["rank"] = rank if row.get("objectives") else None
+
+    wall, cpu = budget.used()
+    print(f"Exploration finished in {wall:.1f} s wall / {cpu:.1f} s CPU.")
+    write_outputs(ranked, out_dir)
+    return ranked
+
+
+def _table_rows(rows):
+    table = []
+    for row in rows:
+        objectives = row.get("objectives") or {}
+        record = {column: row.get(column, objectives.get(column)) for column in COLUMNS}
+        table.append({key: "" if value is None else value for key, value in record.items()})
+    return table
+
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def write_outputs(rows, out_dir=EXPLORE_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    table = _table_rows(rows)
+
+    with (out_dir / "comparison.csv").open("w", encoding="utf-8", newline="") as fobj:
+        writer = csv.DictWriter(fobj, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(table)
+
+    shown = [column for column in COLUMNS if column != "project"]
+    lines = ["| " + " | ".join(shown) + " |", "|" + "---|" * len(shown)]
+    lines += ["| " + " | ".join(_format_cell(record[column]) for column in shown) + " |" for record in table]
+    (out_dir / "comparison.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print("\n".join(lines))
+
+    _plot(rows, out_dir)
+    print(f"Wrote design-space comparison to '{out_dir}'.")
+
+
+def _plot(rows, out_dir):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    done = [row for row in rows if row.get("objectives")]
+    if not done:
+        return
+    colors = {"optimized": "tab:blue", "screened": "tab:orange", "pruned": "tab:gray"}
+
+    for x_key, y_key, name in (
+        ("supply_current_mA", "cost", "cost_vs_current"),
+        ("supply_current_mA", "noise_margin", "noise_margin_vs_current"),
+        ("cost", "noise_margin", "noise_margin_vs_cost"),
+    ):
+        fig, ax = plt.subplots(figsize=(7, 5))
+        for row in done:
+            objectives = row["objectives"]
+            marker = "*" if row.get("pareto") == 1 else "o"
+            ax.scatter(objectives[x_key], objectives[y_key], color=colors.get(row["status"], "k"), marker=marker, s=80)
+            ax.annotate(row["design"], (objectives[x_key], objectives[y_key]), textcoords="offset points", xytext=(5, 5))
+        ax.set_xlabel(x_key)
+        ax.set_ylabel(y_key)
+        ax.set_title("Design space (* = Pareto front; blue optimized, orange screened, gray pruned)")
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(out_dir / f"{name}.svg")
+        plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(7, 5))
+    names = [row["design"] for row in rows]
+    ax.barh(names, [row.get("elapsed_s", 0.0) for row in rows], color=[colors.get(row["status"], "k") for row in rows])
+    ax.set_xlabel("optimization time [s]")
+    ax.set_title("Time per design")
+    fig.tight_layout()
+    fig.savefig(out_dir / "time_per_design.svg")
+    plt.close(fig)
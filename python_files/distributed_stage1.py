@@ -0,0 +1,379 @@
+################################################# Distributed Stage-1 Work Queue #################################################
+
+import multiprocessing
+import os
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, InvalidStateError, wait as wait_futures
+from multiprocessing.managers import BaseManager
+
+# Coordinator/worker mode for the stage-1 width sweep across machines. A
+# manager server process holds the task queue and serves it over TCP
+# (multiprocessing.managers); workers on any host pull a task, evaluate it with
+# their own circuit copy and send the result back. WorkQueueExecutor is a
+# drop-in for the ProcessPoolExecutor in optimize_first_stage_parallel (submit +
+# as_completed); it collects the results from the server in a background thread.
+#
+# Fault tolerance: a leased task must be heartbeated every LEASE_S / 3 seconds;
+# when a worker dies its lease expires and the task goes back to the queue (at
+# most MAX_ATTEMPTS leases per task). A result that arrives twice is ignored.
+# When no task is leased, heartbeated or completed for IDLE_LEASES * LEASE_S
+# seconds (no worker connected, or all workers gone) the pending tasks fail with
+# a RuntimeError; so do they when the connection to the server is lost.
+#
+# STAGE1_COORDINATOR=host:port switches stage 1 to this mode (bind address),
+# STAGE1_AUTHKEY is the shared key (random when unset: local workers only) and
+# STAGE1_LOCAL_WORKERS starts that many workers on this machine. Remote workers:
+#   python main.py stage1-worker --connect host:port   (with STAGE1_AUTHKEY set)
+
+COORDINATOR_ADDRESS = os.getenv("STAGE1_COORDINATOR", "")
+AUTHKEY_ENV = "STAGE1_AUTHKEY"
+LOCAL_WORKERS = int(os.getenv("STAGE1_LOCAL_WORKERS", "0") or 0)
+LEASE_S = 30.0
+MAX_ATTEMPTS = 3
+IDLE_LEASES = 10
+POLL_S = 0.2
+RECONNECT_S = 2.0
+
+_DONE = "done"
+
+
+def parse_address(text, default_host="0.0.0.0"):
+    host, _, port = text.rpartition(":")
+    return (host or default_host, int(port))
+
+
+class TaskQueue:
+    """Task state of one session, living in the manager server process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._setup = (None, ())
+        self._lease_s = LEASE_S
+        self._tasks = {}  # task_id -> (fn, args)
+        self._pending = deque()
+        self._leases = {}  # task_id -> (worker_id, deadline)
+        self._attempts = {}
+        self._finished = set()
+        self._outbox = []  # (task_id, result, error) not yet collected
+        self._closed = False
+        self._workers = set()
+        self._last_activity = time.monotonic()
+
+    def configure(self, initializer, initargs, lease_s):
+        self._setup = (initializer, initargs)
+        self._lease_s = lease_s
+
+    def setup(self):
+        return self._setup
+
+    def add(self, task_id, fn, args):
+        with self._lock:
+            self._last_activity = time.monotonic()
+            self._tasks[task_id] = (fn, args)
+            self._attempts[task_id] = 0
+            self._pending.append(task_id)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+
+    def workers(self):
+        return sorted(self._workers)
+
+    def idle_s(self):
+        """Seconds since a task was last added, leased, heartbeated or completed."""
+        with self._lock:
+            return time.monotonic() - self._last_activity
+
+    def lease(self, worker_id):
+        """(task_id, fn, args), None when nothing is pending, or "done" after close()."""
+        with self._lock:
+            self._workers.add(worker_id)
+            while self._pending:
+                task_id = self._pending.popleft()
+                if task_id in self._finished:
+                    continue
+                self._attempts[task_id] += 1
+                self._last_activity = time.monotonic()
+                self._leases[task_id] = (worker_id, self._last_activity + self._lease_s)
+                fn, args = self._tasks[task_id]
+                return task_id, fn, args
+            return _DONE if self._closed else None
+
+    def heartbeat(self, worker_id, task_id):
+        with self._lock:
+            lease = self._leases.get(task_id)
+            if lease is None or lease[0] != worker_id:
+                return False
+            self._last_activity = time.monotonic()
+            self._leases[task_id] = (worker_id, self._last_activity + self._lease_s)
+            return True
+
+    def complete(self, worker_id, task_id, result=None, error=None):
+        with self._lock:
+            self._last_activity = time.monotonic()
+            self._leases.pop(task_id, None)
+            if task_id in self._finished:
+                return  # late result of a requeued task
+            self._finished.add(task_id)
+            self._outbox.append((task_id, result, error))
+
+    def requeue_expired(self):
+        """Requeue tasks whose lease expired; returns [(task_id, worker_id)]."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for task_id, (worker_id, deadline) in list(self._leases.items()):
+                if deadline >= now:
+                    continue
+                del self._leases[task_id]
+                expired.append((task_id, worker_id))
+                if self._attempts[task_id] >= MAX_ATTEMPTS:
+                    self._finished.add(task_id)
+                    error = RuntimeError(f"Stage-1 task {task_id} lost its worker {MAX_ATTEMPTS} times.")
+                    self._outbox.append((task_id, None, error))
+                else:
+                    self._pending.appendleft(task_id)
+        return expired
+
+    def collect(self):
+        """Finished tasks since the previous call."""
+        with self._lock:
+            finished, self._outbox = self._outbox, []
+        return finished
+
+
+_TASK_QUEUE = None
+
+
+def _task_queue():
+    # One queue per server process; every proxy refers to the same object.
+    global _TASK_QUEUE
+    if _TASK_QUEUE is None:
+        _TASK_QUEUE = TaskQueue()
+    return _TASK_QUEUE
+
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_CoordinatorManager.register("queue", callable=_task_queue)
+_WorkerManager.register("queue")
+
+
+def _authkey(authkey):
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class WorkQueueExecutor(Executor):
+    """
+    Executor whose tasks are served to stage-1 workers over TCP. Every worker
+    runs initializer(*initargs) once per session, like a pool initializer.
+    """
+
+    def __init__(self, address=None, authkey=None, initializer=None, initargs=(), local_workers=None, lease_s=LEASE_S):
+        address = address or COORDINATOR_ADDRESS or "127.0.0.1:0"
+        address = parse_address(address) if isinstance(address, str) else tuple(address)
+        authkey = authkey or os.getenv(AUTHKEY_ENV)
+        shared_key = bool(authkey)
+        self._authkey = _authkey(authkey or secrets.token_hex(16))
+
+        self._manager = _CoordinatorManager(address=address, authkey=self._authkey)
+        self._manager.start()
+        self.address = self._manager.address
+        self._queue = self._manager.queue()
+        self._queue.configure(initializer, initargs, lease_s)
+        self._futures = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._error = None  # set when the collector gave up; fails later submits
+        self._stop = threading.Event()
+        self._collector = threading.Thread(target=self._collect, args=(lease_s,), daemon=True)
+        self._collector.start()
+
+        host, port = self.address
+        print(f"Stage-1 coordinator listening on {host}:{port}.")
+        if not shared_key:
+            print(f"Set {AUTHKEY_ENV} to let workers on other hosts connect.")
+
+        local_workers = LOCAL_WORKERS if local_workers is None else local_workers
+        connect_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+        self._local = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=((connect_host, port), self._authkey),
+                kwargs={"worker_id": f"{socket.gethostname()}-local{index}", "once": True},
+                daemon=True,
+            )
+            for index in range(local_workers)
+        ]
+        for process in self._local:
+            process.start()
+
+    def _collect(self, lease_s):
+        try:
+            self._collect_loop(lease_s)
+        except Exception as exc:
+            self._fail_pending(RuntimeError(f"Stage-1 coordinator lost its task queue ({type(exc).__name__}: {exc})."))
+
+    def _collect_loop(self, lease_s):
+        # Own proxy: manager proxies must not be shared between threads.
+        queue = self._manager.queue()
+        last_check = time.monotonic()
+        while not self._stop.wait(POLL_S):
+            if time.monotonic() - last_check >= lease_s / 4:
+                last_check = time.monotonic()
+                for task_id, worker_id in queue.requeue_expired():
+                    print(f"Stage-1 worker '{worker_id}' lost task {task_id}; requeued.")
+                idle_s = queue.idle_s()
+                if idle_s > IDLE_LEASES * lease_s and self._pending():
+                    host, port = self.address
+                    self._fail_pending(
+                        RuntimeError(
+                            f"No stage-1 worker activity for {idle_s:.0f} s; start workers with "
+                            f"'python main.py stage1-worker --connect {host}:{port}'."
+                        )
+                    )
+                    return
+            for task_id, result, error in queue.collect():
+                with self._lock:
+                    future = self._futures[task_id]
+                if error is not None:
+                    _resolve(future.set_exception, error)
+                else:
+                    _resolve(future.set_result, result)
+
+    def _pending(self):
+        with self._lock:
+            return [future for future in self._futures.values() if not future.done()]
+
+    def _fail_pending(self, error):
+        """Fail every unresolved future (and every later submit) with error."""
+        with self._lock:
+            self._error = error
+        for future in self._pending():
+            _resolve(future.set_exception, error)
+
+    def submit(self, fn, /, *args, **kwargs):
+        if kwargs:
+            raise RuntimeError("WorkQueueExecutor.submit does not take keyword arguments.")
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            if self._error is not None:
+                future.set_exception(self._error)
+                return future
+            task_id = self._next_id
+            self._next_id += 1
+            self._futures[task_id] = future
+        self._queue.add(task_id, fn, args)
+        return future
+
+    def workers(self):
+        """Worker ids that have leased tasks in this session."""
+        return self._queue.workers()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            for future in self._pending():
+                _resolve(future.set_exception, RuntimeError("Stage-1 coordinator shut down."))
+        if wait:
+            wait_futures(list(self._futures.values()))
+        try:
+            self._queue.close()
+        except (OSError, EOFError):
+            pass  # server already gone; the collector has failed the pending futures
+        for process in self._local:
+            process.join(timeout=RECONNECT_S + 5 * POLL_S)
+        self._stop.set()
+        self._collector.join()
+        self._manager.shutdown()
+
+
+def _resolve(setter, value):
+    # A future may already be resolved by the other thread (shutdown vs. collector).
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass
+
+
+class _Heartbeat:
+    """Renews the lease of a running task from a background thread."""
+
+    def __init__(self, manager, worker_id, task_id, interval):
+        self._manager = manager
+        self._args = (worker_id, task_id)
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        queue = self._manager.queue()
+        while not self._stop.wait(self._interval):
+            try:
+                queue.heartbeat(*self._args)
+            except (OSError, EOFError):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _serve_session(manager, worker_id, lease_s):
+    queue = manager.queue()
+    initializer, initargs = queue.setup()
+    if initializer is not None:
+        initializer(*initargs)
+    done = 0
+    while True:
+        lease = queue.lease(worker_id)
+        if lease == _DONE:
+            return done
+        if lease is None:
+            time.sleep(POLL_S)
+            continue
+        task_id, fn, args = lease
+        with _Heartbeat(manager, worker_id, task_id, lease_s / 3):
+            try:
+                result, error = fn(*args), None
+            except Exception as exc:
+                result, error = None, exc
+        queue.complete(worker_id, task_id, result, error)
+        done += 1
+
+
+def run_worker(address, authkey, worker_id=None, once=False, lease_s=LEASE_S):
+    """
+    Pull and evaluate stage-1 tasks from the coordinator at address (host, port).
+    With once=False the worker waits for the next coordinator session when one
+    ends (there is one session per optimized design).
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    while True:
+        manager = _WorkerManager(address=tuple(address), authkey=_authkey(authkey))
+        try:
+            manager.connect()
+            done = _serve_session(manager, worker_id, lease_s)
+            print(f"[{worker_id}] Session finished after {done} tasks.")
+        except (ConnectionRefusedError, ConnectionResetError, EOFError, BrokenPipeError) as exc:
+            if once:
+                return
+            print(f"[{worker_id}] Coordinator unavailable ({type(exc).__name__}); retrying in {RECONNECT_S:.0f} s.")
+        if once:
+            return
+        time.sleep(RECONNECT_S)
@@ -0,0 +1,86 @@
+################################################# Generated Specs Loader #################################################
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+# main.run writes every specs_<key>.py module together with a specs_<key>.json
+# file holding the same rows. Reading the JSON file does not import SLiCAP or
+# execute generated code; specItem objects are only built when they are used.
+
+GENERATED_SPECS_DIR = Path(__file__).resolve().parent
+
+
+def spec_data_path(design_key):
+    return GENERATED_SPECS_DIR / f"specs_{design_key}.json"
+
+
+@lru_cache(maxsize=None)
+def _read_records(path_str):
+    with open(path_str, "r", encoding="utf-8") as fobj:
+        payload = json.load(fobj)
+    return tuple(payload["specs"])
+
+
+def load_spec_records(design_key):
+    """Return the generated spec rows of a design as a list of dicts."""
+    path = spec_data_path(design_key)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No generated spec data for '{design_key}' at '{path}'. "
+            "Run main.py for this design first."
+        )
+    return [dict(record) for record in _read_records(str(path))]
+
+
+def load_spec_values(design_key):
+    """Return {symbol: value} for a design without building specItem objects."""
+    return {record["symbol"]: record["value"] for record in load_spec_records(design_key)}
+
+
+class LazySpecList:
+    """List-like view of spec rows that creates SLiCAP specItem objects on first access."""
+
+    def __init__(self, records):
+        self._records = list(records)
+        self._items = None
+
+    def _build(self):
+        if self._items is None:
+            from SLiCAP import specItem
+
+            self._items = [
+                specItem(
+                    record["symbol"],
+                    description=record["description"],
+                    value=record["value"],
+                    units=record["units"],
+                    specType=record["specType"],
+                )
+                for record in self._records
+            ]
+        return self._items
+
+    @property
+    def records(self):
+        return list(self._records)
+
+    def values(self):
+        return {record["symbol"]: record["value"] for record in self._records}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        return self._build()[index]
+
+    def __iter__(self):
+        return iter(self._build())
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+
+def load_specs(design_key):
+    """Return the generated specs of a design as a lazily built specItem list."""
+    return LazySpecList(load_spec_records(design_key))
@@ -1,6 +1,7 @@
 ################################################# Circuit Performance HTML Page #################################################
 from SLiCAP import *
 
+from .noise_compliance import check_inoise
 from .plot_generation import generate_performance_plots
 
 
@@ -96,6 +97,11 @@ def _stage_specs_from_circuit(cir, stage1_flavor=None, stage2_flavor=None):
     return rows
 
 
+def _format_metric(value, spec, unit):
+    """Metric with unit, or a dash for crossings that were not found."""
+    return "-" if value is None else f"{value:{spec}}{unit}"
+
+
 def generate_circuit_performance_html(
     cir,
     design_tag="",
@@ -104,6 +110,8 @@ def generate_circuit_performance_html(
     stage1_flavor=None,
     stage2_flavor=None,
     circuit_image="Active_E_Field_Probe.svg",
+    corners=None,
+    monte_carlo=None,
 ):
     suffix = design_tag.upper().strip()
     title = "Circuit Performance" if not suffix else f"Circuit Performance ({suffix})"
@@ -131,6 +139,20 @@ def generate_circuit_performance_html(
     pz2html(perf["pole_zero_s"], label=f"PoleZero Servo {suffix}".strip(), labelText='PoleZero Servo')
     pz2html(perf["pole_zero_g"], label=f"PoleZero Gain {suffix}".strip(), labelText='PoleZero Gain')
 
+    stability = perf["stability"]
+    head3html("Stability")
+    text2html(
+        f"Closed loop {'stable' if stability['closed_loop_stable'] else 'UNSTABLE'}; "
+        f"|L| at low frequency = {stability['loopgain_lf']:.3e}."
+    )
+    text2html(
+        f"Unity-gain crossover: {_format_metric(stability['crossover_hz'], '.4e', ' Hz')}, "
+        f"phase margin: {_format_metric(stability['phase_margin_deg'], '.1f', ' deg')}; "
+        f"phase crossover: {_format_metric(stability['phase_crossover_hz'], '.4e', ' Hz')}, "
+        f"gain margin: {_format_metric(stability['gain_margin_db'], '.1f', ' dB')}; "
+        f"-3 dB bandwidth of the gain: {_format_metric(stability.get('bandwidth_hz'), '.4e', ' Hz')}."
+    )
+
     if perf["stepped_pz_gain_image"] is not None:
         head3html("Stepped PZ (Gain)")
         img2html(perf["stepped_pz_gain_image"], width=750)
@@ -144,7 +166,51 @@ def generate_circuit_performance_html(
     img2html(perf["inoise_image"], width=700)
     eqn2html("S_IRnoise", perf["noise_expr"].inoise)
 
+    compliance = check_inoise(perf["noise_expr"].inoise)
+    head3html("Noise Compliance")
+    text2html(
+        f"Band {compliance['f_lo_hz']:.3e} Hz to {compliance['f_hi_hz']:.3e} Hz: "
+        f"{'compliant' if compliance['compliant'] else 'NOT compliant'}, "
+        f"worst noise/spec = {compliance['worst_ratio']:.3f} at {compliance['worst_freq_hz']:.4e} Hz."
+    )
+    text2html(
+        f"Band-integrated noise: {compliance['integrated_noise']:.3e} "
+        f"(rms {compliance['rms_noise']:.3e}); spec: {compliance['integrated_spec']:.3e} "
+        f"(rms {compliance['rms_spec']:.3e})."
+    )
+
+    if corners:
+        head2html("Temperature Corners")
+        rows = "".join(
+            f"<tr><td>{corner['T']:.1f}</td><td>{corner['noise_worst_ratio']:.3f}</td>"
+            f"<td>{corner['loopgain_lf']:.3e}</td><td>{corner['bandwidth_hz']:.3e}</td></tr>\n"
+            for corner in corners["corners"]
+        )
+        text2html(
+            "<table><tr><th>T [K]</th><th>max noise / spec</th><th>|L| at low f</th><th>-3 dB bandwidth [Hz]</th></tr>\n"
+            + rows
+            + "</table>"
+        )
+
+    if monte_carlo:
+        head2html("Monte Carlo")
+        text2html(
+            f"{monte_carlo['n_samples']} samples (seed {monte_carlo['seed']}): "
+            f"yield {monte_carlo['yield']*100:.2f}% "
+            f"(noise {monte_carlo['noise_yield']*100:.2f}%, gain {monte_carlo['gain_yield']*100:.2f}%, "
+            f"stability {monte_carlo['stability_yield']*100:.2f}%). "
+            f"99th percentile of noise/spec: {monte_carlo['noise_ratio_p99']:.3f}; "
+            f"relative gain spread (1 sigma): {monte_carlo['gain_sigma_rel']*100:.2f}%."
+        )
+
     head2html("Stage Widths and Currents")
     stage_specs = _stage_specs_from_circuit(cir, stage1_flavor=stage1_flavor, stage2_flavor=stage2_flavor)
     if stage_specs:
         specs2html(stage_specs)
+
+    # Design-specific images referenced by this page (used by the report manifest).
+    images = [circuit_image, perf["fb_mag_image"], perf["ph_mag_image"], perf["inoise_image"]]
+    for key in ("stepped_pz_gain_image", "stepped_pz_loopgain_image"):
+        if perf[key] is not None:
+            images.append(perf[key])
+    return images
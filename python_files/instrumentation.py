@@ -0,0 +1,157 @@
+################################################# SLiCAP Call Instrumentation #################################################
+
+import functools
+import os
+import sys
+import time
+
+import numpy as np
+
+# Call counts and latencies of the SLiCAP hot path (doNoise, doLaplace, doPZ,
+# makeCircuit, plotSweep and the circuit methods defPar / getParValue), per
+# calling stage. Enabled with SLICAP_INSTRUMENT=1 or `main.py optimize
+# --instrument`; when disabled nothing is wrapped.
+#
+# install() replaces the SLiCAP functions in the SLiCAP module and in every
+# module that bound them with `from SLiCAP import ...`, and patches the circuit
+# class. Only the outermost instrumented call is recorded (a getParValue inside
+# doNoise is part of the doNoise latency). The stage is the one set with
+# set_stage(), or the calling module when none is set.
+#
+# Worker processes call install()/reset() in their initializer and return
+# drain() with their results; the parent adds them with merge().
+
+INSTRUMENT_ENV = "SLICAP_INSTRUMENT"
+FUNCTIONS = ("doNoise", "doLaplace", "doPZ", "makeCircuit", "plotSweep")
+METHODS = ("defPar", "getParValue")
+PERCENTILES = (50, 95, 99)
+
+_SAMPLES = {}  # (stage, name) -> [latency in s]
+_STAGE = None
+_DEPTH = 0
+
+
+def enabled():
+    return os.getenv(INSTRUMENT_ENV, "0") == "1"
+
+
+def enable():
+    """Switch instrumentation on for this process and the worker processes it starts."""
+    os.environ[INSTRUMENT_ENV] = "1"
+
+
+def set_stage(name):
+    """Attribute the following calls to `name` (None: the calling module)."""
+    global _STAGE
+    _STAGE = name
+
+
+def _record(name, fn, on_result=None):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _DEPTH
+        if _DEPTH:
+            return fn(*args, **kwargs)
+        stage = _STAGE or sys._getframe(1).f_globals.get("__name__", "?").rpartition(".")[2]
+        _DEPTH += 1
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _SAMPLES.setdefault((stage, name), []).append(time.perf_counter() - t0)
+            _DEPTH -= 1
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    wrapper._instrumented = fn
+    return wrapper
+
+
+def _patch_circuit_class(cls):
+    for name in METHODS:
+        method = getattr(cls, name, None)
+        if method is not None and not hasattr(method, "_instrumented"):
+            setattr(cls, name, _record(name, method))
+
+
+def install(cir=None):
+    """Wrap the SLiCAP hot-path functions (idempotent); cir patches its circuit class."""
+    import SLiCAP
+
+    for name in FUNCTIONS:
+        original = getattr(SLiCAP, name, None)
+        if original is None:
+            continue
+        original = getattr(original, "_instrumented", original)
+        wrapped = getattr(SLiCAP, name)
+        if not hasattr(wrapped, "_instrumented"):
+            # New circuits get their class patched as well.
+            on_result = (lambda cir: _patch_circuit_class(type(cir))) if name == "makeCircuit" else None
+            wrapped = _record(name, original, on_result)
+            setattr(SLiCAP, name, wrapped)
+        # Modules that already did `from SLiCAP import ...` hold the original.
+        for module in list(sys.modules.values()):
+            if module is not None and getattr(module, name, None) is original:
+                setattr(module, name, wrapped)
+
+    if cir is not None:
+        _patch_circuit_class(type(cir))
+
+
+def reset():
+    _SAMPLES.clear()
+
+
+def drain():
+    """Samples recorded so far as a picklable dict, cleared afterwards (for worker processes)."""
+    samples = {f"{stage}\t{name}": values for (stage, name), values in _SAMPLES.items()}
+    reset()
+    return samples
+
+
+def merge(samples, stage=None):
+    """Add drain() output of a worker to `stage` (default: the current stage, else the worker's)."""
+    for key, values in (samples or {}).items():
+        worker_stage, name = key.split("\t")
+        _SAMPLES.setdefault((stage or _STAGE or worker_stage, name), []).extend(values)
+
+
+def report():
+    """Rows {stage, name, calls, total_s, mean_ms, p50_ms, ...} ordered by stage and total time."""
+    rows = []
+    for (stage, name), values in _SAMPLES.items():
+        latencies = np.asarray(values) * 1e3
+        row = {
+            "stage": stage,
+            "name": name,
+            "calls": latencies.size,
+            "total_s": float(latencies.sum()) / 1e3,
+            "mean_ms": float(latencies.mean()),
+        }
+        for pct, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            row[f"p{pct}_ms"] = float(value)
+        rows.append(row)
+    stage_order = {}
+    for row in rows:
+        stage_order[row["stage"]] = stage_order.get(row["stage"], 0.0) + row["total_s"]
+    return sorted(rows, key=lambda row: (-stage_order[row["stage"]], row["stage"], -row["total_s"]))
+
+
+def print_report():
+    rows = report()
+    if not rows:
+        return
+    print("\n================== SLiCAP Call Breakdown ==================")
+    print("(worker calls are summed over processes, so a stage total can exceed its wall time)")
+    stage = None
+    for row in rows:
+        if row["stage"] != stage:
+            stage = row["stage"]
+            total = sum(other["total_s"] for other in rows if other["stage"] == stage)
+            print(f"{stage}: {total:.2f} s")
+        print(
+            f"  {row['name']:<12} calls={row['calls']:7d}  total={row['total_s']:8.2f} s  "
+            f"mean={row['mean_ms']:8.2f} ms  "
+            + "  ".join(f"p{pct}={row[f'p{pct}_ms']:8.2f} ms" for pct in PERCENTILES)
+        )
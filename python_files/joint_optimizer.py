@@ -0,0 +1,367 @@
+################################################# Joint Three-Stage Optimizer #################################################
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import three_optimize_first_stage as first_stage
+from . import three_optimize_third_stage as third_stage
+from .kernels import CircuitKernels, ParameterKernels
+from .noise_compliance import band_frequencies, noise_spec
+from .specifications import P_cons, VDD, f_max
+
+# The sequential flow sizes stage 3, then stage 2 for the input capacitance of
+# stage 3, then stage 1 for that of stage 2; stage 2 never sees the cascode pole
+# it loads. This module searches all stages at once:
+#   stage 1: W1, ID1 and W1C (as the ratio W1C/W1),
+#   stage 2: W2, ID2 (conventional N/P stage 2 only),
+#   stage 3: W_N and Iq, with W_P = W_N * the gm-matched Wp/Wn ratio of stage 3.
+# The objective is the total supply current. The constraints are the targets of
+# the sequential stages: VDD * current <= P_cons, noise within the stage-1 noise
+# margin, IC_X1 <= IC_CRIT_X1, cascode pole > target_pole_f with the stage-2
+# Ciss of the candidate, stage-2 gm for stage-3 Ciss at 100 MHz, stage-3 gm at
+# peak and quiescent current, the stage-1 size budget, and a loop gain at f_max
+# no lower than that of the sequential design (nominal temperature).
+#
+# Device parameters, noise and loop gain are lambdified once over the nine
+# sizing parameters (kernels.py). The search is a cross-entropy method in log
+# space: every round evaluates JOINT_SAMPLES candidates in chunks on a process
+# pool and refits the sampling distribution to the best ELITE_FRACTION. The
+# sequential design is part of the first round, so the joint result is never
+# worse than it. JOINT_SAMPLES / JOINT_ROUNDS set the search size.
+
+JOINT_SAMPLES = int(os.getenv("JOINT_SAMPLES", "20000") or 20000)
+JOINT_ROUNDS = int(os.getenv("JOINT_ROUNDS", "12") or 12)
+ELITE_FRACTION = 0.02
+MIN_SPREAD = 0.01             # lower bound of the sampling std [decades]
+CHUNK_SIZE = 2_000
+POOL_THRESHOLD = 10_000       # candidates per round from which chunks run on a process pool
+NOISE_POINTS = 200
+DEFAULT_SEED = 2024
+
+STAGE2_F_LOCAL = 100e6        # as three_optimize_second_stage_conventional
+STAGE2_TOLERANCE = 0.01
+STAGE3_TOLERANCE = 0.02       # as the stage-3 bias loop
+MIN_CASCODE_W = 180e-9        # as three_optimize_first_stage._tune_cascode
+
+# Search bounds of the design variables (widened to contain the sequential design).
+BOUNDS = {
+    "W1": (1e-6, 5e-3),
+    "ID1": (10e-6, first_stage.I_budget_stage),
+    "WC_RATIO": (1e-4, 1.0),
+    "W2": (0.1e-6, 1000e-6),
+    "ID2": (10e-6, 20e-3),
+    "W3": (1e-6, 2e-3),
+    "Iq": (50e-6, 10e-3),
+}
+VARIABLES = tuple(BOUNDS)
+
+DEVICE_PARS = ("g_m_X1", "g_o_X1", "g_m_X7", "g_o_X7", "IC_X1", "IC_CRIT_X1", "c_iss_X2", "c_iss_X3", "g_m_X2")
+
+_WORKER_STATE = None
+
+
+def build_setup(cir, entry, cascode_ciss_par="c_iss_X4"):
+    """Kernels and fixed data of a sequentially sized design (main._run_design entry; picklable)."""
+    first = entry["first_stage"]
+    second = entry["second_stage"]
+    third = entry["third_stage"]
+    if second.get("stage2_flavor") not in ("N", "P"):
+        raise RuntimeError(
+            f"Joint optimization supports conventional stage-2 flavors (N, P), not '{second.get('stage2_flavor')}'."
+        )
+    names = {
+        "W1": first["w_param"],
+        "ID1": first["id_param"],
+        "W1C": first["wc_param"],
+        "W2": second["w_param"],
+        "ID2": second["id_param"],
+    }
+    params = list(names.values()) + ["W_N", "W_P", "ID_N", "ID_P"]
+    device_pars = list(dict.fromkeys(DEVICE_PARS + (cascode_ciss_par, second["gm_eval_symbol"])))
+
+    print(f"Compiling joint kernels over {', '.join(params)}...")
+    t0 = time.perf_counter()
+    setup = {
+        "names": names,
+        "id1_sign": 1.0 if first.get("stage1_flavor", "N") == "N" else -1.0,
+        "id2_sign": 1.0 if second["stage2_flavor"] == "N" else -1.0,
+        "ratio_wp_wn": float(third["ratio_wp_wn"]),
+        "drive_current": float(third["I_peak"]) - float(third["Iq"]),
+        "ciss_par": cascode_ciss_par,
+        "gm2_par": second["gm_eval_symbol"],
+        "device": ParameterKernels.from_circuit(cir, device_pars, params),
+        "circuit": CircuitKernels.from_circuit(cir, params, transfers=("loopgain",)),
+        "noise_freqs": band_frequencies(NOISE_POINTS),
+    }
+    setup["noise_spec"] = noise_spec(setup["noise_freqs"])
+    setup["loopgain_min"] = 0.0
+    print(f"Joint kernels compiled in {time.perf_counter() - t0:.2f}s.")
+
+    sequential = {
+        "W1": float(first["W1"]),
+        "ID1": abs(float(first["ID1"])),
+        "WC_RATIO": float(first["W1C"]) / float(first["W1"]),
+        "W2": float(second["W2"]),
+        "ID2": abs(float(second["ID2"])),
+        "W3": float(third["Wn"]),
+        "Iq": float(third["Iq"]),
+    }
+    setup["sequential"] = sequential
+    setup["loopgain_min"] = float(evaluate(setup, _as_arrays(sequential))["loopgain_fmax"][0])
+    setup["bounds"] = {
+        name: (min(lo, sequential[name]), max(hi, sequential[name])) for name, (lo, hi) in BOUNDS.items()
+    }
+    return setup
+
+
+def _as_arrays(x):
+    return {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in x.items()}
+
+
+def circuit_values(setup, x, stage3_current=None):
+    """Circuit parameter values {name: array} of candidates x (stage-3 current: Iq unless given)."""
+    names = setup["names"]
+    current = x["Iq"] if stage3_current is None else stage3_current
+    return {
+        names["W1"]: x["W1"],
+        names["ID1"]: setup["id1_sign"] * x["ID1"],
+        names["W1C"]: np.maximum(x["WC_RATIO"] * x["W1"], MIN_CASCODE_W),
+        names["W2"]: x["W2"],
+        names["ID2"]: setup["id2_sign"] * x["ID2"],
+        "W_N": x["W3"],
+        "W_P": setup["ratio_wp_wn"] * x["W3"],
+        "ID_N": current,
+        "ID_P": -current,
+    }
+
+
+def evaluate(setup, x):
+    """
+    Metrics of candidates x {variable: array}: the objective (supply current),
+    every constraint as a relative value that is <= 0 when met, and the total
+    violation (0 for feasible candidates).
+    """
+    samples = circuit_values(setup, x)
+    pars = setup["device"].evaluate(samples)
+    peak_samples = circuit_values(setup, x, x["Iq"] + setup["drive_current"])
+    gm_peak = setup["device"].evaluate(peak_samples, names=("g_m_X2",))["g_m_X2"]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        ro_amp = first_stage._output_resistance(pars["g_o_X1"])
+        ro_casc = first_stage._output_resistance(pars["g_o_X7"])
+        stage_gain = pars["g_m_X1"] * ro_amp * pars["g_m_X7"] * ro_casc
+        cascode_pole = 1 / (2 * np.pi * ro_amp * pars["g_m_X7"] * ro_casc * pars[setup["ciss_par"]])
+        ciss3 = pars["c_iss_X2"] + pars["c_iss_X3"]
+        gm2_ratio = np.abs(pars[setup["gm2_par"]]) / (2 * np.pi * STAGE2_F_LOCAL * ciss3)
+
+        noise = setup["circuit"].noise(setup["noise_freqs"], samples)
+        noise_ratio = np.max(noise / (first_stage.noise_margin * setup["noise_spec"][None, :]), axis=1)
+        loopgain_fmax = np.abs(setup["circuit"].response("loopgain", [f_max], samples)[:, 0])
+
+        supply_current = x["ID1"] + x["ID2"] + x["Iq"]
+        size_budget = first_stage.max_size_budget / (1 - first_stage.max_size_budget)
+        constraints = {
+            "power": VDD * supply_current / P_cons - 1,
+            "noise": noise_ratio - 1,
+            "inversion": pars["IC_X1"] / pars["IC_CRIT_X1"] - 1,
+            "cascode_pole": 1 - cascode_pole / first_stage.target_pole_f,
+            "stage2_gm": (1 - STAGE2_TOLERANCE) - gm2_ratio,
+            "stage3_gm_peak": (1 - STAGE3_TOLERANCE) - gm_peak / third_stage.gm_peak_target,
+            "stage3_gm_quiescent": (1 - STAGE3_TOLERANCE) - pars["g_m_X2"] / third_stage.gm_quiescent_target,
+            "size_budget": x["W1"] / (size_budget * (x["W3"] * (1 + setup["ratio_wp_wn"]))) - 1,
+        }
+        if setup["loopgain_min"] > 0:
+            constraints["loopgain"] = 1 - loopgain_fmax / setup["loopgain_min"]
+
+    violation = np.zeros_like(supply_current)
+    for values in constraints.values():
+        violation += np.where(np.isnan(values), np.inf, np.maximum(values, 0.0))
+
+    metrics = {
+        "objective": supply_current,
+        "violation": violation,
+        "supply_current": supply_current,
+        "power": VDD * supply_current,
+        "noise_ratio": noise_ratio,
+        "stage_gain": stage_gain,
+        "cascode_pole_hz": cascode_pole,
+        "stage2_gm_ratio": gm2_ratio,
+        "loopgain_fmax": loopgain_fmax,
+    }
+    metrics.update({f"c_{name}": values for name, values in constraints.items()})
+    return metrics
+
+
+def _worker_init(setup):
+    global _WORKER_STATE
+    _WORKER_STATE = setup
+
+
+def _worker_chunk(x):
+    return evaluate(_WORKER_STATE, x)
+
+
+def _evaluate_batch(setup, x, pool):
+    n_samples = len(next(iter(x.values())))
+    chunks = [
+        {name: values[start:start + CHUNK_SIZE] for name, values in x.items()}
+        for start in range(0, n_samples, CHUNK_SIZE)
+    ]
+    results = list(pool.map(_worker_chunk, chunks)) if pool is not None else [evaluate(setup, chunk) for chunk in chunks]
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+def _order(metrics):
+    """Candidate indices, best first: feasible by objective, then by violation."""
+    objective = np.where(np.isfinite(metrics["objective"]), metrics["objective"], np.inf)
+    return np.lexsort((objective, metrics["violation"]))
+
+
+def _draw(rng, n_samples, log_bounds, mean=None, std=None):
+    """Candidates in log10 space: Latin hypercube over the bounds, or normal around mean (clipped)."""
+    columns = {}
+    for name, (lo, hi) in log_bounds.items():
+        if mean is None:
+            strata = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+            columns[name] = lo + strata * (hi - lo)
+        else:
+            columns[name] = np.clip(rng.normal(mean[name], std[name], n_samples), lo, hi)
+    return columns
+
+
+def _take(x, index):
+    return {name: values[index] for name, values in x.items()}
+
+
+def _row(metrics, index):
+    return {key: float(values[index]) for key, values in metrics.items()}
+
+
+def optimize_joint(cir, entry, cascode_ciss_par="c_iss_X4", n_samples=None, rounds=None, seed=DEFAULT_SEED,
+                   max_workers=None):
+    """
+    Jointly size stages 1-3 of a sequentially optimized design (main._run_design
+    entry). Returns the joint optimum, the sequential design evaluated with the
+    same kernels and constraints, and their comparison. cir is not modified
+    (see apply_result).
+    """
+    n_samples = int(n_samples or JOINT_SAMPLES)
+    rounds = int(rounds or JOINT_ROUNDS)
+    t_start = time.perf_counter()
+    setup = build_setup(cir, entry, cascode_ciss_par)
+    log_bounds = {name: (np.log10(lo), np.log10(hi)) for name, (lo, hi) in setup["bounds"].items()}
+    n_elite = max(2, int(ELITE_FRACTION * n_samples))
+    rng = np.random.default_rng(seed)
+
+    sequential_x = _as_arrays(setup["sequential"])
+    sequential_metrics = evaluate(setup, sequential_x)
+
+    pool = None
+    if n_samples >= POOL_THRESHOLD:
+        if max_workers is None:
+            max_workers = max(1, min((os.cpu_count() or 2) - 1, -(-n_samples // CHUNK_SIZE)))
+        pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init, initargs=(setup,))
+    print(
+        f"----- Joint Optimization: {rounds} rounds x {n_samples} candidates"
+        + (f" on {max_workers} processes" if pool is not None else "")
+        + " -----"
+    )
+
+    evaluations = 0
+    elite_x = _take(sequential_x, slice(None))
+    elite_metrics = sequential_metrics
+    mean = std = None
+    try:
+        for round_index in range(rounds):
+            log_x = _draw(rng, n_samples, log_bounds, mean, std)
+            x = {name: 10.0**values for name, values in log_x.items()}
+            metrics = _evaluate_batch(setup, x, pool)
+            evaluations += n_samples
+
+            # Elitism: the best candidates so far compete with the new round.
+            x = {name: np.concatenate([elite_x[name], x[name]]) for name in VARIABLES}
+            metrics = {key: np.concatenate([elite_metrics[key], metrics[key]]) for key in metrics}
+            order = _order(metrics)[:n_elite]
+            elite_x = _take(x, order)
+            elite_metrics = _take(metrics, order)
+
+            log_elite = {name: np.log10(values) for name, values in elite_x.items()}
+            mean = {name: float(np.mean(values)) for name, values in log_elite.items()}
+            std = {name: max(float(np.std(values)), MIN_SPREAD) for name, values in log_elite.items()}
+            best = _row(elite_metrics, 0)
+            feasible = int(np.sum(elite_metrics["violation"] == 0))
+            print(
+                f"Round {round_index + 1}/{rounds}: best current={best['supply_current']*1e3:.3f}mA, "
+                f"violation={best['violation']:.3g}, feasible elites={feasible}/{n_elite}, "
+                f"spread={max(std.values()):.3f} dec"
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed_s = time.perf_counter() - t_start
+    joint = _describe(setup, _take(elite_x, slice(0, 1)), _take(elite_metrics, slice(0, 1)))
+    sequential = _describe(setup, sequential_x, sequential_metrics)
+    print(f"Joint optimization: {evaluations} evaluations in {elapsed_s:.2f}s")
+    return {
+        "joint": joint,
+        "sequential": sequential,
+        "comparison": compare(sequential, joint),
+        "evaluations": evaluations,
+        "rounds": rounds,
+        "samples_per_round": n_samples,
+        "seed": seed,
+        "elapsed_s": elapsed_s,
+        "workers": max_workers if pool is not None else 1,
+    }
+
+
+def _describe(setup, x, metrics):
+    """Circuit parameter values, metrics and violated constraints of one candidate."""
+    values = circuit_values(setup, x)
+    row = _row(metrics, 0)
+    return {
+        "parameters": {name: float(np.asarray(value).ravel()[0]) for name, value in values.items()},
+        "metrics": {key: value for key, value in row.items() if not key.startswith("c_")},
+        "constraints": {key[2:]: value for key, value in row.items() if key.startswith("c_")},
+        "violated": [key[2:] for key, value in row.items() if key.startswith("c_") and not value <= 0],
+        "feasible": row["violation"] == 0,
+    }
+
+
+COMPARED_METRICS = ("supply_current", "power", "noise_ratio", "stage_gain", "cascode_pole_hz", "loopgain_fmax")
+
+
+def compare(sequential, joint):
+    """{metric: {"sequential", "joint", "change"}} with the relative change joint/sequential - 1."""
+    rows = {}
+    for key in COMPARED_METRICS:
+        old = sequential["metrics"][key]
+        new = joint["metrics"][key]
+        rows[key] = {"sequential": old, "joint": new, "change": new / old - 1 if old else None}
+    return rows
+
+
+def apply_result(cir, result):
+    """Define the joint optimum on cir."""
+    for name, value in result["joint"]["parameters"].items():
+        cir.defPar(name, value)
+
+
+def print_comparison(result, label=""):
+    prefix = f"[{label}] " if label else ""
+    print(f"\n{prefix}----- Joint vs Sequential Sizing -----")
+    for key in ("sequential", "joint"):
+        design = result[key]
+        status = "feasible" if design["feasible"] else "violates " + ", ".join(design["violated"])
+        sizes = ", ".join(
+            f"{name}={value*1e6:.2f}um" if name.startswith("W") else f"{name}={value*1e3:.3f}mA"
+            for name, value in design["parameters"].items()
+        )
+        print(f"{key:<10}: {status}; {sizes}")
+    for key, row in result["comparison"].items():
+        change = f"{row['change']*100:+.1f}%" if row["change"] is not None else "n/a"
+        print(f"  {key:<16} sequential={row['sequential']:.4g}  joint={row['joint']:.4g}  ({change})")
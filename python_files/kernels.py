@@ -0,0 +1,188 @@
+################################################# Lambdified Circuit Kernels #################################################
+
+import numpy as np
+import sympy as sp
+from SLiCAP import doLaplace, doNoise
+
+from .symbolic import keep_symbolic
+
+# SLiCAP runs once per circuit with the parameters in `params` kept symbolic.
+# The noise density and the numerator/denominator coefficients of the transfers
+# become NumPy functions of those parameters, so thousands of parameter sets
+# are evaluated with array operations instead of one SLiCAP analysis each.
+# ParameterKernels does the same for circuit parameters such as the small-signal
+# device parameters (g_m_X1, c_iss_X4, ...).
+# Kernels pickle as SymPy expressions and are re-lambdified after unpickling,
+# so they can be handed to worker processes.
+
+f = sp.Symbol("f")
+s = sp.Symbol("s")
+
+
+def _coefficients(expr):
+    """(numerator, denominator) coefficient expressions in s, highest power first."""
+    num, den = sp.fraction(sp.together(sp.sympify(expr)))
+    return sp.Poly(num, s).all_coeffs(), sp.Poly(den, s).all_coeffs()
+
+
+def _n_samples(samples):
+    sizes = [np.size(value) for value in samples.values()]
+    return max(sizes) if sizes else 1
+
+
+def _sample_args(params, nominal, samples, n_samples, extra_dims=0):
+    """Argument arrays in the order of params; parameters missing from samples take their nominal value."""
+    shape = (n_samples,) + (1,) * extra_dims
+    return [
+        np.broadcast_to(
+            np.reshape(np.asarray(samples.get(name, nominal[name]), dtype=float), (-1,) + (1,) * extra_dims),
+            shape,
+        )
+        for name in params
+    ]
+
+
+class CircuitKernels:
+    """Vectorized noise and transfer kernels of one circuit in the parameters `params`."""
+
+    def __init__(self, params, nominal, inoise, transfers):
+        self.params = list(params)
+        self.nominal = dict(nominal)
+        self._inoise = inoise
+        self._transfers = dict(transfers)  # name -> (num coeffs, den coeffs)
+        self._compile()
+
+    @classmethod
+    def from_circuit(cls, cir, params, transfers=("gain", "loopgain")):
+        nominal = {name: float(cir.getParValue(name)) for name in params}
+        with keep_symbolic(cir, params):
+            inoise = doNoise(cir, source="V1", detector="V_vo", numeric=True, pardefs="circuit").inoise
+            laplace = {
+                name: doLaplace(
+                    cir, numeric=True, source="V1", detector="V_Amp_out", pardefs="circuit", lgref="Gm_M1_X1", transfer=name
+                ).laplace
+                for name in transfers
+            }
+        return cls(params, nominal, inoise, {name: _coefficients(expr) for name, expr in laplace.items()})
+
+    @property
+    def transfers(self):
+        return list(self._transfers)
+
+    def _compile(self):
+        symbols = [sp.Symbol(name) for name in self.params]
+        self._noise_fn = sp.lambdify([f] + symbols, self._inoise, modules="numpy")
+        self._coeff_fns = {
+            name: (
+                [sp.lambdify(symbols, coeff, modules="numpy") for coeff in num],
+                [sp.lambdify(symbols, coeff, modules="numpy") for coeff in den],
+            )
+            for name, (num, den) in self._transfers.items()
+        }
+
+    def __getstate__(self):
+        return {
+            "params": self.params,
+            "nominal": self.nominal,
+            "inoise": self._inoise,
+            "transfers": self._transfers,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["params"], state["nominal"], state["inoise"], state["transfers"])
+
+    def _args(self, samples, n_samples, extra_dims=0):
+        return _sample_args(self.params, self.nominal, samples, n_samples, extra_dims)
+
+    def noise(self, freqs, samples):
+        """Input-referred noise density, shape [n_samples, len(freqs)]."""
+        n_samples = _n_samples(samples)
+        freqs = np.asarray(freqs, dtype=float)[None, :]
+        values = self._noise_fn(freqs, *self._args(samples, n_samples, extra_dims=1))
+        return np.real(np.broadcast_to(values, (n_samples, freqs.shape[1])))
+
+    def coefficients(self, name, samples):
+        """(numerator, denominator) coefficient matrices [n_samples, order + 1]."""
+        n_samples = _n_samples(samples)
+        args = self._args(samples, n_samples)
+        num_fns, den_fns = self._coeff_fns[name]
+        num = np.column_stack([np.broadcast_to(np.real(fn(*args)), (n_samples,)) for fn in num_fns])
+        den = np.column_stack([np.broadcast_to(np.real(fn(*args)), (n_samples,)) for fn in den_fns])
+        return num, den
+
+    def response(self, name, freqs, samples):
+        """Complex transfer at freqs, shape [n_samples, len(freqs)]."""
+        num, den = self.coefficients(name, samples)
+        s_values = 2j * np.pi * np.asarray(freqs, dtype=float)
+        powers_num = s_values[None, :] ** np.arange(num.shape[1] - 1, -1, -1)[:, None]
+        powers_den = s_values[None, :] ** np.arange(den.shape[1] - 1, -1, -1)[:, None]
+        return (num @ powers_num) / (den @ powers_den)
+
+    def poles(self, name, samples):
+        """Poles [Hz] of a transfer for every sample, shape [n_samples, order] (batched eigenvalues)."""
+        _, den = self.coefficients(name, samples)
+        return _roots(den) / (2 * np.pi)
+
+    def zeros(self, name, samples):
+        num, _ = self.coefficients(name, samples)
+        return _roots(num) / (2 * np.pi)
+
+
+class ParameterKernels:
+    """Vectorized circuit parameters (g_m_X1, c_iss_X4, ...) as functions of the parameters `params`."""
+
+    def __init__(self, params, nominal, exprs):
+        self.params = list(params)
+        self.nominal = dict(nominal)
+        self._exprs = dict(exprs)
+        self._compile()
+
+    @classmethod
+    def from_circuit(cls, cir, names, params):
+        nominal = {name: float(cir.getParValue(name)) for name in params}
+        with keep_symbolic(cir, params):
+            exprs = {name: cir.getParValue(name, substitute=True, numeric=True) for name in names}
+        for name, expr in exprs.items():
+            if expr is None:
+                raise RuntimeError(f"Parameter '{name}' is not defined in circuit '{cir.title}'.")
+        return cls(params, nominal, exprs)
+
+    @property
+    def names(self):
+        return list(self._exprs)
+
+    def _compile(self):
+        symbols = [sp.Symbol(name) for name in self.params]
+        self._fns = {name: sp.lambdify(symbols, expr, modules="numpy") for name, expr in self._exprs.items()}
+
+    def __getstate__(self):
+        return {"params": self.params, "nominal": self.nominal, "exprs": self._exprs}
+
+    def __setstate__(self, state):
+        self.__init__(state["params"], state["nominal"], state["exprs"])
+
+    def evaluate(self, samples, names=None):
+        """{name: array [n_samples]} for the requested parameters (default: all)."""
+        n_samples = _n_samples(samples)
+        args = _sample_args(self.params, self.nominal, samples, n_samples)
+        return {
+            name: np.real(np.broadcast_to(self._fns[name](*args), (n_samples,))).astype(float)
+            for name in (names or self._exprs)
+        }
+
+
+def _roots(coeffs):
+    """Roots of every row of a coefficient matrix via batched companion-matrix eigenvalues."""
+    # Drop leading columns that are zero for every sample.
+    nonzero = np.any(coeffs != 0, axis=0)
+    if not nonzero.any():
+        return np.empty((coeffs.shape[0], 0), dtype=complex)
+    coeffs = coeffs[:, int(np.argmax(nonzero)):]
+    order = coeffs.shape[1] - 1
+    if order == 0:
+        return np.empty((coeffs.shape[0], 0), dtype=complex)
+    monic = coeffs[:, 1:] / coeffs[:, :1]
+    companion = np.zeros((coeffs.shape[0], order, order))
+    companion[:, 0, :] = -monic
+    companion[:, np.arange(1, order), np.arange(order - 1)] = 1.0
+    return np.linalg.eigvals(companion)
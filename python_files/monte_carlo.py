@@ -0,0 +1,215 @@
+################################################# Monte Carlo Mismatch Analysis #################################################
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .kernels import CircuitKernels
+from .noise_compliance import band_frequencies
+from .noise_compliance import noise_spec as default_noise_spec
+from .stability import kernel_stability
+
+# Statistical analysis of a sized design. For every MOS parameter group of the
+# netlist (devices sharing W/L/ID parameters, e.g. X1/X5/X6) each sample draws
+#   - W and L edge variations (absolute sigma),
+#   - a local threshold shift with Pelgrom sigma A_VT/sqrt(W*L),
+#   - a global threshold shift shared by all devices of the same type,
+# and maps the threshold shift to a drain-current change at fixed gate bias
+# (dID/ID = -gm/ID * dVT). Noise, gain and poles of all samples are evaluated
+# with the lambdified kernels in chunks of CHUNK_SIZE.
+#
+# Samples are drawn per chunk from SeedSequence(seed).spawn(), so the result
+# only depends on the seed and the sample count, not on the number of workers.
+
+CHUNK_SIZE = 10_000
+POOL_THRESHOLD = 50_000  # sample count from which chunks run on a process pool
+DEFAULT_SEED = 2024
+
+A_VT = {"N": 5e-9, "P": 6e-9}          # Pelgrom coefficient [V*m]
+SIGMA_VT_GLOBAL = {"N": 15e-3, "P": 15e-3}  # lot-to-lot threshold spread [V]
+SIGMA_DW = 5e-9                          # width edge variation [m]
+SIGMA_DL = 5e-9                          # length edge variation [m]
+
+NOISE_POINTS = 200                       # noise grid over the design band per sample
+GAIN_FREQ = 1e6                          # frequency at which |gain| is reported [Hz]
+GAIN_TOLERANCE = 0.1                     # allowed relative deviation from the nominal gain
+STABILITY_POINTS = 200                   # loop-gain grid for the phase margin per sample
+
+_DEVICE_PATTERN = re.compile(
+    r"^(X\w+)\s.*?\s(\w*(?:CMOS18|MN18|MP18)\w*)\s.*?W=\{(\w+)\}.*?L=\{(\w+)\}",
+    re.IGNORECASE,
+)
+_ID_PATTERN = re.compile(r"\bID=\{(\w+)\}", re.IGNORECASE)
+
+_WORKER_STATE = None
+
+
+def device_groups(netlist_text):
+    """
+    MOS parameter groups of a netlist: [{"devices", "type", "W", "L", "ID"}].
+    A drain-current parameter belongs to the first group that uses it (the
+    cascode X7/X8 carries the current set by X1, so ID1_N varies with X1).
+    """
+    groups = {}
+    owned_ids = set()
+    for line in netlist_text.splitlines():
+        match = _DEVICE_PATTERN.match(line.strip())
+        if not match:
+            continue
+        device, model, w_par, l_par = match.groups()
+        id_match = _ID_PATTERN.search(line)
+        id_par = id_match.group(1) if id_match else None
+        key = (w_par, l_par)
+        if key not in groups:
+            device_type = "P" if re.search(r"CMOS18P|MP18", model, re.IGNORECASE) else "N"
+            own_id = id_par if id_par and id_par not in owned_ids else None
+            if own_id:
+                owned_ids.add(own_id)
+            groups[key] = {"devices": [], "type": device_type, "W": w_par, "L": l_par, "ID": own_id}
+        groups[key]["devices"].append(device)
+    return list(groups.values())
+
+
+def _gm_over_id(cir, group):
+    """gm/ID of the first device of a group (weak-inversion bound if unavailable)."""
+    for device in group["devices"]:
+        try:
+            gm = float(cir.getParValue(f"g_m_{device}"))
+            current = abs(float(cir.getParValue(group["ID"])))
+            if gm > 0 and current > 0:
+                return gm / current
+        except Exception:
+            continue
+    return 1.0 / (1.35 * 0.0259)
+
+
+def build_setup(cir, netlist_path=None):
+    """Kernels plus the sampling description of a circuit (picklable)."""
+    netlist_path = Path(netlist_path or Path("cir") / f"{cir.title}.cir")
+    groups = device_groups(netlist_path.read_text(encoding="utf-8"))
+    if not groups:
+        raise RuntimeError(f"No MOS devices with W/L parameters found in '{netlist_path}'.")
+    for group in groups:
+        group["gm_over_id"] = _gm_over_id(cir, group) if group["ID"] else 0.0
+
+    params = []
+    for group in groups:
+        params.extend(name for name in (group["W"], group["L"], group["ID"]) if name and name not in params)
+    kernels = CircuitKernels.from_circuit(cir, params)
+    return {"kernels": kernels, "groups": groups}
+
+
+def draw_samples(setup, rng, n_samples):
+    """Parameter samples {name: array} for one chunk."""
+    nominal = setup["kernels"].nominal
+    global_vt = {kind: rng.normal(0.0, SIGMA_VT_GLOBAL[kind], n_samples) for kind in ("N", "P")}
+    samples = {}
+    for group in setup["groups"]:
+        width = nominal[group["W"]]
+        length = nominal[group["L"]]
+        samples[group["W"]] = width + rng.normal(0.0, SIGMA_DW, n_samples)
+        samples[group["L"]] = length + rng.normal(0.0, SIGMA_DL, n_samples)
+        local_vt = rng.normal(0.0, A_VT[group["type"]] / np.sqrt(width * length), n_samples)
+        if group["ID"]:
+            delta_vt = local_vt + global_vt[group["type"]]
+            factor = np.maximum(1.0 - group["gm_over_id"] * delta_vt, 0.01)
+            samples[group["ID"]] = nominal[group["ID"]] * factor
+    return samples
+
+
+def _evaluate_chunk(setup, seed_seq, n_samples, noise_freqs, noise_spec_values):
+    rng = np.random.default_rng(seed_seq)
+    kernels = setup["kernels"]
+    samples = draw_samples(setup, rng, n_samples)
+
+    noise = kernels.noise(noise_freqs, samples)
+    noise_ratio = np.max(noise / noise_spec_values[None, :], axis=1)
+    gain = np.abs(kernels.response("gain", [GAIN_FREQ], samples)[:, 0])
+    poles = kernels.poles("gain", samples)
+    stable = np.all(poles.real < 0, axis=1) if poles.shape[1] else np.ones(n_samples, dtype=bool)
+    dominant = np.min(np.abs(poles), axis=1) if poles.shape[1] else np.full(n_samples, np.nan)
+    phase_margin = kernel_stability(kernels, samples, n_points=STABILITY_POINTS)["phase_margin_deg"]
+    return {
+        "noise_ratio": noise_ratio,
+        "gain": gain,
+        "stable": stable,
+        "dominant_pole_hz": dominant,
+        "phase_margin_deg": phase_margin,
+    }
+
+
+def _worker_init(setup):
+    global _WORKER_STATE
+    _WORKER_STATE = setup
+
+
+def _worker_chunk(args):
+    return _evaluate_chunk(_WORKER_STATE, *args)
+
+
+def run_monte_carlo(cir, n_samples=10_000, seed=DEFAULT_SEED, noise_freqs=None, noise_spec=None,
+                    netlist_path=None, max_workers=None):
+    """
+    Monte Carlo analysis of the current sizing of cir. noise_spec(freqs) is the
+    allowed input noise density. Returns a dict with per-sample arrays, yields
+    and summary statistics.
+    """
+    noise_freqs = np.asarray(band_frequencies(NOISE_POINTS) if noise_freqs is None else noise_freqs, dtype=float)
+    noise_spec_values = np.asarray((noise_spec or default_noise_spec)(noise_freqs), dtype=float)
+    setup = build_setup(cir, netlist_path)
+
+    n_chunks = -(-int(n_samples) // CHUNK_SIZE)
+    sizes = [min(CHUNK_SIZE, n_samples - index * CHUNK_SIZE) for index in range(n_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    chunk_args = [(seeds[index], sizes[index], noise_freqs, noise_spec_values) for index in range(n_chunks)]
+
+    if n_samples >= POOL_THRESHOLD and n_chunks > 1:
+        if max_workers is None:
+            max_workers = max(1, min((os.cpu_count() or 2) - 1, n_chunks))
+        print(f"Monte Carlo: {n_samples} samples in {n_chunks} chunks on {max_workers} processes...")
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init, initargs=(setup,)) as pool:
+            chunks = list(pool.map(_worker_chunk, chunk_args))
+    else:
+        chunks = [_evaluate_chunk(setup, *args) for args in chunk_args]
+
+    result = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+    nominal_gain = float(np.abs(setup["kernels"].response("gain", [GAIN_FREQ], {})[0, 0]))
+    noise_ok = result["noise_ratio"] < 1.0
+    gain_ok = np.abs(result["gain"] / nominal_gain - 1.0) <= GAIN_TOLERANCE
+    passed = noise_ok & gain_ok & result["stable"]
+
+    summary = {
+        "n_samples": int(n_samples),
+        "seed": seed,
+        "yield": float(np.mean(passed)),
+        "noise_yield": float(np.mean(noise_ok)),
+        "gain_yield": float(np.mean(gain_ok)),
+        "stability_yield": float(np.mean(result["stable"])),
+        "noise_ratio_p50": float(np.percentile(result["noise_ratio"], 50)),
+        "noise_ratio_p99": float(np.percentile(result["noise_ratio"], 99)),
+        "gain_nominal": nominal_gain,
+        "gain_sigma_rel": float(np.std(result["gain"]) / nominal_gain),
+        "dominant_pole_p1_hz": float(np.nanpercentile(result["dominant_pole_hz"], 1)),
+        "phase_margin_p1_deg": (
+            float(np.nanpercentile(result["phase_margin_deg"], 1))
+            if np.isfinite(result["phase_margin_deg"]).any() else None
+        ),
+        "devices": [group["devices"] for group in setup["groups"]],
+    }
+    return {"summary": summary, "samples": result}
+
+
+def print_summary(summary, label=""):
+    prefix = f"[{label}] " if label else ""
+    print(
+        f"{prefix}Monte Carlo ({summary['n_samples']} samples, seed {summary['seed']}): "
+        f"yield={summary['yield']*100:.2f}% "
+        f"(noise {summary['noise_yield']*100:.2f}%, gain {summary['gain_yield']*100:.2f}%, "
+        f"stable {summary['stability_yield']*100:.2f}%), "
+        f"noise/spec p99={summary['noise_ratio_p99']:.3f}, "
+        f"gain sigma={summary['gain_sigma_rel']*100:.2f}%"
+        + (f", phase margin p1={summary['phase_margin_p1_deg']:.1f} deg" if summary.get("phase_margin_p1_deg") is not None else "")
+    )
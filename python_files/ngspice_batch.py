@@ -0,0 +1,197 @@
+################################################# Parallel ngspice Batch Runner #################################################
+
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .async_sim import run_bounded, run_process, run_sync
+from .rawfile import load_raw
+
+# Every job runs ngspice in batch mode inside its own temporary directory with
+# its own copy of the netlist, parameter list and binary rawfile, so jobs never
+# share files and can run in parallel. Nothing here imports SLiCAP.
+#
+# run_batch starts the ngspice processes from one asyncio event loop (async_sim)
+# with NGSPICE_WORKERS of them running at once and parses each rawfile as soon
+# as its process ends; NGSPICE_BATCH_MODE=pool uses a process pool instead.
+# NGSPICE_TIMEOUT_S kills simulations that hang (0 = no timeout).
+#
+# A job is a dict:
+#   name      label of the job (returned with its result)
+#   netlist   netlist text (a trailing .end is optional)
+#   analysis  ngspice analysis command, e.g. "dc V11 0 1.2 0.01" or "op"
+#   vectors   {label: ngspice vector or expression}
+#   params    {name: value} appended as .param lines (later values win)
+#   ngspice   ngspice executable (default: NGSPICE_CMD or "ngspice")
+#   raw_file  optional path to keep the rawfile at (default: discarded)
+
+
+NGSPICE_BATCH_MODE = os.getenv("NGSPICE_BATCH_MODE", "async").lower()
+NGSPICE_TIMEOUT_S = float(os.getenv("NGSPICE_TIMEOUT_S", "0") or 0) or None
+
+
+def _default_command():
+    return os.getenv("NGSPICE_CMD") or "ngspice"
+
+
+def _default_workers():
+    return int(os.getenv("NGSPICE_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+
+
+def make_job(cir_file, analysis, vectors, params=None, name=None, ngspice=None):
+    """Build a job from a netlist file; the netlist is read once here, not per job run."""
+    return {
+        "name": name or Path(cir_file).stem,
+        "netlist": Path(cir_file).read_text(encoding="utf-8"),
+        "analysis": analysis,
+        "vectors": dict(vectors),
+        "params": dict(params or {}),
+        "ngspice": ngspice,
+    }
+
+
+def sweep_jobs(job, param_name, values):
+    """One job per value of a .param (any parameter, e.g. a temperature or a width)."""
+    jobs = []
+    for value in values:
+        params = dict(job["params"])
+        params[param_name] = value
+        jobs.append(dict(job, name=f"{job['name']}[{param_name}={value}]", params=params))
+    return jobs
+
+
+def corner_jobs(job, corners):
+    """One job per corner; corners is {corner_name: {param: value}}."""
+    jobs = []
+    for corner_name, overrides in corners.items():
+        params = dict(job["params"])
+        params.update(overrides)
+        jobs.append(dict(job, name=corner_name, params=params))
+    return jobs
+
+
+def _deck(job, out_name):
+    lines = [line for line in job["netlist"].splitlines() if line.strip().upper() != ".END"]
+    for name, value in job["params"].items():
+        if value is None or value == "":
+            continue
+        lines.append(f".param {name}={value}")
+    lines.append(".control")
+    lines.append("set filetype=binary")
+    device_vectors = [vec for vec in job["vectors"].values() if vec.startswith("@")]
+    if device_vectors:
+        lines.append("save all " + " ".join(device_vectors))
+    lines.append(job["analysis"])
+    for label, vec in job["vectors"].items():
+        lines.append(f"let {label} = {vec}")
+    lines.append(f"write {out_name} " + " ".join(job["vectors"]))
+    lines.append(".endc")
+    lines.append(".end")
+    return "\n".join(lines) + "\n"
+
+
+_DECK = "job.sp"
+_LOG = "job.log"
+_RAW = "job.raw"
+
+
+def _prepare(job, work_dir):
+    """Write the deck into work_dir; return the ngspice command line."""
+    (work_dir / _DECK).write_text(_deck(job, _RAW), encoding="utf-8")
+    return [job.get("ngspice") or _default_command(), "-b", _DECK, "-o", _LOG]
+
+
+def _collect(job, work_dir, timed_out_s=None):
+    """Parse the rawfile of a finished job; return {"name", "scale", "vectors", "raw_file"}."""
+    raw_path = work_dir / _RAW
+    log_path = work_dir / _LOG
+    log_tail = ""
+    if log_path.exists():
+        log_tail = " | ".join(log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-5:])
+    if timed_out_s is not None:
+        raise RuntimeError(f"ngspice timed out after {timed_out_s} s on job '{job['name']}' ({job['analysis']}).")
+    if not raw_path.exists():
+        raise RuntimeError(f"ngspice produced no output for job '{job['name']}' ({job['analysis']}): {log_tail}")
+    if job.get("raw_file"):
+        kept = Path(job["raw_file"])
+        kept.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(raw_path), str(kept))
+        raw_path = kept
+
+    plot = load_raw(raw_path)
+    if plot.n_points == 0:
+        raise RuntimeError(f"ngspice output of job '{job['name']}' contains no data: {log_tail}")
+    # One contiguous copy per vector; the temporary directory (and the
+    # memory map into it) goes away after this call.
+    scale = np.array(plot.scale())
+    vectors = {label: np.array(plot.vector(label)) for label in job["vectors"]}
+    del plot
+    return {
+        "name": job["name"],
+        "scale": scale,
+        "vectors": vectors,
+        "raw_file": str(raw_path) if job.get("raw_file") else None,
+    }
+
+
+def run_job(job, timeout=None):
+    """Run one job in a private temporary directory; return {"name", "scale", "vectors", "raw_file"}."""
+    timeout = timeout or NGSPICE_TIMEOUT_S
+    with tempfile.TemporaryDirectory(prefix="ngspice_job_") as work_dir:
+        work_dir = Path(work_dir)
+        try:
+            subprocess.run(
+                _prepare(job, work_dir),
+                cwd=str(work_dir),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+                check=False,
+            )
+        except subprocess.TimeoutExpired:
+            return _collect(job, work_dir, timed_out_s=timeout)
+        return _collect(job, work_dir)
+
+
+async def run_job_async(job, timeout=None):
+    """
+    run_job as a coroutine: ngspice runs as an asyncio subprocess. Failures to
+    start or finish it (missing executable, timeout) raise RuntimeError.
+    """
+    timeout = timeout or NGSPICE_TIMEOUT_S
+    with tempfile.TemporaryDirectory(prefix="ngspice_job_") as work_dir:
+        work_dir = Path(work_dir)
+        try:
+            process = await run_process(_prepare(job, work_dir), cwd=work_dir, timeout=timeout)
+        except asyncio.TimeoutError:
+            return _collect(job, work_dir, timed_out_s=timeout)
+        except OSError as exc:
+            raise RuntimeError(f"Could not run ngspice for job '{job['name']}' ({job['analysis']}): {exc}") from exc
+        return _collect(job, work_dir, timed_out_s=timeout if process["timed_out"] else None)
+
+
+def run_batch(jobs, max_workers=None, timeout=None, on_result=None):
+    """
+    Run jobs with at most max_workers simulations at once; results are returned
+    in job order. on_result(result) is called for every job as soon as it ends
+    (async mode only).
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    max_workers = max(1, min(max_workers or _default_workers(), len(jobs)))
+    if NGSPICE_BATCH_MODE == "pool":
+        if max_workers == 1:
+            return [run_job(job, timeout) for job in jobs]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(run_job, jobs, [timeout] * len(jobs)))
+
+    factories = [lambda job=job: run_job_async(job, timeout) for job in jobs]
+    on_done = (lambda _, result: on_result(result)) if on_result is not None else None
+    return run_sync(run_bounded(factories, max_workers, on_done))
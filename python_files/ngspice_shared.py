@@ -0,0 +1,185 @@
+################################################# Shared-Library ngspice Session #################################################
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+
+import numpy as np
+
+# Drives ngspice as a shared library (libngspice) through ctypes. One session
+# per process keeps the circuit loaded; parameter changes go through
+# alter/alterparam and vectors are read straight from ngspice memory into
+# NumPy arrays. open_session() returns None when libngspice is not available,
+# so callers can fall back to running the ngspice executable.
+
+_LIBRARY_NAMES = ("ngspice", "libngspice", "libngspice-0")
+_LIBRARY_FILES = ("libngspice.so", "libngspice.so.0", "libngspice.dylib", "ngspice.dll", "libngspice-0.dll")
+_SCALE_NAMES = ("v-sweep", "i-sweep", "temp-sweep", "res-sweep", "frequency", "time")
+
+
+class _Complex(ctypes.Structure):
+    _fields_ = [("cx_real", ctypes.c_double), ("cx_imag", ctypes.c_double)]
+
+
+class _VectorInfo(ctypes.Structure):
+    _fields_ = [
+        ("v_name", ctypes.c_char_p),
+        ("v_type", ctypes.c_int),
+        ("v_flags", ctypes.c_short),
+        ("v_realdata", ctypes.POINTER(ctypes.c_double)),
+        ("v_compdata", ctypes.POINTER(_Complex)),
+        ("v_length", ctypes.c_int),
+    ]
+
+
+_SendChar = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_SendStat = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_ControlledExit = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_int, ctypes.c_bool, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p
+)
+_BGThreadRunning = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+
+_SESSION = None
+_LOAD_FAILED = False  # set after the first failed load; later calls skip the library search
+
+
+def _load_library(path=None):
+    candidates = []
+    if path:
+        candidates.append(path)
+    env_path = os.getenv("NGSPICE_LIBRARY")
+    if env_path:
+        candidates.append(env_path)
+    for name in _LIBRARY_NAMES:
+        found = ctypes.util.find_library(name)
+        if found:
+            candidates.append(found)
+    candidates.extend(_LIBRARY_FILES)
+
+    for candidate in candidates:
+        try:
+            return ctypes.CDLL(candidate)
+        except OSError:
+            continue
+    raise OSError("libngspice not found (set NGSPICE_LIBRARY to its path)")
+
+
+class NgspiceSession:
+    """One persistent libngspice instance with the circuit kept in memory."""
+
+    def __init__(self, library=None):
+        self._lib = _load_library(library)
+        self._lib.ngSpice_Init.restype = ctypes.c_int
+        self._lib.ngSpice_Command.argtypes = [ctypes.c_char_p]
+        self._lib.ngSpice_Command.restype = ctypes.c_int
+        self._lib.ngSpice_Circ.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+        self._lib.ngSpice_Circ.restype = ctypes.c_int
+        self._lib.ngGet_Vec_Info.argtypes = [ctypes.c_char_p]
+        self._lib.ngGet_Vec_Info.restype = ctypes.POINTER(_VectorInfo)
+
+        self.output = []
+        self._circuit_digest = None
+        self._params = {}
+        # Keep references to the callbacks for as long as the library is loaded.
+        self._callbacks = (
+            _SendChar(self._on_output),
+            _SendStat(lambda _msg, _id, _user: 0),
+            _ControlledExit(lambda _status, _unload, _quit, _id, _user: 0),
+            _BGThreadRunning(lambda _running, _id, _user: 0),
+        )
+        send_char, send_stat, controlled_exit, bg_running = self._callbacks
+        status = self._lib.ngSpice_Init(send_char, send_stat, controlled_exit, None, None, bg_running, None)
+        if status != 0:
+            raise RuntimeError(f"ngSpice_Init failed with status {status}.")
+
+    def _on_output(self, message, _id, _user):
+        text = message.decode("utf-8", errors="replace") if message else ""
+        self.output.append(text)
+        return 0
+
+    def command(self, cmd):
+        """Run one ngspice command synchronously; raise on stderr output mentioning an error."""
+        start = len(self.output)
+        status = self._lib.ngSpice_Command(cmd.encode("utf-8"))
+        errors = [line for line in self.output[start:] if line.startswith("stderr") and "error" in line.lower()]
+        if status != 0 or errors:
+            raise RuntimeError(f"ngspice command '{cmd}' failed: " + " | ".join(errors or [f"status {status}"]))
+
+    def load_netlist(self, netlist_text):
+        """Load a netlist unless the same text is already loaded. Returns True when (re)loaded."""
+        digest = hashlib.sha256(netlist_text.encode("utf-8")).hexdigest()
+        if digest == self._circuit_digest:
+            return False
+        lines = [line for line in netlist_text.splitlines() if line.strip()]
+        if not lines or lines[-1].strip().upper() != ".END":
+            lines.append(".end")
+        if self._circuit_digest is not None:
+            self.command("remcirc")
+        array = (ctypes.c_char_p * (len(lines) + 1))()
+        array[:-1] = [line.encode("utf-8") for line in lines]
+        array[-1] = None
+        if self._lib.ngSpice_Circ(array) != 0:
+            raise RuntimeError("ngspice could not load the netlist.")
+        self._circuit_digest = digest
+        self._params = {}
+        return True
+
+    def alterparam(self, params):
+        """Change .param values of the loaded circuit ({name: value}); unchanged values are skipped."""
+        changed = {name: value for name, value in params.items() if self._params.get(name) != value}
+        for name, value in changed.items():
+            self.command(f"alterparam {name}={value}")
+        if changed:
+            self.command("reset")
+            self._params.update(changed)
+        return bool(changed)
+
+    def alter(self, device, value, parameter="dc"):
+        self.command(f"alter {device} {parameter}={value}")
+
+    def run(self, analysis, lets=None):
+        """Run an analysis and define `let` vectors ({label: expression}) in its plot."""
+        self.command(analysis)
+        for label, expr in (lets or {}).items():
+            self.command(f"let {label} = {expr}")
+
+    def vector(self, name):
+        """Return a copy of vector `name` of the current plot as a NumPy array."""
+        info_ptr = self._lib.ngGet_Vec_Info(name.encode("utf-8"))
+        if not info_ptr:
+            raise KeyError(f"ngspice vector '{name}' not found.")
+        info = info_ptr.contents
+        length = int(info.v_length)
+        if info.v_realdata:
+            return np.ctypeslib.as_array(info.v_realdata, shape=(length,)).copy()
+        if info.v_compdata:
+            raw = np.ctypeslib.as_array(
+                ctypes.cast(info.v_compdata, ctypes.POINTER(ctypes.c_double)), shape=(2 * length,)
+            )
+            return raw.view(np.complex128).copy()
+        return np.empty(0)
+
+    def scale(self):
+        """Return the sweep variable of the current plot (e.g. v-sweep of a DC analysis)."""
+        for name in _SCALE_NAMES:
+            try:
+                return self.vector(name)
+            except KeyError:
+                continue
+        raise KeyError("No sweep scale vector in the current ngspice plot.")
+
+
+def open_session(library=None):
+    """Return the process-wide session, or None when libngspice cannot be loaded."""
+    global _SESSION, _LOAD_FAILED
+    if _SESSION is None:
+        if _LOAD_FAILED:
+            return None
+        try:
+            _SESSION = NgspiceSession(library)
+        except (OSError, RuntimeError, AttributeError) as exc:
+            _LOAD_FAILED = True
+            print(f"libngspice unavailable ({exc}); using the ngspice executable.")
+            return None
+    return _SESSION
@@ -0,0 +1,95 @@
+################################################# Noise Compliance #################################################
+
+import numpy as np
+import sympy as sp
+
+from .specifications import f_max, f_min
+
+# The input-referred noise density is lambdified once and compared with the
+# spec on a dense log-spaced grid over the design band (f_min..f_max). The
+# worst grid point is refined on successively finer local grids, and the noise
+# is integrated over the band.
+
+COMPLIANCE_POINTS = 2000
+REFINE_POINTS = 64
+REFINE_ROUNDS = 3
+
+f = sp.Symbol("f")
+
+
+def noise_spec(freqs):
+    """Allowed input-referred noise density at freqs."""
+    return 1e-15 * (1 + 1e12 / np.asarray(freqs, dtype=float)**2)
+
+
+def band_frequencies(n_points=COMPLIANCE_POINTS, f_lo=f_min, f_hi=f_max):
+    return np.geomspace(f_lo, f_hi, int(n_points))
+
+
+def noise_function(inoise):
+    """Vectorized f -> density function of a SLiCAP inoise expression."""
+    expr = sp.sympify(inoise)
+    if f not in expr.free_symbols:
+        value = float(sp.N(expr))
+        return lambda freqs: np.full(np.shape(freqs), value)
+    func = sp.lambdify(f, expr, modules="numpy")
+    return lambda freqs: np.real(func(np.asarray(freqs, dtype=float)))
+
+
+def _integrate(values, freqs):
+    """Trapezoidal integral over the last axis."""
+    return np.sum(0.5 * (values[..., 1:] + values[..., :-1]) * np.diff(freqs), axis=-1)
+
+
+def _ratio(density_fn, spec_fn, margin, freqs):
+    density = np.atleast_2d(density_fn(freqs))
+    return np.max(density, axis=0) / (margin * spec_fn(freqs))
+
+
+def check_noise(density_fn, spec_fn=noise_spec, margin=1.0, f_lo=f_min, f_hi=f_max, n_points=COMPLIANCE_POINTS):
+    """
+    Noise compliance over [f_lo, f_hi]. density_fn(freqs) returns the noise
+    density with shape (len(freqs),) or (rows, len(freqs)), e.g. one row per
+    temperature corner; the worst row counts. Returns a dict with the worst
+    ratio density / (margin * spec), its frequency, and the band-integrated
+    noise and spec.
+    """
+    freqs = band_frequencies(n_points, f_lo, f_hi)
+    density = np.atleast_2d(density_fn(freqs))
+    spec = spec_fn(freqs)
+    ratio = np.max(density, axis=0) / (margin * spec)
+
+    worst = int(np.argmax(ratio))
+    worst_ratio = float(ratio[worst])
+    worst_freq = float(freqs[worst])
+    lo = freqs[max(worst - 1, 0)]
+    hi = freqs[min(worst + 1, freqs.size - 1)]
+    for _ in range(REFINE_ROUNDS):
+        local = np.geomspace(lo, hi, REFINE_POINTS)
+        local_ratio = _ratio(density_fn, spec_fn, margin, local)
+        index = int(np.argmax(local_ratio))
+        if local_ratio[index] > worst_ratio:
+            worst_ratio = float(local_ratio[index])
+            worst_freq = float(local[index])
+        lo = local[max(index - 1, 0)]
+        hi = local[min(index + 1, local.size - 1)]
+
+    integrated = _integrate(density, freqs)
+    integrated_spec = float(_integrate(spec, freqs))
+    return {
+        "compliant": worst_ratio < 1.0,
+        "worst_ratio": worst_ratio,
+        "worst_freq_hz": worst_freq,
+        "margin": margin,
+        "f_lo_hz": float(f_lo),
+        "f_hi_hz": float(f_hi),
+        "integrated_noise": float(np.max(integrated)),
+        "integrated_spec": integrated_spec,
+        "rms_noise": float(np.sqrt(np.max(integrated))),
+        "rms_spec": float(np.sqrt(integrated_spec)),
+    }
+
+
+def check_inoise(inoise, spec_fn=noise_spec, margin=1.0, **kwargs):
+    """check_noise for a SLiCAP inoise expression in f."""
+    return check_noise(noise_function(inoise), spec_fn=spec_fn, margin=margin, **kwargs)
@@ -6,6 +6,8 @@ from SLiCAP import *
 import numpy as np
 import sympy as sp
 from .circuit import cir
+from .kernels import CircuitKernels
+from .stability import response
 
 ############################################################################
 ##### First Stage Joint Noise + Bandwidth Optimization (Improved) #####
@@ -25,6 +27,8 @@ W_max      = 200e-6      # upper width limit
 step       = 190e-6
 objective  = "max_gm"    # "max_gm", "min_power", "max_gm_over_I"
 
+LG_LF = 1e3 / (2 * np.pi)   # low-frequency reference of the loop gain (s = 1e3)
+
 f = sp.Symbol('f')
 s = sp.Symbol('s')
 
@@ -73,6 +77,18 @@ W_min = W
 
 solutions = []
 
+# Loop-gain rational with W1_N and ID1_N kept symbolic, derived once; the
+# bandwidth loops below only evaluate its coefficients.
+lg_kernels = CircuitKernels.from_circuit(cir, ["W1_N", "ID1_N"], transfers=("loopgain",))
+
+
+def _loopgain_bandwidth_ratio(W, ID):
+    """|LG(BW_desired)| / (|LG(DC)| / sqrt(2)); >= 1 when the bandwidth is met."""
+    num, den = lg_kernels.coefficients("loopgain", {"W1_N": W, "ID1_N": ID})
+    LG = np.abs(response(num, den, [LG_LF, BW_desired])[0])
+    return LG[1] / (LG[0] / np.sqrt(2))
+
+
 W_candidates = np.arange(W_min, W_max + step, step)
 
 for W in W_candidates:
@@ -90,22 +106,14 @@ for W in W_candidates:
 
     for j in range(max_iter_bw):
 
-        LG = doLaplace(cir, numeric=True,
-                       source='V1', detector='V_Amp_out',
-                       pardefs='circuit',
-                       lgref='Gm_M1_X1',
-                       transfer='loopgain').laplace
-
-        LG_DC = abs(sp.N(LG.subs(s, 1e3)))
-        LG_3dB_target = LG_DC / sp.sqrt(2)
-        LG_eval = abs(sp.N(LG.subs(s, 2*sp.pi*BW_desired*1j)))
+        ratio = _loopgain_bandwidth_ratio(W, ID)
 
-        if LG_eval >= LG_3dB_target:
+        if ratio >= 1:
             break
 
-        scale = LG_3dB_target / LG_eval
-        ID *= scale
-        cir.defPar("ID1_N", ID)
+        ID /= ratio
+
+    cir.defPar("ID1_N", ID)
 
     ########################################################################
     # STEP 2B — Reduce IC for efficiency
@@ -117,25 +125,16 @@ for W in W_candidates:
 
         IC_test = IC * 0.9
         ID_test = IC_test * W
-        cir.defPar("ID1_N", ID_test)
 
         # Check bandwidth again
-        LG = doLaplace(cir, numeric=True,
-                       source='V1', detector='V_Amp_out',
-                       pardefs='circuit',
-                       lgref='Gm_M1_X1',
-                       transfer='loopgain').laplace
-
-        LG_DC = abs(sp.N(LG.subs(s, 1e3)))
-        LG_3dB_target = LG_DC / sp.sqrt(2)
-        LG_eval = abs(sp.N(LG.subs(s, 2*sp.pi*BW_desired*1j)))
-
-        if LG_eval >= LG_3dB_target:
+        if _loopgain_bandwidth_ratio(W, ID_test) >= 1:
             IC = IC_test
             ID = ID_test
         else:
             break
 
+    cir.defPar("ID1_N", ID)
+
     ########################################################################
     # Store solution
     ########################################################################
@@ -0,0 +1,138 @@
+################################################# Phantom-Zero Compensation #################################################
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .kernels import CircuitKernels
+from .stability import closed_loop_poles, stability_metrics
+
+# Tuning of the phantom-zero resistor R_ph of the *_PhZ designs. The loop gain
+# and gain are derived once with R_ph kept symbolic; all candidate values are
+# evaluated from the lambdified coefficients in one batch:
+#   - "phase_margin": phase margin of the loop gain >= PHZ_PHASE_MARGIN,
+#   - "poles": smallest damping ratio of the closed-loop poles >= PHZ_DAMPING.
+# Among the candidates that meet the target the one with the largest -3 dB
+# bandwidth of the gain wins; if none meets it, the one closest to the target.
+# The grid is refined around the winner on successively finer local grids.
+
+PHZ_PARAM = "R_ph"
+PHZ_MODE = os.getenv("PHZ_MODE", "phase_margin")
+PHZ_PHASE_MARGIN = float(os.getenv("PHZ_PHASE_MARGIN", "60"))  # [deg]
+PHZ_DAMPING = 1 / np.sqrt(2)
+PHZ_R_MIN = 1.0
+PHZ_R_MAX = 1e5
+PHZ_CANDIDATES = 400
+PHZ_REFINE_POINTS = 64
+PHZ_REFINE_ROUNDS = 2
+
+CACHE_DIR = Path("cache")
+
+
+def is_phantom_zero_design(cfg):
+    return "_PhZ" in str(cfg.get("project", ""))
+
+
+def phantom_zero_cache_path(design_key):
+    safe_key = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in design_key)
+    return CACHE_DIR / f"phantom_zero_{safe_key}.json"
+
+
+def _min_damping(num, den):
+    """Smallest damping ratio of the closed-loop poles per row."""
+    poles = closed_loop_poles(num, den)
+    if not poles.shape[1]:
+        return np.ones(poles.shape[0])
+    magnitude = np.abs(poles)
+    damping = -poles.real / np.where(magnitude > 0, magnitude, 1.0)
+    return np.min(np.where(magnitude > 0, damping, 1.0), axis=1)
+
+
+def evaluate_candidates(kernels, values):
+    """Stability metrics plus closed-loop damping for R_ph candidate values."""
+    samples = {PHZ_PARAM: np.asarray(values, dtype=float)}
+    num, den = kernels.coefficients("loopgain", samples)
+    metrics = stability_metrics(num, den, gain=kernels.coefficients("gain", samples))
+    metrics["min_damping"] = _min_damping(num, den)
+    return metrics
+
+
+def _select(metrics, mode, target):
+    """Index of the best candidate and whether it meets the target."""
+    score = metrics["phase_margin_deg"] if mode == "phase_margin" else metrics["min_damping"]
+    score = np.where(metrics["closed_loop_stable"], np.nan_to_num(score, nan=-np.inf), -np.inf)
+    feasible = score >= target
+    if feasible.any():
+        bandwidth = np.nan_to_num(metrics["bandwidth_hz"], nan=np.inf)
+        return int(np.argmax(np.where(feasible, bandwidth, -np.inf))), True
+    return int(np.argmax(score)), False
+
+
+def optimize_phantom_zero(cir, mode=None, target=None, r_min=PHZ_R_MIN, r_max=PHZ_R_MAX):
+    """
+    Tune R_ph of cir for a phase-margin or pole-placement target, apply it to
+    cir and return a dict with the chosen value and its metrics.
+    """
+    mode = mode or PHZ_MODE
+    if mode not in ("phase_margin", "poles"):
+        raise RuntimeError(f"Unknown phantom-zero mode '{mode}' (use 'phase_margin' or 'poles').")
+    if target is None:
+        target = PHZ_PHASE_MARGIN if mode == "phase_margin" else PHZ_DAMPING
+
+    kernels = CircuitKernels.from_circuit(cir, [PHZ_PARAM])
+    values = np.geomspace(r_min, r_max, PHZ_CANDIDATES)
+    metrics = evaluate_candidates(kernels, values)
+    best, met = _select(metrics, mode, target)
+    evaluations = values.size
+
+    for _ in range(PHZ_REFINE_ROUNDS):
+        lo = values[max(best - 1, 0)]
+        hi = values[min(best + 1, values.size - 1)]
+        values = np.geomspace(lo, hi, PHZ_REFINE_POINTS)
+        metrics = evaluate_candidates(kernels, values)
+        best, met = _select(metrics, mode, target)
+        evaluations += values.size
+
+    r_ph = float(values[best])
+    cir.defPar(PHZ_PARAM, r_ph)
+
+    def _number(key):
+        value = float(metrics[key][best])
+        return value if np.isfinite(value) else None
+
+    return {
+        "param": PHZ_PARAM,
+        "R_ph": r_ph,
+        "R_ph_nominal": float(kernels.nominal[PHZ_PARAM]),
+        "mode": mode,
+        "target": float(target),
+        "met": met,
+        "phase_margin_deg": _number("phase_margin_deg"),
+        "crossover_hz": _number("crossover_hz"),
+        "gain_margin_db": _number("gain_margin_db"),
+        "bandwidth_hz": _number("bandwidth_hz"),
+        "min_damping": _number("min_damping"),
+        "evaluations": evaluations,
+    }
+
+
+def save_phantom_zero_result(path, design_key, result):
+    payload = {"meta": {"design_key": design_key}, "result": result}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fobj:
+        json.dump(payload, fobj, indent=2)
+
+
+def print_result(result, label=""):
+    prefix = f"[{label}] " if label else ""
+    status = "met" if result["met"] else "NOT met"
+    pm = result["phase_margin_deg"]
+    bw = result["bandwidth_hz"]
+    print(
+        f"{prefix}Phantom zero: {result['param']}={result['R_ph']:.2f} Ohm "
+        f"(was {result['R_ph_nominal']:.2f}), {result['mode']} target {result['target']:.3g} {status}; "
+        f"PM={'-' if pm is None else f'{pm:.1f}'} deg, damping={result['min_damping']:.3f}, "
+        f"BW={'-' if bw is None else f'{bw:.3e}'} Hz"
+    )
@@ -3,6 +3,8 @@
 from SLiCAP import *
 from sympy import cancel, Number, expand
 
+from .stability import loopgain_stability
+
 
 def _name(base, suffix):
     return f"{base}_{suffix}" if suffix else base
@@ -105,6 +107,8 @@ def generate_performance_plots(cir, suffix="", iq=None, i_peak=None):
     pole_zero_s = doPZ(cir, numeric=True, source='V1', detector='V_Amp_out', pardefs='circuit', lgref='Gm_M1_X1', transfer='servo')
     pole_zero_g = doPZ(cir, numeric=True, source='V1', detector='V_Amp_out', pardefs='circuit', lgref='Gm_M1_X1', transfer='gain')
 
+    stability = loopgain_stability(loopgain.laplace, gain.laplace)
+
     stepped_pz_gain_image = None
     stepped_pz_loopgain_image = None
     id_p_original = None
@@ -171,6 +175,7 @@ def generate_performance_plots(cir, suffix="", iq=None, i_peak=None):
         "pole_zero_s": pole_zero_s,
         "pole_zero_g": pole_zero_g,
         "noise_expr": noise_expr,
+        "stability": stability,
         "fb_mag_image": f"{fb_mag_image}.svg",
         "ph_mag_image": f"{ph_mag_image}.svg",
         "inoise_image": f"{inoise_image}.svg",
@@ -0,0 +1,161 @@
+################################################# SPICE Binary Rawfile Reader #################################################
+
+from pathlib import Path
+
+import numpy as np
+
+# Reads binary rawfiles written by ngspice ("set filetype=binary" + write) and
+# LTspice. The data block is memory-mapped with a structured dtype (one record
+# per point), so every vector is a strided zero-copy view into the file.
+# A rawfile may hold several plots one after another.
+
+_BINARY_MARKER = "Binary:\n"
+
+
+class RawPlot:
+    """One plot of a rawfile: header fields plus memory-mapped vectors."""
+
+    def __init__(self, header, variables, data, columns):
+        self.header = header
+        self.variables = variables  # [(name, type)] in file order
+        self._data = data
+        self._columns = columns  # lowercase name -> data field or standalone array
+
+    @property
+    def title(self):
+        return self.header.get("title", "")
+
+    @property
+    def plotname(self):
+        return self.header.get("plotname", "")
+
+    @property
+    def n_points(self):
+        return int(self.header.get("no. points", 0))
+
+    @property
+    def names(self):
+        return [name for name, _ in self.variables]
+
+    def vector(self, name):
+        """Zero-copy view of a vector (case-insensitive name)."""
+        try:
+            column = self._columns[name.lower()]
+        except KeyError:
+            raise KeyError(f"Vector '{name}' not in plot '{self.plotname}'. Available: {self.names}") from None
+        if isinstance(column, str):
+            return self._data[column]
+        return column
+
+    def scale(self):
+        """The first vector of the plot (time, frequency or sweep variable)."""
+        return self.vector(self.variables[0][0])
+
+    def vectors(self):
+        return {name: self.vector(name) for name in self.names}
+
+    def __contains__(self, name):
+        return name.lower() in self._columns
+
+    def __getitem__(self, name):
+        return self.vector(name)
+
+
+def _header_encoding(raw_bytes):
+    # LTspice writes UTF-16-LE headers, ngspice plain ASCII.
+    return "utf-16-le" if len(raw_bytes) > 1 and raw_bytes[1] == 0 else "latin-1"
+
+
+def _parse_header(text):
+    header = {}
+    variables = []
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        key, _, value = line.partition(":")
+        key = key.strip().lower()
+        if key == "variables":
+            n_vars = int(header["no. variables"])
+            for var_line in lines[index + 1 : index + 1 + n_vars]:
+                fields = var_line.split()
+                variables.append((fields[1], fields[2] if len(fields) > 2 else ""))
+            index += 1 + n_vars
+            continue
+        if key:
+            header[key] = value.strip()
+        index += 1
+    return header, variables
+
+
+def _point_types(header, variables):
+    flags = header.get("flags", "").lower().split()
+    if "complex" in flags:
+        return [np.dtype("<c16")] * len(variables)
+    if "double" in flags or "ltspice" not in header.get("command", "").lower():
+        return [np.dtype("<f8")] * len(variables)
+    # LTspice single precision: the scale stays double, everything else is float32.
+    return [np.dtype("<f8")] + [np.dtype("<f4")] * (len(variables) - 1)
+
+
+def _unique_fields(variables):
+    fields = []
+    seen = set()
+    for index, (name, _) in enumerate(variables):
+        field = name if name.lower() not in seen else f"{name}#{index}"
+        seen.add(field.lower())
+        fields.append(field)
+    return fields
+
+
+def read_rawfile(path):
+    """Return every plot of a binary rawfile as a list of RawPlot objects."""
+    path = Path(path)
+    size = path.stat().st_size
+    plots = []
+    offset = 0
+    with path.open("rb") as fobj:
+        while offset < size:
+            fobj.seek(offset)
+            probe = fobj.read(2)
+            encoding = _header_encoding(probe)
+            marker = _BINARY_MARKER.encode(encoding)
+            fobj.seek(offset)
+            chunk = b""
+            while marker not in chunk:
+                block = fobj.read(1 << 16)
+                if not block:
+                    if b"Values:" in chunk or "Values:".encode(encoding) in chunk:
+                        raise RuntimeError(f"'{path}' is an ASCII rawfile; write it with 'set filetype=binary'.")
+                    raise RuntimeError(f"No binary data block in '{path}' at offset {offset}.")
+                chunk += block
+            header_len = chunk.index(marker) + len(marker)
+            header, variables = _parse_header(chunk[:header_len].decode(encoding))
+            data_offset = offset + header_len
+
+            n_points = int(header["no. points"])
+            types = _point_types(header, variables)
+            fields = _unique_fields(variables)
+            if "fastaccess" in header.get("flags", "").lower():
+                # Vector-major layout: each vector is stored contiguously.
+                columns = {}
+                position = data_offset
+                for (name, _), field, dtype in zip(variables, fields, types):
+                    columns[field.lower()] = np.memmap(path, dtype=dtype, mode="r", offset=position, shape=(n_points,))
+                    position += dtype.itemsize * n_points
+                plots.append(RawPlot(header, variables, None, columns))
+                offset = position
+            else:
+                record = np.dtype({"names": fields, "formats": types})
+                data = np.memmap(path, dtype=record, mode="r", offset=data_offset, shape=(n_points,))
+                plots.append(RawPlot(header, variables, data, {field.lower(): field for field in fields}))
+                offset = data_offset + record.itemsize * n_points
+    return plots
+
+
+def load_raw(path, plot=0):
+    """Return one plot (default: the first) of a binary rawfile."""
+    plots = read_rawfile(path)
+    if not plots:
+        raise RuntimeError(f"Rawfile '{path}' holds no plots.")
+    return plots[plot]
@@ -0,0 +1,137 @@
+################################################# Incremental HTML Report Builder #################################################
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# The manifest records, per generated page, the fingerprint of the inputs that
+# produced it and the hashes of the images it references. A page is only
+# regenerated when its inputs (or one of its outputs on disk) changed.
+
+_LINK_PATTERN = re.compile(r'<li><a href="([^"]+)">[^<]*</a></li>')
+_INSERT_MARKER = "<!-- INSERT -->"
+
+
+def _json_default(value):
+    try:
+        return float(value)
+    except Exception:
+        return repr(value)
+
+
+def file_digest(path):
+    """Return the sha256 digest of a file, or None when it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with path.open("rb") as fobj:
+        for chunk in iter(lambda: fobj.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inputs_fingerprint(inputs):
+    """Stable sha256 fingerprint of a JSON-like structure of page inputs."""
+    payload = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_text_atomic(path, text):
+    """Write text through a temporary file in the same directory + os.replace."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fobj:
+            fobj.write(text)
+        os.replace(tmp_name, path)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def load_manifest(path):
+    path = Path(path)
+    if not path.exists():
+        return {"pages": {}, "index_links": {}}
+    try:
+        with path.open("r", encoding="utf-8") as fobj:
+            manifest = json.load(fobj)
+    except (OSError, ValueError):
+        # A corrupt manifest only costs a full rebuild.
+        return {"pages": {}, "index_links": {}}
+    manifest.setdefault("pages", {})
+    manifest.setdefault("index_links", {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    write_text_atomic(path, json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def page_is_current(manifest, page_file, fingerprint, html_dir):
+    """True when page_file exists, was built from fingerprint and its images are untouched."""
+    entry = manifest["pages"].get(page_file)
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return False
+    html_dir = Path(html_dir)
+    if not (html_dir / page_file).exists():
+        return False
+    for rel_path, digest in entry.get("outputs", {}).items():
+        if file_digest(html_dir / rel_path) != digest:
+            return False
+    return True
+
+
+def record_page(manifest, page_file, fingerprint, html_dir, outputs=(), group=None, meta=None):
+    """Store the fingerprint of page_file and the digests of the images it references."""
+    html_dir = Path(html_dir)
+    manifest["pages"][page_file] = {
+        "fingerprint": fingerprint,
+        "group": group,
+        "meta": meta or {},
+        "outputs": {rel_path: file_digest(html_dir / rel_path) for rel_path in outputs},
+    }
+
+
+def pages_in_group(manifest, group):
+    return sorted(name for name, entry in manifest["pages"].items() if entry.get("group") == group)
+
+
+def _index_links(text):
+    return [match.group(0) for match in _LINK_PATTERN.finditer(text)]
+
+
+def sync_index_links(manifest, index_paths, html_dir):
+    """
+    Merge the table-of-contents links of each index page with the links recorded
+    in the previous run, drop duplicates and links to missing pages, and write the
+    result atomically. Pages skipped in this run keep their index entry this way.
+    """
+    html_dir = Path(html_dir)
+    for index_path in index_paths:
+        index_path = Path(index_path)
+        if not index_path.exists():
+            continue
+        text = index_path.read_text(encoding="utf-8")
+        if _INSERT_MARKER not in text:
+            continue
+
+        previous = manifest["index_links"].get(index_path.name, [])
+        links = []
+        for token in previous + _index_links(text):
+            href = _LINK_PATTERN.match(token).group(1)
+            if token in links or not (html_dir / href).exists():
+                continue
+            links.append(token)
+
+        for token in _index_links(text):
+            text = text.replace(token, "")
+        text = text.replace(_INSERT_MARKER, "".join(links) + _INSERT_MARKER, 1)
+        write_text_atomic(index_path, text)
+        manifest["index_links"][index_path.name] = links
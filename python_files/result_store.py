@@ -0,0 +1,176 @@
+################################################# Run Result Store #################################################
+
+import json
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from .cost_functions import DEFAULT_OBJECTIVE
+from .report_builder import file_digest, inputs_fingerprint
+
+# Every design of every run is stored twice: appended to a JSON-lines log (easy
+# to diff / grep) and inserted into a SQLite table indexed by design key and
+# input fingerprint (fast queries). Nothing here imports SLiCAP.
+
+RESULTS_DIR = Path("results")
+RESULTS_JSONL = RESULTS_DIR / "runs.jsonl"
+RESULTS_DB = RESULTS_DIR / "results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS design_results (
+    run_id      TEXT NOT NULL,
+    design_key  TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    created     REAL NOT NULL,
+    best_cost   REAL,
+    wall_time_s REAL,
+    record      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_design_fingerprint ON design_results (design_key, fingerprint);
+CREATE INDEX IF NOT EXISTS idx_run ON design_results (run_id);
+"""
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        return float(value)
+    except Exception:
+        return repr(value)
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def input_fingerprint(cfg, spec_rows, settings=None):
+    """Fingerprint of everything that determines a design's optimization result."""
+    inputs = {
+        "design_key": cfg["key"],
+        "project": cfg["project"],
+        "schematic": file_digest(cfg["project"]),
+        "stage1_flavor": cfg.get("stage1_flavor"),
+        "stage2_flavor": cfg.get("stage2_flavor"),
+        "specs": spec_rows,
+        "settings": settings or {},
+    }
+    # Only non-default cost functions enter, so existing fingerprints stay valid.
+    if cfg.get("objective") not in (None, DEFAULT_OBJECTIVE):
+        inputs["objective"] = cfg["objective"]
+    if cfg.get("constraints"):
+        inputs["constraints"] = list(cfg["constraints"])
+    return inputs_fingerprint(inputs)
+
+
+def _connect(db_path):
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def record_design_result(record, db_path=RESULTS_DB, jsonl_path=RESULTS_JSONL):
+    """Append one design record (dict with run_id, design_key, fingerprint, ...)."""
+    record = _jsonable(record)
+    record.setdefault("created", time.time())
+    line = json.dumps(record, sort_keys=True)
+
+    jsonl_path = Path(jsonl_path)
+    jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+    with jsonl_path.open("a", encoding="utf-8") as fobj:
+        fobj.write(line + "\n")
+
+    first_stage = record.get("first_stage") or {}
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO design_results "
+            "(run_id, design_key, fingerprint, created, best_cost, wall_time_s, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["run_id"],
+                record["design_key"],
+                record["fingerprint"],
+                record["created"],
+                first_stage.get("best_cost"),
+                (record.get("timings") or {}).get("total_s"),
+                line,
+            ),
+        )
+    return record
+
+
+def load_results(design_key=None, fingerprint=None, run_id=None, limit=None, db_path=RESULTS_DB):
+    """Return stored records, newest first, filtered by any of the given keys."""
+    if not Path(db_path).exists():
+        return []
+    clauses = []
+    args = []
+    for column, value in (("design_key", design_key), ("fingerprint", fingerprint), ("run_id", run_id)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            args.append(value)
+    query = "SELECT record FROM design_results"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY created DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        args.append(int(limit))
+    with _connect(db_path) as conn:
+        rows = conn.execute(query, args).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def latest_result(design_key, fingerprint=None, db_path=RESULTS_DB):
+    records = load_results(design_key=design_key, fingerprint=fingerprint, limit=1, db_path=db_path)
+    return records[0] if records else None
+
+
+def list_runs(db_path=RESULTS_DB):
+    """Return [(run_id, created, [design keys])], newest run first."""
+    if not Path(db_path).exists():
+        return []
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT run_id, MIN(created), GROUP_CONCAT(design_key) FROM design_results "
+            "GROUP BY run_id ORDER BY MIN(created) DESC"
+        ).fetchall()
+    return [(run_id, created, keys.split(",")) for run_id, created, keys in rows]
+
+
+def _flatten(record, prefix=""):
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, prefix=f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_records(old, new):
+    """Numeric fields that differ between two records: {field: (old, new, rel_change)}."""
+    old_flat = _flatten(old)
+    new_flat = _flatten(new)
+    changes = {}
+    for name in sorted(set(old_flat) | set(new_flat)):
+        if name == "created":
+            continue
+        old_val = old_flat.get(name)
+        new_val = new_flat.get(name)
+        if old_val == new_val:
+            continue
+        rel = None
+        if old_val not in (None, 0.0) and new_val is not None:
+            rel = (new_val - old_val) / abs(old_val)
+        changes[name] = (old_val, new_val, rel)
+    return changes
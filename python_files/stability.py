@@ -0,0 +1,204 @@
+################################################# Loop-Gain Stability Metrics #################################################
+
+import numpy as np
+import sympy as sp
+
+from .kernels import _coefficients, _roots
+
+# Stability numbers from the loop-gain rational L(s) = N(s)/D(s). The
+# coefficients are extracted once; N and D are evaluated with Horner's rule on
+# a log-spaced grid (one row per parameter set), the first grid interval of each
+# crossing is located, and the crossing is refined by bisection in log(f) for
+# all rows at once.
+#
+# SLiCAP's loop gain is negative for negative feedback, so the margins use the
+# return ratio -L (phase 0 deg at low frequency). The closed loop is stable when
+# all roots of 1 - L = 0, i.e. of D - N, lie in the left half plane.
+
+STABILITY_F_LO = 1e3
+STABILITY_F_HI = 1e10
+STABILITY_POINTS = 1000
+REFINE_ITERATIONS = 48
+
+s = sp.Symbol("s")
+
+
+def rational_coefficients(expr):
+    """(numerator, denominator) float coefficients in s of a numeric Laplace expression, highest power first."""
+    num, den = _coefficients(expr)
+    return np.array([complex(c).real for c in num]), np.array([complex(c).real for c in den])
+
+
+def _polyval(coeffs, s_values):
+    """Horner evaluation of coefficient rows [rows, order + 1] at s_values [rows, k]."""
+    result = np.zeros(s_values.shape, dtype=complex)
+    for column in coeffs.T:
+        result = result * s_values + column[:, None]
+    return result
+
+
+def _rows(num, den):
+    num = np.atleast_2d(np.asarray(num, dtype=float))
+    den = np.atleast_2d(np.asarray(den, dtype=float))
+    rows = max(num.shape[0], den.shape[0])
+    return np.broadcast_to(num, (rows, num.shape[1])), np.broadcast_to(den, (rows, den.shape[1]))
+
+
+def response(num, den, freqs):
+    """N/D at freqs for every coefficient row, shape [rows, len(freqs)]."""
+    num, den = _rows(num, den)
+    s_values = np.broadcast_to(2j * np.pi * np.asarray(freqs, dtype=float)[None, :], (num.shape[0], np.size(freqs)))
+    return _polyval(num, s_values) / _polyval(den, s_values)
+
+
+def response_rows(num, den, freqs):
+    """N/D of row i at freqs[i] (one frequency per row)."""
+    s_values = 2j * np.pi * np.asarray(freqs, dtype=float)[:, None]
+    return (_polyval(num, s_values) / _polyval(den, s_values))[:, 0]
+
+
+def _first_crossing(values, level):
+    """Index of the first downward crossing of `level` per row, -1 if there is none."""
+    above = values >= level[:, None]
+    down = above[:, :-1] & ~above[:, 1:]
+    return np.where(down.any(axis=1), np.argmax(down, axis=1), -1)
+
+
+def _bisect(fn, lo, hi, iterations=REFINE_ITERATIONS):
+    """Refine per-row brackets [lo, hi] in log10(f) where fn(lo) >= 0 > fn(hi)."""
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        positive = fn(mid) >= 0
+        lo = np.where(positive, mid, lo)
+        hi = np.where(positive, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+def _bandwidth(num, den, log_freqs, magnitude):
+    """-3 dB frequency relative to the lowest grid frequency, NaN if not reached."""
+    target = magnitude[:, 0] / np.sqrt(2.0)
+    index = _first_crossing(magnitude, target)
+    found = index >= 0
+    bandwidth = np.full(index.shape, np.nan)
+    if found.any():
+        rows = np.flatnonzero(found)
+        sub_num, sub_den = num[rows], den[rows]
+
+        def excess(log_f):
+            return np.abs(response_rows(sub_num, sub_den, 10.0**log_f)) - target[rows]
+
+        bandwidth[rows] = 10.0 ** _bisect(excess, log_freqs[index[rows]], log_freqs[index[rows] + 1])
+    return bandwidth
+
+
+def closed_loop_poles(num, den):
+    """Roots of D - N (1 - L = 0) per row, shape [rows, order]."""
+    num, den = _rows(num, den)
+    width = max(num.shape[1], den.shape[1])
+    characteristic = np.zeros((num.shape[0], width))
+    characteristic[:, width - den.shape[1]:] += den
+    characteristic[:, width - num.shape[1]:] -= num
+    return _roots(characteristic)
+
+
+def closed_loop_stable(num, den):
+    """True per row when all closed-loop poles have a negative real part."""
+    roots = closed_loop_poles(num, den)
+    return np.all(roots.real < 0, axis=1) if roots.shape[1] else np.ones(roots.shape[0], dtype=bool)
+
+
+def stability_metrics(num, den, gain=None, f_lo=STABILITY_F_LO, f_hi=STABILITY_F_HI, n_points=STABILITY_POINTS):
+    """
+    Stability metrics of loop-gain coefficient rows (1-D for a single circuit,
+    2-D [rows, order + 1] for parameter sets). gain=(num, den) of the closed-loop
+    gain adds its -3 dB bandwidth. Returns a dict of arrays with one entry per
+    row; crossings that do not occur in [f_lo, f_hi] give NaN (inf for the gain
+    margin).
+    """
+    num, den = _rows(num, den)
+    log_freqs = np.linspace(np.log10(f_lo), np.log10(f_hi), int(n_points))
+    return_ratio = -response(num, den, 10.0**log_freqs)
+    magnitude = np.abs(return_ratio)
+    phase = np.degrees(np.unwrap(np.angle(return_ratio), axis=1))
+    phase -= 360.0 * np.round(phase[:, :1] / 360.0)
+    rows = np.arange(num.shape[0])
+
+    def phase_at(index, log_f):
+        # Continuous phase inside a grid interval: grid phase plus the local angle step.
+        sub = np.flatnonzero(index >= 0)
+        step = np.angle(-response_rows(num[sub], den[sub], 10.0**log_f) / return_ratio[sub, index[sub]])
+        return phase[sub, index[sub]] + np.degrees(step)
+
+    # Unity-gain crossover and phase margin.
+    unity = _first_crossing(magnitude, np.ones(len(rows)))
+    crossover = np.full(len(rows), np.nan)
+    phase_margin = np.full(len(rows), np.nan)
+    found = unity >= 0
+    if found.any():
+        sub = np.flatnonzero(found)
+
+        def excess(log_f):
+            return np.abs(response_rows(num[sub], den[sub], 10.0**log_f)) - 1.0
+
+        log_fc = _bisect(excess, log_freqs[unity[sub]], log_freqs[unity[sub] + 1])
+        crossover[sub] = 10.0**log_fc
+        phase_margin[sub] = 180.0 + phase_at(unity, log_fc)
+
+    # Phase crossover (-180 deg) and gain margin.
+    lag = _first_crossing(phase, np.full(len(rows), -180.0))
+    phase_crossover = np.full(len(rows), np.nan)
+    gain_margin = np.full(len(rows), np.inf)
+    found = lag >= 0
+    if found.any():
+        sub = np.flatnonzero(found)
+
+        def excess(log_f):
+            return phase_at(lag, log_f) + 180.0
+
+        log_f180 = _bisect(excess, log_freqs[lag[sub]], log_freqs[lag[sub] + 1])
+        phase_crossover[sub] = 10.0**log_f180
+        gain_margin[sub] = -20.0 * np.log10(np.abs(response_rows(num[sub], den[sub], 10.0**log_f180)))
+
+    metrics = {
+        "loopgain_lf": magnitude[:, 0],
+        "crossover_hz": crossover,
+        "phase_margin_deg": phase_margin,
+        "phase_crossover_hz": phase_crossover,
+        "gain_margin_db": gain_margin,
+        "loopgain_bandwidth_hz": _bandwidth(num, den, log_freqs, magnitude),
+        "closed_loop_stable": closed_loop_stable(num, den),
+    }
+    if gain is not None:
+        gain_num, gain_den = _rows(*gain)
+        gain_magnitude = np.abs(response(gain_num, gain_den, 10.0**log_freqs))
+        metrics["bandwidth_hz"] = _bandwidth(gain_num, gain_den, log_freqs, gain_magnitude)
+    return metrics
+
+
+def loopgain_stability(loopgain, gain=None, **kwargs):
+    """stability_metrics of SLiCAP Laplace expressions, as a dict of floats (None where not found)."""
+    num, den = rational_coefficients(loopgain)
+    gain_coeffs = rational_coefficients(gain) if gain is not None else None
+    metrics = stability_metrics(num, den, gain=gain_coeffs, **kwargs)
+    result = {}
+    for key, value in metrics.items():
+        value = value[0].item()
+        result[key] = None if isinstance(value, float) and np.isnan(value) else value
+    return result
+
+
+def kernel_stability(kernels, samples, **kwargs):
+    """stability_metrics for every parameter set of a CircuitKernels sample dict."""
+    num, den = kernels.coefficients("loopgain", samples)
+    gain = kernels.coefficients("gain", samples) if "gain" in kernels.transfers else None
+    return stability_metrics(num, den, gain=gain, **kwargs)
+
+
+def stability_ok(metrics, min_phase_margin=45.0, min_gain_margin=6.0):
+    """Boolean per row: closed loop stable and both margins met (a cheap optimizer constraint)."""
+    phase_margin = np.nan_to_num(np.asarray(metrics["phase_margin_deg"], dtype=float), nan=180.0)
+    return (
+        np.asarray(metrics["closed_loop_stable"], dtype=bool)
+        & (phase_margin >= min_phase_margin)
+        & (np.asarray(metrics["gain_margin_db"], dtype=float) >= min_gain_margin)
+    )
@@ -0,0 +1,59 @@
+################################################# Symbolic Parameter Helpers #################################################
+
+from contextlib import contextmanager
+
+import numpy as np
+import sympy as sp
+
+# SLiCAP substitutes every circuit parameter when it builds a numeric result.
+# Removing a parameter definition for the duration of an analysis keeps that
+# parameter as a free symbol, so one analysis gives an expression that can be
+# evaluated for many values of it with NumPy.
+
+
+@contextmanager
+def keep_symbolic(cir, names):
+    """
+    Temporarily delete the definitions of `names` from cir; restore them on exit.
+    Raises RuntimeError when a name is not a circuit parameter (the analysis
+    would silently stay at its nominal value).
+    """
+    for name in names:
+        if sp.Symbol(str(name)) not in cir.parDefs:
+            raise RuntimeError(f"Parameter '{name}' is not defined in circuit '{cir.title}'; it cannot be kept symbolic.")
+    saved = {}
+    for name in names:
+        saved[str(name)] = cir.parDefs[sp.Symbol(str(name))]
+        cir.delPar(str(name))
+    try:
+        yield [sp.Symbol(str(name)) for name in names]
+    finally:
+        for name, value in saved.items():
+            cir.defPar(name, value)
+
+
+def evaluate_over(expr, symbols, *values):
+    """
+    Evaluate expr for NumPy arrays of values of `symbols` (broadcast like NumPy).
+    Symbols that do not appear in expr are ignored.
+    """
+    symbols = list(symbols)
+    shape = np.broadcast(*[np.asarray(value) for value in values]).shape if values else ()
+    expr = sp.sympify(expr)
+    if not expr.free_symbols & set(symbols):
+        return np.full(shape, complex(sp.N(expr)))
+    func = sp.lambdify(symbols, expr, modules="numpy")
+    return np.broadcast_to(func(*values), shape)
+
+
+def par_values_over(cir, names, symbol_name, values):
+    """Return {name: array over values} for circuit parameters that depend on symbol_name."""
+    values = np.asarray(values, dtype=float)
+    with keep_symbolic(cir, [symbol_name]) as (symbol,):
+        exprs = {name: cir.getParValue(name, substitute=True, numeric=True) for name in names}
+    result = {}
+    for name, expr in exprs.items():
+        if expr is None:
+            raise RuntimeError(f"Parameter '{name}' is not defined in circuit '{cir.title}'.")
+        result[name] = np.real(evaluate_over(expr, [symbol], values)).astype(float)
+    return result
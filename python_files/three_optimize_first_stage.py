@@ -3,6 +3,7 @@
 ############################################################################
 
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 import os
 import time
 
@@ -10,15 +11,27 @@ from SLiCAP import *
 import numpy as np
 import sympy as sp
 
+from . import distributed_stage1, instrumentation, tracing
+from .corners import TEMP_CORNERS, corner_parameters, corner_temperatures, noise_function_over_corners
+from .noise_compliance import COMPLIANCE_POINTS, band_frequencies, check_noise, noise_function
+from .warm_start import TRUST_REGION_FACTOR
+
 ############################################################################
 # This script optimizes the first stage of the amplifier based on a
-# user-provided cost function and constraints.
+# user-provided cost function and constraints (see cost_functions.py; the
+# objective and extra constraints are chosen per design in DESIGN_SPECS).
 #
 # Optimization strategy (W and ID centric):
 # 1. An outer loop iterates through a range of possible widths (W1_N).
 # 2. For each width, an inner loop evaluates possible drain currents (ID1_N).
 # 3. For each (W1_N, ID1_N), the noise and cascode constraints are checked.
-# 4. The pair that yields the lowest cost is selected as the optimum.
+# 4. The costs of all valid pairs of a sweep (level) are evaluated in one
+#    vectorized pass; the pair that yields the lowest cost is the optimum.
+# By default the (W1_N, ID1_N) grid is coarse and refined around the best and
+# boundary cells level by level (STAGE1_SEARCH, see below).
+#
+# With temperature corners enabled (TEMP_CORNERS, see corners.py) the noise,
+# IC, pole and gain checks use the worst case over all corner temperatures.
 ############################################################################
 
 # --- Optimization Parameters ---
@@ -32,15 +45,86 @@ w_cost_bias = 1
 i_cost_bias = 1.5
 max_size_budget = 0.75
 
-# Precomputed sweep grids
-NOISE_FREQS = np.logspace(5, 7, 10)
+# Precomputed sweep grids (noise: dense grid over the f_min..f_max design band)
+NOISE_FREQS = band_frequencies()
 W_SWEEP_POINTS = 30
 ID_SWEEP_POINTS = 50
 
+# STAGE1_SEARCH=multires (default) starts from a coarse MULTIRES_W_POINTS x
+# MULTIRES_ID_POINTS grid and, level by level, refines the REFINE_TOP_K best
+# feasible cells and the REFINE_BOUNDARY_CELLS cheapest cells on the
+# feasibility boundary by REFINE_FACTOR, until the grid spacing is below
+# REFINE_TOL_DEC decades. STAGE1_SEARCH=grid sweeps the fixed W x ID grid.
+# max_levels (optimize_first_stage_parallel) caps the refinement levels; 0 only
+# evaluates the coarse grid (screening runs).
+STAGE1_SEARCH = os.getenv("STAGE1_SEARCH", "multires")
+MULTIRES_W_POINTS = 8
+MULTIRES_ID_POINTS = 10
+REFINE_FACTOR = 3
+REFINE_TOP_K = 4
+REFINE_BOUNDARY_CELLS = 8
+REFINE_TOL_DEC = 0.01
+
+# Warm-start trust region: +-TRUST_REGION_FACTOR around the seed, moved at most
+# TRUST_REGION_MOVES times when the optimum lands on its edge.
+TRUST_W_POINTS = 7
+TRUST_ID_POINTS = 9
+TRUST_REGION_MOVES = 2
+
+# Candidate keys of the cost-function metrics (W_ref/ID_ref are per-run scalars).
+METRIC_KEYS = {
+    "W": "W1",
+    "ID": "ID1_mag",
+    "W1C": "W1C",
+    "gm": "gm",
+    "IC": "IC",
+    "gain": "stage_gain",
+    "pole": "pole_freq",
+    "noise_margin": "noise_margin",
+}
+
 # Process-local circuit object.
 _WORKER_CIR = None
 
 
+def optimizer_settings():
+    """Settings that determine the first-stage result (used for result fingerprints)."""
+    return {
+        "noise_margin": noise_margin,
+        "I_budget_stage": I_budget_stage,
+        "target_pole_f": target_pole_f,
+        "target_stage_gain": target_stage_gain,
+        "gain_cost_bias": gain_cost_bias,
+        "w_cost_bias": w_cost_bias,
+        "i_cost_bias": i_cost_bias,
+        "max_size_budget": max_size_budget,
+        "noise_band": [float(NOISE_FREQS[0]), float(NOISE_FREQS[-1]), COMPLIANCE_POINTS],
+        "w_sweep_points": W_SWEEP_POINTS,
+        "id_sweep_points": ID_SWEEP_POINTS,
+        "search": STAGE1_SEARCH,
+        "refine": [MULTIRES_W_POINTS, MULTIRES_ID_POINTS, REFINE_FACTOR, REFINE_TOP_K, REFINE_BOUNDARY_CELLS, REFINE_TOL_DEC],
+        "temperature_corners": TEMP_CORNERS,
+    }
+
+
+def expected_evaluations(w_points=None, id_points=None):
+    """
+    Rough number of points of a full run (used to budget exploration runs): the
+    whole grid, or for multires the first level plus the refined cells of every
+    level down to REFINE_TOL_DEC (on the current axis; overlaps make it an upper
+    estimate).
+    """
+    multires = STAGE1_SEARCH == "multires"
+    w_points = w_points or (MULTIRES_W_POINTS if multires else W_SWEEP_POINTS)
+    id_points = id_points or (MULTIRES_ID_POINTS if multires else ID_SWEEP_POINTS)
+    if not multires:
+        return w_points * id_points
+    spacing = np.log10(I_budget_stage / 10e-6) / max(id_points - 1, 1)
+    levels = max(0, int(np.ceil(np.log(spacing / REFINE_TOL_DEC) / np.log(REFINE_FACTOR))))
+    per_level = (REFINE_TOP_K + REFINE_BOUNDARY_CELLS) * (REFINE_FACTOR**2 - 1)
+    return w_points * id_points + levels * per_level
+
+
 def _has_param(cir_obj, name):
     try:
         cir_obj.getParValue(name)
@@ -82,12 +166,30 @@ def _worker_init(base_cir):
     """Initialize each process with its own circuit clone from parent."""
     global _WORKER_CIR
     _WORKER_CIR = base_cir
+    if instrumentation.enabled():
+        instrumentation.install(base_cir)
+        instrumentation.reset()
+    tracing.drain()
+    tracing.name_process(f"stage-1 worker {os.getpid()}")
+
 
+def _par_values(local_cir, names, temperatures=()):
+    """Nominal parameter values, or arrays over the corner temperatures when given."""
+    if len(temperatures):
+        return corner_parameters(local_cir, names, temperatures)
+    return {name: float(local_cir.getParValue(name)) for name in names}
 
-def _tune_cascode(local_cir, initial_W1C_N, wc_par, ciss_par):
+
+def _output_resistance(gds):
+    with np.errstate(divide="ignore"):
+        return np.where(np.asarray(gds) > 0, 1.0 / np.asarray(gds), np.inf)
+
+
+def _tune_cascode(local_cir, initial_W1C_N, wc_par, ciss_par, temperatures=()):
     """
     Reduce cascode width until pole constraint is met or min width is reached.
-    Returns (success, final_W1C_N, pole_freq, stage_gain).
+    Returns (success, final_W1C_N, pole_freq, stage_gain); with corners the
+    lowest pole frequency and gain over all temperatures.
     """
     W1C_N = initial_W1C_N
     min_width = 180e-9
@@ -95,21 +197,18 @@ def _tune_cascode(local_cir, initial_W1C_N, wc_par, ciss_par):
     while W1C_N >= min_width:
         local_cir.defPar(wc_par, W1C_N)
         try:
-            gm_amp = float(local_cir.getParValue("g_m_X1"))
-            gds_amp = float(local_cir.getParValue("g_o_X1"))
-            ro_amp = 1.0 / gds_amp if gds_amp > 0 else float('inf')
-
-            gm_casc = float(local_cir.getParValue("g_m_X7"))
-            gds_casc = float(local_cir.getParValue("g_o_X7"))
-            ro_casc = 1.0 / gds_casc if gds_casc > 0 else float('inf')
-
-            ciss_val = float(local_cir.getParValue(ciss_par))
+            values = _par_values(local_cir, ("g_m_X1", "g_o_X1", "g_m_X7", "g_o_X7", ciss_par), temperatures)
         except Exception:
             W1C_N *= 0.85
             continue
-
-        iter_pole_freq = 1 / (2 * np.pi * ro_amp * gm_casc * ro_casc * ciss_val)
-        iter_stage_gain = gm_amp * ro_amp * gm_casc * ro_casc
+        gm_amp = values["g_m_X1"]
+        ro_amp = _output_resistance(values["g_o_X1"])
+        gm_casc = values["g_m_X7"]
+        ro_casc = _output_resistance(values["g_o_X7"])
+        ciss_val = values[ciss_par]
+
+        iter_pole_freq = float(np.min(1 / (2 * np.pi * ro_amp * gm_casc * ro_casc * ciss_val)))
+        iter_stage_gain = float(np.min(gm_amp * ro_amp * gm_casc * ro_casc))
         if iter_pole_freq > target_pole_f:
             return (True, W1C_N, iter_pole_freq, iter_stage_gain)
 
@@ -118,90 +217,323 @@ def _tune_cascode(local_cir, initial_W1C_N, wc_par, ciss_par):
     return (False, None, 0.0, 0.0)
 
 
-def _noise_ok(local_cir):
-    """Evaluate noise constraint for the current operating point."""
-    noise_expr = doNoise(local_cir, source="V1", detector="V_vo", numeric=True, pardefs='circuit').inoise
+def _noise_ratio(local_cir, temperatures=()):
+    """Worst noise/(margin * spec) ratio of the current operating point (over every corner when given)."""
+    if len(temperatures):
+        density = noise_function_over_corners(local_cir, temperatures)
+    else:
+        density = noise_function(
+            doNoise(local_cir, source="V1", detector="V_vo", numeric=True, pardefs='circuit').inoise
+        )
+    return check_noise(density, margin=noise_margin)["worst_ratio"]
 
-    for freq in NOISE_FREQS:
-        noise_val = float(sp.N(noise_expr.subs(f, freq)))
-        noise_spec = 1e-15 * (1 + 1e12 / freq**2)
-        ratio = noise_val / (noise_margin * noise_spec)
-        if ratio >= 1.0:
-            return False
 
-    return True
+def _evaluate_point(local_cir, W1_val, id_mag, w_par, id_par, wc_par, id_sign, ciss_par, temperatures):
+    """
+    Evaluate one (W1, |ID1|) point. Returns (candidate or None, status) with
+    status "ok", "gm" (no gain), "ic" (above IC_CRIT), "noise", "cascode" (pole
+    not reachable) or "error". Candidates carry their metrics; the cost is
+    assigned by _score.
+    """
+    id_val = float(id_sign * id_mag)
+    local_cir.defPar(w_par, W1_val)
+    local_cir.defPar(id_par, id_val)
 
+    try:
+        values = _par_values(local_cir, ("g_m_X1", "IC_X1", "IC_CRIT_X1"), temperatures)
+        if np.min(values["g_m_X1"]) <= 0:
+            return None, "gm"
 
-def _evaluate_width(task):
-    """Evaluate one width with a sequential current sweep in a worker process."""
-    local_cir = _WORKER_CIR
+        # Skip points above critical inversion; only evaluate near/under IC_crit.
+        if np.any(values["IC_X1"] > values["IC_CRIT_X1"]):
+            return None, "ic"
 
-    W1_val, id_sweep, denom_w, denom_id, w_par, id_par, wc_par, id_sign, ciss_par = task
+        noise_ratio = _noise_ratio(local_cir, temperatures)
+        if not noise_ratio < 1.0:
+            return None, "noise"
 
-    t0 = time.perf_counter()
-    local_cir.defPar(w_par, W1_val)
-    ic_crit = float(local_cir.getParValue("IC_CRIT_X1"))
+    except Exception:
+        return None, "error"
+
+    cascode_ok, found_W1C_N, found_pole_freq, found_stage_gain = _tune_cascode(
+        local_cir, W1_val, wc_par, ciss_par, temperatures
+    )
+    if not cascode_ok or found_stage_gain <= 0:
+        return None, "cascode"
+
+    candidate = {
+        "W1": W1_val,
+        "ID1": id_val,
+        "ID1_mag": id_mag,
+        "W1C": found_W1C_N,
+        "pole_freq": found_pole_freq,
+        "stage_gain": found_stage_gain,
+        "gm": float(np.min(values["g_m_X1"])),
+        "IC": float(np.max(values["IC_X1"])),
+        "noise_margin": 1.0 - noise_ratio,
+        "w_par": w_par,
+        "id_par": id_par,
+        "wc_par": wc_par,
+    }
+    return candidate, "ok"
+
+
+def _task_stats(W1_val, checked_points, t0, trace_start):
+    elapsed_s = time.perf_counter() - t0
+    stats = {
+        "W1": W1_val,
+        "checked_points": checked_points,
+        "elapsed_s": elapsed_s,
+        "pid": os.getpid(),
+    }
+    if instrumentation.enabled():
+        stats["calls"] = instrumentation.drain()
+    if tracing.enabled():
+        tracing.complete(f"W1={W1_val*1e6:.2f}um", trace_start, cat="width", checked_points=checked_points)
+        stats["trace"] = tracing.drain()
+    return stats
+
+
+def _evaluate_width(task):
+    """Evaluate one width with a sequential current sweep in a worker process; returns ([candidate], stats)."""
+    W1_val, id_sweep, *point_args = task
 
-    best_for_width = None
+    t0 = time.perf_counter()
+    trace_start = tracing.now()
+    candidates = []
     checked_points = 0
 
     # Sweep high->low current. Once noise fails, lower currents are skipped.
     for id_mag in id_sweep:
         checked_points += 1
-        id_val = float(id_sign * id_mag)
-        local_cir.defPar(id_par, id_val)
+        candidate, status = _evaluate_point(_WORKER_CIR, W1_val, id_mag, *point_args)
+        if status in ("gm", "noise", "error"):
+            break
+        if candidate is not None:
+            candidates.append(candidate)
 
-        try:
-            gm_check = float(local_cir.getParValue("g_m_X1"))
-            if gm_check <= 0:
-                break
+    return (candidates, _task_stats(W1_val, checked_points, t0, trace_start))
 
-            # Skip points above critical inversion; only evaluate near/under IC_crit.
-            ic_x1 = float(local_cir.getParValue("IC_X1"))
-            if ic_x1 > ic_crit:
-                continue
 
-            if not _noise_ok(local_cir):
-                break
+def _evaluate_points(task):
+    """Evaluate the given currents at one width (multi-resolution sweep); returns ([(candidate, status)], stats)."""
+    W1_val, id_mags, *point_args = task
 
-        except Exception:
-            break
+    t0 = time.perf_counter()
+    trace_start = tracing.now()
+    results = [_evaluate_point(_WORKER_CIR, W1_val, id_mag, *point_args) for id_mag in id_mags]
+    return (results, _task_stats(W1_val, len(id_mags), t0, trace_start))
 
-        cascode_ok, found_W1C_N, found_pole_freq, found_stage_gain = _tune_cascode(
-            local_cir, W1_val, wc_par, ciss_par
-        )
-        if not cascode_ok or found_stage_gain <= 0:
-            continue
 
-        cost = (((W1_val / denom_w)**w_cost_bias) * ((id_mag / denom_id)**i_cost_bias)) / ((found_stage_gain / target_stage_gain)**gain_cost_bias)
-        candidate = {
-            "cost": cost,
-            "W1": W1_val,
-            "ID1": id_val,
-            "ID1_mag": id_mag,
-            "W1C": found_W1C_N,
-            "pole_freq": found_pole_freq,
-            "stage_gain": found_stage_gain,
-            "w_par": w_par,
-            "id_par": id_par,
-            "wc_par": wc_par,
-        }
+def _score(candidates, scoring):
+    """
+    Assign candidate["cost"] to all candidates in one vectorized pass of the
+    objective (inf when a constraint fails); returns the cheapest valid
+    candidate or None. scoring is (objective, constraints, refs).
+    """
+    from . import cost_functions
 
-        if best_for_width is None or candidate["cost"] < best_for_width["cost"]:
-            best_for_width = candidate
+    if not candidates:
+        return None
+    objective, constraints, refs = scoring
+    costs = cost_functions.evaluate(cost_functions.metric_arrays(candidates, METRIC_KEYS, **refs), objective, constraints)
+    for candidate, cost in zip(candidates, costs):
+        candidate["cost"] = float(cost)
+    best = int(np.argmin(costs))
+    return candidates[best] if np.isfinite(costs[best]) else None
+
+
+def _valid(result):
+    candidate, _status = result
+    return candidate is not None and np.isfinite(candidate["cost"])
+
+
+def _trust_region(seed, W1_max):
+    """(width sweep, current sweep) of the trust region around seed {"W1", "ID1"}, high to low."""
+    w_hi = min(W1_max, seed["W1"] * TRUST_REGION_FACTOR)
+    w_lo = max(1e-6, min(w_hi, seed["W1"] / TRUST_REGION_FACTOR))
+    id_hi = min(I_budget_stage, seed["ID1"] * TRUST_REGION_FACTOR)
+    id_lo = max(10e-6, min(id_hi, seed["ID1"] / TRUST_REGION_FACTOR))
+    # np.unique drops repeated points of a region squeezed against a bound.
+    return (
+        np.unique(np.geomspace(w_hi, w_lo, TRUST_W_POINTS))[::-1],
+        np.unique(np.geomspace(id_hi, id_lo, TRUST_ID_POINTS))[::-1],
+    )
 
-    elapsed_s = time.perf_counter() - t0
-    stats = {
-        "W1": W1_val,
-        "checked_points": checked_points,
-        "elapsed_s": elapsed_s,
-        "pid": os.getpid(),
+
+def _on_edge(best, w_sweep, id_sweep, W1_max):
+    """True when best lies on an edge of the region that is not a bound of the full grid."""
+    inner = (
+        (np.isclose(best["W1"], w_sweep[0]) and w_sweep[0] < W1_max),
+        (np.isclose(best["W1"], w_sweep[-1]) and w_sweep[-1] > 1e-6),
+        (np.isclose(best["ID1_mag"], id_sweep[0]) and id_sweep[0] < I_budget_stage),
+        (np.isclose(best["ID1_mag"], id_sweep[-1]) and id_sweep[-1] > 10e-6),
+    )
+    return any(inner)
+
+
+def _grid_sweep(pool, w_sweep, id_sweep, task_args, scoring, pids):
+    """Evaluate every width of w_sweep on pool; returns (best candidate or None, evaluated points)."""
+    print("Scheduled widths (um): " + ", ".join(f"{w*1e6:.2f}" for w in w_sweep))
+    futures = [pool.submit(_evaluate_width, (float(W1_val), id_sweep) + task_args) for W1_val in w_sweep]
+    candidates = []
+    completed = 0
+    evaluations = 0
+    for future in as_completed(futures):
+        completed += 1
+        width_candidates, stats = future.result()
+        candidates.extend(width_candidates)
+        pids.add(stats["pid"])
+        evaluations += stats["checked_points"]
+        instrumentation.merge(stats.get("calls"))
+        tracing.merge(stats.get("trace"))
+        print(
+            f"Width done: W1={stats['W1']*1e6:.2f}um, "
+            f"checked={stats['checked_points']}/{len(id_sweep)}, "
+            f"valid={len(width_candidates)}, "
+            f"time={stats['elapsed_s']:.2f}s, "
+            f"pid={stats['pid']}"
+        )
+        if completed % 5 == 0 or completed == len(futures):
+            print(f"Progress: {completed}/{len(futures)} widths")
+
+    best = _score(candidates, scoring)
+    if best is not None:
+        print(
+            "Best of the sweep: "
+            f"W1={best['W1']*1e6:.2f}um, "
+            f"ID1={best['ID1']*1e3:.3f}mA, "
+            f"W1C={best['W1C']*1e6:.2f}um, "
+            f"Cost={best['cost']:.4g}, "
+            f"Gain={best['stage_gain']:.2f}, "
+            f"Pole Freq={best['pole_freq']/1e9:.2f}GHz"
+        )
+    return best, evaluations
+
+
+def _refine_cells(level_results):
+    """Lattice points to refine: the best valid cells and the cheapest valid cells next to invalid ones."""
+    feasible = {point: result[0] for point, result in level_results.items() if _valid(result)}
+    ranked = sorted(feasible, key=lambda point: feasible[point]["cost"])
+    boundary = [
+        (i, j) for (i, j) in ranked
+        if any(
+            neighbour in level_results and not _valid(level_results[neighbour])
+            for neighbour in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1))
+        )
+    ]
+    return set(ranked[:REFINE_TOP_K]) | set(boundary[:REFINE_BOUNDARY_CELLS])
+
+
+def _evaluate_lattice(pool, points, origin, spacing, task_args, pids):
+    """Evaluate lattice points (i, j) at 10**(origin + (i, j) * spacing) on pool; one task per width."""
+    by_width = {}
+    for i, j in sorted(points):
+        by_width.setdefault(i, []).append(j)
+    futures = {
+        pool.submit(
+            _evaluate_points,
+            (float(10 ** (origin[0] + i * spacing[0])), [float(10 ** (origin[1] + j * spacing[1])) for j in js]) + task_args,
+        ): (i, js)
+        for i, js in by_width.items()
     }
-    return (best_for_width, stats)
+    results = {}
+    for future in as_completed(futures):
+        i, js = futures[future]
+        point_results, stats = future.result()
+        pids.add(stats["pid"])
+        instrumentation.merge(stats.get("calls"))
+        tracing.merge(stats.get("trace"))
+        results.update({(i, j): result for j, result in zip(js, point_results)})
+    return results
+
+
+def _multires_sweep(pool, w_sweep, id_sweep, task_args, scoring, pids, max_levels=None):
+    """
+    Coarse-to-fine sweep over the box spanned by w_sweep x id_sweep (see
+    STAGE1_SEARCH), with at most max_levels refinement levels (None: until
+    REFINE_TOL_DEC); returns (best candidate or None, evaluated points).
+    """
+    origin = (np.log10(min(w_sweep)), np.log10(min(id_sweep)))
+    spacing = [
+        (np.log10(max(sweep)) - low) / max(len(sweep) - 1, 1) for sweep, low in zip((w_sweep, id_sweep), origin)
+    ]
+    extent = (len(w_sweep) - 1, len(id_sweep) - 1)  # lattice size at the current level
+    points = {(i, j) for i in range(extent[0] + 1) for j in range(extent[1] + 1)}
+    level_results = {}
+    best = None
+    evaluations = 0
+    offsets = range(-(REFINE_FACTOR // 2), REFINE_FACTOR // 2 + 1)
+    level = 0
+
+    while True:
+        new_results = _evaluate_lattice(pool, points - set(level_results), origin, spacing, task_args, pids)
+        evaluations += len(new_results)
+        level_results.update(new_results)
+        # One vectorized cost pass over every candidate of the level.
+        level_best = _score([c for c, _ in level_results.values() if c is not None], scoring)
+        if level_best is not None and (best is None or level_best["cost"] < best["cost"]):
+            best = level_best
+        print(
+            f"Level {level}: spacing W={spacing[0]:.3f} dec, ID={spacing[1]:.3f} dec, "
+            f"evaluated={len(new_results)}, valid={sum(map(_valid, level_results.values()))}/{len(level_results)}"
+            + (f", best cost={best['cost']:.4g} (W1={best['W1']*1e6:.2f}um, ID1={best['ID1']*1e3:.3f}mA)" if best else "")
+        )
 
+        cells = _refine_cells(level_results)
+        if max(spacing) <= REFINE_TOL_DEC or not cells or (max_levels is not None and level >= max_levels):
+            break
 
-def optimize_first_stage_parallel(cir, stage1_flavor=None, max_workers=None, cascode_ciss_par="c_iss_X4"):
-    """Run first-stage optimization with process-based parallel width evaluation."""
+        # Next level: REFINE_FACTOR x finer lattice; known points keep their results.
+        level += 1
+        spacing = [step / REFINE_FACTOR for step in spacing]
+        extent = tuple(size * REFINE_FACTOR for size in extent)
+        level_results = {
+            (REFINE_FACTOR * i, REFINE_FACTOR * j): result for (i, j), result in level_results.items()
+        }
+        points = {
+            (REFINE_FACTOR * i + a, REFINE_FACTOR * j + b)
+            for i, j in cells
+            for a in offsets
+            for b in offsets
+            if 0 <= REFINE_FACTOR * i + a <= extent[0] and 0 <= REFINE_FACTOR * j + b <= extent[1]
+        }
+        level_results = {point: result for point, result in level_results.items() if point in points}
+
+    return best, evaluations
+
+
+def optimize_first_stage_parallel(
+    cir,
+    stage1_flavor=None,
+    max_workers=None,
+    cascode_ciss_par="c_iss_X4",
+    w_points=None,
+    id_points=None,
+    seed=None,
+    objective=None,
+    constraints=(),
+    max_levels=None,
+):
+    """
+    Run first-stage optimization with process-based parallel width evaluation.
+    w_points/id_points override the sweep sizes (coarse screening runs; the
+    first level of the multi-resolution search); max_levels caps the
+    multi-resolution refinement (0: the first level only).
+    seed ({"W1", "ID1"}, see warm_start.py) restricts the sweep to a trust region
+    around it; the full grid is swept when the region holds no valid point.
+    objective/constraints are names registered in cost_functions.py (default:
+    the stage1_cost objective, no extra constraints).
+    """
+    multires = STAGE1_SEARCH == "multires"
+    w_points = w_points or (MULTIRES_W_POINTS if multires else W_SWEEP_POINTS)
+    id_points = id_points or (MULTIRES_ID_POINTS if multires else ID_SWEEP_POINTS)
+    from . import cost_functions
+
+    run_sweep = partial(_multires_sweep, max_levels=max_levels) if multires else _grid_sweep
+    objective = objective or cost_functions.DEFAULT_OBJECTIVE
+    constraints = list(constraints or ())
+    cost_functions.validate(objective, constraints)
     suffix = detect_stage1_flavor(cir, preferred=stage1_flavor)
     id_sign = 1.0 if suffix == "N" else -1.0
     w_par = f"W1_{suffix}"
@@ -220,86 +552,75 @@ def optimize_first_stage_parallel(cir, stage1_flavor=None, max_workers=None, cas
 
     W1_max = (W_P_3rd + W_N_3rd) / ((1 / max_size_budget) - 1)
 
-    best_cost = float('inf')
-    best_W1 = None
-    best_ID1 = None
-    best_W1C = None
-
     print(f"----- Running First Stage Optimization ({suffix}MOS) -----")
     print(f"Max {w_par} constraint: {W1_max*1e6:.2f} um")
+    print(f"Objective: {objective}" + (f", constraints: {', '.join(constraints)}" if constraints else ""))
+    temperatures = corner_temperatures(cir)
+    if len(temperatures):
+        print("Temperature corners (K): " + ", ".join(f"{temp:.1f}" for temp in temperatures))
 
-    w_sweep = np.geomspace(W1_max, 1e-6, W_SWEEP_POINTS)
-    id_sweep = np.geomspace(I_budget_stage, 10e-6, ID_SWEEP_POINTS)
-    print(f"Scheduled widths for {w_par} (um): " + ", ".join(f"{w*1e6:.2f}" for w in w_sweep))
-
-    tasks = [
-        (
-            float(W1_val),
-            id_sweep,
-            W_P_3rd + W_N_3rd,
-            ID_N_3rd,
-            w_par,
-            id_par,
-            wc_par,
-            id_sign,
-            cascode_ciss_par,
-        )
-        for W1_val in w_sweep
-    ]
+    task_args = (w_par, id_par, wc_par, id_sign, cascode_ciss_par, temperatures)
+    scoring = (objective, constraints, {"W_ref": W_P_3rd + W_N_3rd, "ID_ref": ID_N_3rd})
+    full_grid = (np.geomspace(W1_max, 1e-6, w_points), np.geomspace(I_budget_stage, 10e-6, id_points))
+    region = _trust_region(seed, W1_max) if seed else None
 
     if max_workers is None:
-        max_workers = max(1, min((os.cpu_count() or 2) - 1, len(tasks)))
+        n_widths = TRUST_W_POINTS if region is not None else w_points
+        max_workers = max(1, min((os.cpu_count() or 2) - 1, n_widths))
 
-    print(f"Evaluating {len(tasks)} widths with {max_workers} processes...")
+    if distributed_stage1.COORDINATOR_ADDRESS:
+        print("Evaluating widths on distributed workers...")
+        executor = distributed_stage1.WorkQueueExecutor(initializer=_worker_init, initargs=(cir,))
+    else:
+        print(f"Evaluating widths with {max_workers} processes...")
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init, initargs=(cir,))
 
-    completed = 0
+    best = None
+    evaluations = 0
     pids = set()
-    with ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init, initargs=(cir,)) as pool:
-        futures = [pool.submit(_evaluate_width, task) for task in tasks]
-
-        for future in as_completed(futures):
-            completed += 1
-            result, stats = future.result()
-            pids.add(stats["pid"])
-            print(
-                f"Width done: W1={stats['W1']*1e6:.2f}um, "
-                f"checked={stats['checked_points']}/{ID_SWEEP_POINTS}, "
-                f"time={stats['elapsed_s']:.2f}s, "
-                f"pid={stats['pid']}"
-            )
-
-            if result and result["cost"] < best_cost:
-                best_cost = result["cost"]
-                best_W1 = result["W1"]
-                best_ID1 = result["ID1"]
-                best_W1C = result["W1C"]
-
-                print(
-                    "New best found: "
-                    f"W1={best_W1*1e6:.2f}um, "
-                    f"ID1={best_ID1*1e3:.3f}mA, "
-                    f"W1C={best_W1C*1e6:.2f}um, "
-                    f"Cost={best_cost:.4f}, "
-                    f"Gain={result['stage_gain']:.2f}, "
-                    f"Pole Freq={result['pole_freq']/1e9:.2f}GHz"
-                )
-
-            if completed % 5 == 0 or completed == len(tasks):
-                print(f"Progress: {completed}/{len(tasks)} widths")
-
+    warm_start = None
+    t_start = time.perf_counter()
+    with executor as pool:
+        if region is not None:
+            warm_start = {"W1": seed["W1"], "ID1": seed["ID1"], "moves": 0, "fallback": False}
+            print(f"Trust region around the warm start W1={seed['W1']*1e6:.2f}um, ID1={seed['ID1']*1e3:.3f}mA")
+            while True:
+                candidate, points = run_sweep(pool, *region, task_args, scoring, pids)
+                evaluations += points
+                if candidate is None or (best is not None and candidate["cost"] >= best["cost"]):
+                    break
+                best = candidate
+                # An optimum on an inner edge of the region moves the region there.
+                if warm_start["moves"] >= TRUST_REGION_MOVES or not _on_edge(best, *region, W1_max):
+                    break
+                warm_start["moves"] += 1
+                region = _trust_region({"W1": best["W1"], "ID1": best["ID1_mag"]}, W1_max)
+                print(f"Optimum on the trust-region edge; moving the region (move {warm_start['moves']}).")
+            if best is None:
+                warm_start["fallback"] = True
+                print("No valid point in the trust region; sweeping the full grid.")
+        if best is None:
+            best, points = run_sweep(pool, *full_grid, task_args, scoring, pids)
+            evaluations += points
+
+    elapsed_s = time.perf_counter() - t_start
     print(f"Process workers used: {len(pids)}")
+    print(f"Evaluated points: {evaluations} in {elapsed_s:.2f}s")
 
-    if best_W1 is not None and best_ID1 is not None and best_W1C is not None:
-        cir.defPar(w_par, best_W1)
-        cir.defPar(id_par, best_ID1)
-        cir.defPar(wc_par, best_W1C)
-    else:
+    if best is None:
         print(f"Could not find a valid solution for {w_par} and {id_par}.")
         return None
+    best_cost = best["cost"]
+    best_W1 = best["W1"]
+    best_ID1 = best["ID1"]
+    best_W1C = best["W1C"]
+    cir.defPar(w_par, best_W1)
+    cir.defPar(id_par, best_ID1)
+    cir.defPar(wc_par, best_W1C)
 
     print("\n--- Main Optimization Complete ---")
     print("\n----- First Stage Optimization Finished -----")
-    print(f"Lowest Cost Found:      {best_cost:.4f}")
+    print(f"Lowest Cost Found:      {best_cost:.4g} ({objective})")
     print(f"Final Optimized {w_par}:   {best_W1*1e6:.2f} um")
     print(f"Final Optimized {id_par}:  {best_ID1*1e3:.3f} mA")
     print(f"Final Tuned {wc_par}:      {best_W1C*1e6:.2f} um")
@@ -307,6 +628,8 @@ def optimize_first_stage_parallel(cir, stage1_flavor=None, max_workers=None, cas
 
     return {
         "best_cost": best_cost,
+        "objective": objective,
+        "constraints": constraints,
         "stage1_flavor": suffix,
         "w_param": w_par,
         "id_param": id_par,
@@ -314,4 +637,9 @@ def optimize_first_stage_parallel(cir, stage1_flavor=None, max_workers=None, cas
         "W1": best_W1,
         "ID1": best_ID1,
         "W1C": best_W1C,
+        "evaluations": evaluations,
+        "elapsed_s": elapsed_s,
+        "workers": len(pids),
+        "temperatures": [float(temp) for temp in temperatures],
+        "warm_start": warm_start,
     }
@@ -2,17 +2,18 @@ from .three_optimize_second_stage_conventional import optimize_second_stage_conv
 from .three_optimize_second_stage_cross import optimize_second_stage_cross
 
 
-def optimize_second_stage(cir, stage2_flavor=None):
+def optimize_second_stage(cir, stage2_flavor=None, seed=None):
     """
     Dispatch second-stage optimization by flavor:
     - Conventional: 'N', 'P'
     - Cross-coupled variants: 'PN', 'NP'
+    seed ({"W2", "ID2"}, see warm_start.py) centres the width search.
     """
     flavor = (stage2_flavor or "N").upper().strip()
     if flavor in ("N", "P"):
-        return optimize_second_stage_conventional(cir, stage2_flavor=flavor)
+        return optimize_second_stage_conventional(cir, stage2_flavor=flavor, seed=seed)
     if flavor in ("PN", "NP"):
-        return optimize_second_stage_cross(cir, stage2_flavor=flavor)
+        return optimize_second_stage_cross(cir, stage2_flavor=flavor, seed=seed)
     raise RuntimeError(
         f"Unsupported stage2_flavor '{stage2_flavor}'. Expected one of: N, P, PN, NP."
     )
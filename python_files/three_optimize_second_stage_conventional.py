@@ -1,6 +1,8 @@
 from SLiCAP import *
 import numpy as np
 
+from .warm_start import width_brackets
+
 
 def _has_param(cir_obj, name):
     try:
@@ -31,7 +33,7 @@ def detect_stage2_flavor_conventional(cir_obj, preferred=None):
     )
 
 
-def optimize_second_stage_conventional(cir, stage2_flavor=None):
+def optimize_second_stage_conventional(cir, stage2_flavor=None, seed=None):
     print("\n--- Optimizing Second Stage (Conventional N/P) ---")
     suffix = detect_stage2_flavor_conventional(cir, preferred=stage2_flavor)
 
@@ -56,37 +58,39 @@ def optimize_second_stage_conventional(cir, stage2_flavor=None):
 
     gm_sym = "g_m_X6" if suffix == "N" else "g_m_X4"
 
-    W_low = 0.1e-6
-    W_high = 1000e-6
-    W = (W_low + W_high) / 2.0
-
-    converged = False
-    for i in range(max_iter):
-        W = (W_low + W_high) / 2.0
-        cir.defPar(w_par, W)
-
-        try:
-            gm_sim = abs(float(cir.getParValue(gm_sym)))
-        except Exception:
-            W_low = W
-            continue
-
-        error = abs(gm_sim - gm_target) / gm_target
-        if error < tolerance:
-            converged = True
+    # Bracket around the warm-start width first; the full range when it does not converge.
+    iterations = 0
+    for W_low, W_high in width_brackets((seed or {}).get("W2"), 0.1e-6, 1000e-6):
+        converged = False
+        for i in range(max_iter):
+            W = (W_low + W_high) / 2.0
+            cir.defPar(w_par, W)
+
+            try:
+                gm_sim = abs(float(cir.getParValue(gm_sym)))
+            except Exception:
+                W_low = W
+                continue
+
+            error = abs(gm_sim - gm_target) / gm_target
+            if error < tolerance:
+                converged = True
+                break
+
+            if gm_sim < gm_target:
+                W_low = W
+            else:
+                W_high = W
+        iterations += i + 1
+        if converged:
             break
 
-        if gm_sim < gm_target:
-            W_low = W
-        else:
-            W_high = W
-
     W = (W_low + W_high) / 2.0
     cir.defPar(w_par, W)
 
     print(f"\n----- Second Stage ({suffix}MOS Conventional) Sizing -----")
     if converged:
-        print(f"Converged in {i+1} iterations.")
+        print(f"Converged in {iterations} iterations.")
     else:
         print(f"WARNING: Max iterations ({max_iter}) reached. Result may not be accurate.")
 
@@ -103,4 +107,5 @@ def optimize_second_stage_conventional(cir, stage2_flavor=None):
         "gm_target": gm_target,
         "id_target_mag": id_target_mag,
         "gm_eval_symbol": gm_sym,
+        "iterations": iterations,
     }
@@ -1,6 +1,8 @@
 from SLiCAP import *
 import numpy as np
 
+from .warm_start import width_brackets
+
 
 def _match_stage2_ratio(cir_obj, gm_n_sym, gm_p_sym, max_iter=50, tol=0.01):
     w2_n = float(cir_obj.getParValue("W2_N"))
@@ -41,7 +43,7 @@ def _match_stage2_ratio(cir_obj, gm_n_sym, gm_p_sym, max_iter=50, tol=0.01):
     return ratio, converged, i + 1
 
 
-def optimize_second_stage_cross(cir, stage2_flavor):
+def optimize_second_stage_cross(cir, stage2_flavor, seed=None):
     """
     Cross flavors:
     - PN: optimize gm of X6 (N side), keep matched W2_P/W2_N ratio.
@@ -82,33 +84,35 @@ def optimize_second_stage_cross(cir, stage2_flavor):
     else:
         print(f"WARNING: ratio loop reached max iterations ({ratio_iter}).")
 
-    W_low = 0.1e-6
-    W_high = 1000e-6
-    W = (W_low + W_high) / 2.0
-    converged = False
-
     # W is always W2_N in this cross optimizer; W2_P follows the ratio.
-    for i in range(max_iter):
-        W = (W_low + W_high) / 2.0
-        cir.defPar("W2_N", W)
-        cir.defPar("W2_P", ratio_wp_wn * W)
-
-        try:
-            gm_sim = abs(float(cir.getParValue(gm_sym)))
-        except Exception:
-            W_low = W
-            continue
-
-        error = abs(gm_sim - gm_target) / gm_target
-        if error < tolerance:
-            converged = True
+    # Bracket around the warm-start width first; the full range when it does not converge.
+    iterations = 0
+    for W_low, W_high in width_brackets((seed or {}).get("W2"), 0.1e-6, 1000e-6):
+        converged = False
+        for i in range(max_iter):
+            W = (W_low + W_high) / 2.0
+            cir.defPar("W2_N", W)
+            cir.defPar("W2_P", ratio_wp_wn * W)
+
+            try:
+                gm_sim = abs(float(cir.getParValue(gm_sym)))
+            except Exception:
+                W_low = W
+                continue
+
+            error = abs(gm_sim - gm_target) / gm_target
+            if error < tolerance:
+                converged = True
+                break
+
+            if gm_sim < gm_target:
+                W_low = W
+            else:
+                W_high = W
+        iterations += i + 1
+        if converged:
             break
 
-        if gm_sim < gm_target:
-            W_low = W
-        else:
-            W_high = W
-
     W = (W_low + W_high) / 2.0
     cir.defPar("W2_N", W)
     cir.defPar("W2_P", ratio_wp_wn * W)
@@ -117,7 +121,7 @@ def optimize_second_stage_cross(cir, stage2_flavor):
 
     print(f"\n----- Second Stage (Cross {flavor}) Sizing -----")
     if converged:
-        print(f"Converged in {i+1} iterations.")
+        print(f"Converged in {iterations} iterations.")
     else:
         print(f"WARNING: Max iterations ({max_iter}) reached. Result may not be accurate.")
 
@@ -143,4 +147,6 @@ def optimize_second_stage_cross(cir, stage2_flavor):
         "ratio_w2p_w2n": ratio_wp_wn,
         "gm_target": gm_target,
         "id_target_mag": id_target_mag,
+        "iterations": iterations,
+        "ratio_iterations": ratio_iter,
     }
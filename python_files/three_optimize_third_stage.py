@@ -2,14 +2,155 @@
 ######## This script will optimize the three stage #########
 ############################################################################
 
+import json
+import os
+from pathlib import Path
+
 from SLiCAP import *
 import numpy as np
+import sympy as sp
+
+from .report_builder import inputs_fingerprint, write_text_atomic
+
+############################################################################
+# Stage-3 results are memoized by a fingerprint of the output-stage
+# subnetwork (the X2/X3 netlist lines), the definitions of every circuit
+# parameter the X2/X3 device models depend on, and the sizing targets below.
+# Designs with the same push-pull stage share one computation: in-process via
+# _MEMO and across runs via cache/third_stage_<fingerprint>.json.
+# THIRD_STAGE_CACHE=0 disables the memo.
+############################################################################
+
+OUTPUT_DEVICES = ("X2", "X3")
+OUTPUT_MODEL_PARS = ("g_m_X2", "g_m_X3", "IC_X2", "IC_X3")
+
+gm_quiescent_target = 1e-3
+gm_peak_target = 25e-3
+Po_1dB_Comppr = 1e-3 # 1 mW
+R_o = 50 # 50 Ohm
+
+CACHE_DIR = Path("cache")
+USE_CACHE = os.getenv("THIRD_STAGE_CACHE", "1") != "0"
 
 I_peak = None
 Iq = None
+_MEMO = {}
+
 
+def third_stage_settings():
+    """Targets that determine the stage-3 result (part of the memo fingerprint)."""
+    return {
+        "gm_quiescent_target": gm_quiescent_target,
+        "gm_peak_target": gm_peak_target,
+        "Po_1dB_Comppr": Po_1dB_Comppr,
+        "R_o": R_o,
+    }
 
-def optimize_third_stage(cir):
+
+def _output_stage_lines(netlist_path):
+    lines = []
+    for line in Path(netlist_path).read_text(encoding="utf-8").splitlines():
+        fields = line.split()
+        if fields and fields[0] in OUTPUT_DEVICES:
+            lines.append(" ".join(fields))
+    return sorted(lines)
+
+
+def _parameter_closure(cir, names):
+    """Definitions of `names` and of every parameter they depend on, as strings."""
+    definitions = {}
+    pending = [sp.Symbol(name) for name in names]
+    while pending:
+        symbol = pending.pop()
+        if str(symbol) in definitions or symbol not in cir.parDefs:
+            continue
+        value = sp.sympify(cir.parDefs[symbol])
+        definitions[str(symbol)] = str(value)
+        pending.extend(value.free_symbols)
+    return definitions
+
+
+def third_stage_fingerprint(cir, netlist_path=None):
+    """Fingerprint of the output stage of cir, or None when its netlist is not available."""
+    netlist_path = Path(netlist_path or Path("cir") / f"{cir.title}.cir")
+    if not netlist_path.exists():
+        return None
+    elements = _output_stage_lines(netlist_path)
+    if not elements:
+        return None
+    models = _parameter_closure(cir, OUTPUT_MODEL_PARS)
+    if not all(name in models for name in OUTPUT_MODEL_PARS):
+        # Model parameters not exposed as circuit parameters: depend on all of them.
+        models = _parameter_closure(cir, [str(symbol) for symbol in cir.parDefs])
+    return inputs_fingerprint(
+        {
+            "elements": elements,
+            "models": models,
+            "targets": third_stage_settings(),
+        }
+    )
+
+
+def _cache_path(fingerprint):
+    return CACHE_DIR / f"third_stage_{fingerprint[:16]}.json"
+
+
+def _lookup(fingerprint):
+    if fingerprint in _MEMO:
+        return _MEMO[fingerprint]
+    path = _cache_path(fingerprint)
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("meta", {}).get("fingerprint") != fingerprint:
+        return None
+    _MEMO[fingerprint] = payload["result"]
+    return payload["result"]
+
+
+def _store(fingerprint, result):
+    _MEMO[fingerprint] = dict(result)
+    payload = {"meta": {"fingerprint": fingerprint}, "result": result}
+    write_text_atomic(_cache_path(fingerprint), json.dumps(payload, indent=2))
+
+
+def _apply_result(cir, result):
+    global I_peak, Iq
+    cir.defPar("W_N", result["Wn"])
+    cir.defPar("W_P", result["Wp"])
+    cir.defPar("ID_N", result["Iq"])
+    cir.defPar("ID_P", -result["Iq"])
+    Iq = result["Iq"]
+    I_peak = result["I_peak"]
+
+
+def optimize_third_stage(cir, netlist_path=None, use_cache=None, seed=None):
+    """
+    Size the push-pull output stage, reusing the result of an identical output stage when available.
+    seed ({"Iq", "Wn", "Wp"}, see warm_start.py) is the starting point of the sizing loops.
+    """
+    use_cache = USE_CACHE if use_cache is None else use_cache
+    fingerprint = third_stage_fingerprint(cir, netlist_path) if use_cache else None
+    if fingerprint:
+        cached = _lookup(fingerprint)
+        if cached is not None:
+            _apply_result(cir, cached)
+            print(f"\n----- Output stage reused (fingerprint {fingerprint[:10]}) -----")
+            print(f"Iq                 = {cached['Iq']*1e3:.2f} mA")
+            print(f"Wn                 = {cached['Wn']*1e6:.1f} um")
+            print(f"Wp                 = {cached['Wp']*1e6:.1f} um")
+            return dict(cached)
+
+    result = _optimize_third_stage(cir, seed)
+    if fingerprint:
+        _store(fingerprint, result)
+    return result
+
+
+def _optimize_third_stage(cir, seed=None):
     global I_peak, Iq
     gm_peak_n = float("nan")
     gm_peak_p = float("nan")
@@ -26,6 +167,10 @@ def optimize_third_stage(cir):
     tolerance = 0.01
     converged = False
 
+    if seed:
+        cir.defPar("W_N", seed["Wn"])
+        cir.defPar("W_P", seed["Wp"])
+
     for i in range(max_iter):
         gm2 = float(cir.getParValue("g_m_X2"))  # PMOS
         gm3 = float(cir.getParValue("g_m_X3"))  # NMOS
@@ -75,10 +220,6 @@ def optimize_third_stage(cir):
     #### Output Stage Bias + Drive Capability Sizing ####
     ############################################################################
 
-    gm_quiescent_target = 1e-3
-    gm_peak_target = 25e-3
-    Po_1dB_Comppr = 1e-3 # 1 mW
-    R_o = 50 # 50 Ohm
     Vo_p = (2*Po_1dB_Comppr*R_o)**0.5
     drive_capability = (2*Vo_p)/100 # peak drive for v_peak. Vp2p = 2x Vop = 1.26
 
@@ -86,12 +227,13 @@ def optimize_third_stage(cir):
     max_iter_inner = 15
     tol = 0.02
 
-    Iq = 0.5e-3
+    Iq = seed["Iq"] if seed else 0.5e-3
+    W_start = seed["Wn"] if seed else 20e-6
 
     for outer in range(max_iter_outer):
         I_peak = Iq + drive_capability
 
-        W = 20e-6
+        W = W_start
         for _inner in range(max_iter_inner):
             cir.defPar("W_N", W)
             cir.defPar("W_P", W * ratio)
@@ -153,6 +295,8 @@ def optimize_third_stage(cir):
     print(f"ICp quiescent      = {ICp_q:.2f}")
 
     return {
+        "gm_match_iterations": i + 1,
+        "bias_iterations": outer + 1,
         "ratio_wp_wn": ratio,
         "Iq": Iq,
         "I_peak": I_peak,
@@ -0,0 +1,113 @@
+################################################# Timeline Trace Export #################################################
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Span events of the pipeline stages, the stage-1 width tasks and the report
+# steps, written as one Chrome trace per run (open in chrome://tracing or
+# https://ui.perfetto.dev). Timestamps are wall-clock microseconds, so spans of
+# different processes line up on one timeline; every process gets its own row.
+# Enabled with PIPELINE_TRACE=1 or `main.py optimize|report --trace`.
+#
+# Worker processes return drain() with their results; the parent adds the
+# events with merge(), as for the SLiCAP call statistics (instrumentation.py).
+
+TRACE_ENV = "PIPELINE_TRACE"
+TRACE_DIR = Path("traces")
+
+_EVENTS = []
+_STAGE = None  # (name, args, start) of the open stage span
+
+
+def enabled():
+    return os.getenv(TRACE_ENV, "0") == "1"
+
+
+def enable():
+    """Switch tracing on for this process and the worker processes it starts."""
+    os.environ[TRACE_ENV] = "1"
+
+
+def now():
+    return time.time()
+
+
+def complete(name, start, end=None, cat="stage", **args):
+    """Record a finished span from `start` to `end` (seconds since the epoch, from now())."""
+    if not enabled():
+        return
+    end = now() if end is None else end
+    _EVENTS.append(
+        {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": max(end - start, 0.0) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+    )
+
+
+@contextmanager
+def span(name, cat="stage", **args):
+    start = now()
+    try:
+        yield
+    finally:
+        complete(name, start, cat=cat, **args)
+
+
+def stage(name, **args):
+    """Close the open stage span and open `name` (None only closes); for flat stage sequences."""
+    global _STAGE
+    if _STAGE is not None:
+        previous, previous_args, start = _STAGE
+        complete(previous, start, **previous_args)
+    _STAGE = (name, args, now()) if name is not None else None
+
+
+def name_process(label):
+    """Row label of this process in the trace viewer."""
+    if enabled():
+        _EVENTS.append({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": label}})
+
+
+def drain():
+    """Events recorded so far, cleared afterwards (for worker processes)."""
+    events = list(_EVENTS)
+    _EVENTS.clear()
+    return events
+
+
+def merge(events):
+    _EVENTS.extend(events or ())
+
+
+def write_trace(run_id, trace_dir=TRACE_DIR):
+    """Write the collected events to traces/trace_<run_id>.json and return the path (None if disabled)."""
+    if not enabled():
+        return None
+    stage(None)
+    events = []
+    seen_names = set()
+    for event in _EVENTS:
+        if event["ph"] == "M":
+            key = (event["pid"], event["args"]["name"])
+            if key in seen_names:
+                continue
+            seen_names.add(key)
+        events.append(event)
+    path = Path(trace_dir) / f"trace_{run_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": run_id}}
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    _EVENTS.clear()
+    print(f"Wrote timeline trace ({len(events)} events) to '{path}'.")
+    return path
@@ -0,0 +1,87 @@
+################################################# Optimizer Warm Start #################################################
+
+import os
+
+from . import result_store
+
+# Seeds for the stage optimizers from the result store. The seed of a design is
+# taken from the closest stored record: the same inputs (fingerprint) first,
+# then the same design key, then a related design (the same design with or
+# without phantom zero, then the same stage-1 and stage-2 flavours); newer
+# records win ties. The seed only moves where the optimizers start:
+#   stage 1: the sweep covers a trust region of +-TRUST_REGION_FACTOR around the
+#            seed (moved when the optimum lands on its edge, full grid when it
+#            holds no valid point),
+#   stage 2: the width bisection starts from a bracket around the seed,
+#   stage 3: the gm-matching and bias loops start from the seed sizes.
+# WARM_START=0 disables seeding.
+
+WARM_START = os.getenv("WARM_START", "1") != "0"
+TRUST_REGION_FACTOR = 3.0
+SEARCH_LIMIT = 500
+
+
+def _base_key(design_key):
+    key = design_key.upper()
+    return key[:-4] if key.endswith("_PHZ") else key
+
+
+def relatedness(cfg, record, fingerprint=None):
+    """Closeness of a stored record to design cfg (0: unrelated)."""
+    first = record.get("first_stage") or {}
+    second = record.get("second_stage") or {}
+    score = 0
+    if fingerprint and record.get("fingerprint") == fingerprint:
+        score += 16
+    if record.get("design_key") == cfg["key"]:
+        score += 8
+    elif _base_key(record.get("design_key", "")) == _base_key(cfg["key"]):
+        score += 4
+    if first.get("stage1_flavor") == cfg.get("stage1_flavor"):
+        score += 2
+    if second.get("stage2_flavor") == cfg.get("stage2_flavor"):
+        score += 1
+    return score
+
+
+def _magnitudes(result, keys):
+    values = {}
+    for key in keys:
+        try:
+            values[key] = abs(float(result[key]))
+        except (KeyError, TypeError, ValueError):
+            return None
+    return values
+
+
+def find_seed(cfg, fingerprint=None, db_path=result_store.RESULTS_DB):
+    """
+    Seed {"source", "run_id", "score", "first_stage", "second_stage",
+    "third_stage"} from the closest stored record, or None. Stage entries hold
+    magnitudes (W1, ID1, W1C / W2, ID2 / Iq, Wn, Wp) or None when not stored.
+    """
+    best = None
+    for record in result_store.load_results(limit=SEARCH_LIMIT, db_path=db_path):
+        if not record.get("first_stage"):
+            continue
+        score = relatedness(cfg, record, fingerprint)
+        if score > 0 and (best is None or score > best[0]):
+            best = (score, record)
+    if best is None:
+        return None
+    score, record = best
+    return {
+        "source": record["design_key"],
+        "run_id": record.get("run_id"),
+        "score": score,
+        "first_stage": _magnitudes(record["first_stage"], ("W1", "ID1", "W1C")),
+        "second_stage": _magnitudes(record.get("second_stage") or {}, ("W2", "ID2")),
+        "third_stage": _magnitudes(record.get("third_stage") or {}, ("Iq", "Wn", "Wp")),
+    }
+
+
+def width_brackets(seed_width, low, high, factor=TRUST_REGION_FACTOR):
+    """Bisection brackets to try in order: around the seed (if any), then [low, high]."""
+    if seed_width:
+        yield max(low, seed_width / factor), min(high, seed_width * factor)
+    yield low, high